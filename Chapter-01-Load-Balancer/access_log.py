@@ -0,0 +1,55 @@
+import queue
+import random
+import sys
+import threading
+import time
+
+
+class AccessLog:
+    """
+    Sampled, asynchronous, batched request log.
+
+    Printing every request from every handler thread serializes them all on
+    stdout. Instead only sample_rate of requests are logged at all (decided
+    before any string formatting), log() just enqueues the message, and a
+    background thread writes whatever has queued up in one batch every
+    flush_interval seconds. When the queue is full new messages are dropped
+    rather than blocking the request path.
+    """
+
+    def __init__(self, sample_rate=0.01, flush_interval=1.0, max_pending=10_000, stream=None):
+        if not 0 <= sample_rate <= 1:
+            raise ValueError("Sample rate must be between 0 and 1")
+        if flush_interval <= 0:
+            raise ValueError("Flush interval must be greater than 0")
+        self.sample_rate = sample_rate
+        self.flush_interval = flush_interval
+        self.stream = stream
+        self.dropped = 0
+        self._pending = queue.Queue(maxsize=max_pending)
+        self._thread = threading.Thread(target=self._run, name="access-log", daemon=True)
+        self._thread.start()
+
+    def sampled(self):
+        """Whether to log the current request; check before building the message."""
+        return self.sample_rate >= 1 or random.random() < self.sample_rate
+
+    def log(self, message):
+        try:
+            self._pending.put_nowait(message)
+        except queue.Full:
+            self.dropped += 1
+
+    def _run(self):
+        while True:
+            batch = [self._pending.get()]
+            # Give the batch a moment to fill up, then take all that's queued
+            time.sleep(self.flush_interval)
+            while True:
+                try:
+                    batch.append(self._pending.get_nowait())
+                except queue.Empty:
+                    break
+            stream = self.stream or sys.stdout
+            stream.write("\n".join(batch) + "\n")
+            stream.flush()
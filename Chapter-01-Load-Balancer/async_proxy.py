@@ -0,0 +1,463 @@
+import asyncio
+from collections import deque
+
+from health_check import FAILURE_STATUSES
+from metrics import LoadBalancerMetrics
+from stream_relay import end_to_end_headers
+
+# Size of each read when relaying bodies between sockets
+RELAY_CHUNK_SIZE = 64 * 1024
+
+# Methods that are safe to send again if the first attempt never reached the backend
+IDEMPOTENT_METHODS = {"GET", "HEAD", "PUT", "DELETE", "OPTIONS", "TRACE"}
+
+# Request headers the engine sets itself instead of copying from the client
+REWRITTEN_REQUEST_HEADERS = {"host", "content-length", "expect", "x-forwarded-for"}
+
+
+class BadRequest(Exception):
+    pass
+
+
+def response_status(status_line):
+    return int(status_line.split(" ", 2)[1])
+
+
+class Headers(list):
+    """List of (name, value) pairs with a case-insensitive get(), like http.client's."""
+
+    def get(self, name, default=None):
+        name = name.lower()
+        for key, value in self:
+            if key.lower() == name:
+                return value
+        return default
+
+
+async def read_headers(reader):
+    """Read an HTTP header block into Headers."""
+    headers = Headers()
+    while True:
+        line = await reader.readline()
+        if not line:
+            raise ConnectionError("Connection closed while reading headers")
+        if line in (b"\r\n", b"\n"):
+            return headers
+        name, sep, value = line.decode("latin-1").partition(":")
+        if not sep:
+            raise BadRequest(f"Malformed header line: {line!r}")
+        headers.append((name.strip(), value.strip()))
+
+
+# Idle keep-alive connections to one backend, as (reader, writer) pairs; at
+# most max_idle are kept, while connections in use are not limited
+class AsyncBackendPool:
+    def __init__(self, host, port, max_idle=100, connect_timeout=None):
+        self.host = host
+        self.port = port
+        self.max_idle = max_idle
+        self.connect_timeout = connect_timeout
+        self._idle = deque()
+        self.hits = 0
+        self.misses = 0
+
+    async def acquire(self):
+        while self._idle:
+            reader, writer = self._idle.pop()
+            # The backend closed the socket while it sat in the pool
+            if writer.is_closing() or reader.at_eof():
+                writer.close()
+                continue
+            self.hits += 1
+            return reader, writer
+        self.misses += 1
+        return await asyncio.wait_for(asyncio.open_connection(self.host, self.port), self.connect_timeout)
+
+    def release(self, reader, writer, reusable=True):
+        if reusable and len(self._idle) < self.max_idle and not writer.is_closing():
+            self._idle.append((reader, writer))
+        else:
+            writer.close()
+
+    def close(self):
+        while self._idle:
+            _, writer = self._idle.pop()
+            writer.close()
+
+    def stats(self):
+        return {
+            "backend": f"{self.host}:{self.port}",
+            "idle": len(self._idle),
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+
+class AsyncLoadBalancer:
+    """
+    asyncio proxy engine: one event loop multiplexes every client and
+    backend socket instead of dedicating a thread to each connection.
+
+    Backends are chosen by the same Strategy objects as the threaded
+    handler (see strategies.py). Their locks are uncontended here since
+    everything runs on the event loop thread. Retries and hedged requests
+    follow retry_policy (see resilience.py); hedges race as two tasks.
+    """
+
+    def __init__(self, strategy, backends, pool_size=100, health_checker=None, metrics=None, access_log=None,
+                 retry_policy=None, connect_timeout=None, read_timeout=None):
+        self.strategy = strategy
+        self.health_checker = health_checker
+        self.metrics = metrics or LoadBalancerMetrics()
+        self.access_log = access_log
+        self.retry_policy = retry_policy
+        self.read_timeout = read_timeout
+        self.pools = {
+            backend: AsyncBackendPool(*backend, max_idle=pool_size, connect_timeout=connect_timeout)
+            for backend in backends
+        }
+
+    async def serve(self, host="localhost", port=9000):
+        server = await asyncio.start_server(self.handle_client, host, port, backlog=1024)
+        print(f"[LoadBalancer] Running at http://{host}:{port} (asyncio)")
+        async with server:
+            try:
+                await server.serve_forever()
+            finally:
+                for pool in self.pools.values():
+                    pool.close()
+
+    async def handle_client(self, reader, writer):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                try:
+                    method, path, version = request_line.decode("latin-1").split()
+                    headers = await read_headers(reader)
+                except (ValueError, BadRequest):
+                    await self._write_simple(writer, "HTTP/1.0", 400, b"Bad Request", keep_alive=False)
+                    break
+
+                connection = (headers.get("Connection") or "").lower()
+                keep_alive = version == "HTTP/1.1" and connection != "close"
+
+                if method == "CONNECT":
+                    await self._write_simple(writer, version, 501, b"Not Implemented", keep_alive=False)
+                    break
+                if path == "/favicon.ico" and method == "GET":
+                    await self._write_simple(writer, version, 204, b"", keep_alive)
+                else:
+                    keep_alive = await self.proxy(method, path, version, headers, keep_alive, reader, writer)
+                if not keep_alive:
+                    break
+        except Exception:
+            # Client went away or the backend broke framing mid-body; there is
+            # no way to send an error response at this point
+            pass
+        finally:
+            writer.close()
+
+    async def proxy(self, method, path, version, headers, keep_alive, client_reader, client_writer):
+        """Relay one request to a backend. Returns whether the client connection may stay open."""
+        if "chunked" in (headers.get("Transfer-Encoding") or "").lower():
+            body_length, body_chunked = None, True
+        else:
+            length = headers.get("Content-Length")
+            if length is not None and not length.isdigit():
+                await self._write_simple(client_writer, version, 400, b"Invalid Content-Length", keep_alive=False)
+                return False
+            body_length, body_chunked = (int(length) if length is not None else None), False
+        has_body = body_chunked or bool(body_length)
+
+        key = self.strategy.request_key(path, headers)
+        backend = self.strategy.pick(key)
+
+        # The client is waiting for the go-ahead before it sends the body
+        if has_body and (headers.get("Expect") or "").lower() == "100-continue":
+            client_writer.write(f"{version} 100 Continue\r\n\r\n".encode("latin-1"))
+
+        head = [f"{method} {path} HTTP/1.1"]
+        for name, value in end_to_end_headers(headers):
+            if name.lower() not in REWRITTEN_REQUEST_HEADERS:
+                head.append(f"{name}: {value}")
+        client_ip = client_writer.get_extra_info("peername")[0]
+        forwarded_for = headers.get("X-Forwarded-For")
+        head.append(f"X-Forwarded-For: {forwarded_for}, {client_ip}" if forwarded_for
+                    else f"X-Forwarded-For: {client_ip}")
+        if body_chunked:
+            head.append("Transfer-Encoding: chunked")
+        elif body_length is not None:
+            head.append(f"Content-Length: {body_length}")
+        request_tail = ("\r\n".join(head[1:]) + "\r\n\r\n").encode("latin-1")
+
+        def request_head(target):
+            # Only the Host line differs between backends (retries, hedges)
+            target_host, target_port = target
+            return f"{head[0]}\r\nHost: {target_host}:{target_port}\r\n".encode("latin-1") + request_tail
+
+        async def send_body(backend_writer):
+            # Streamed from the client socket as it arrives, never buffered whole
+            if body_chunked:
+                await self._relay_chunked(client_reader, backend_writer, passthrough=True)
+            elif body_length:
+                await self._relay_exact(client_reader, backend_writer, body_length)
+
+        request = (method, path, key, request_head, send_body)
+        replayable = method in IDEMPOTENT_METHODS and not has_body
+        try:
+            backend, backend_reader, backend_writer, status_line, response_headers = await self._exchange(
+                request, backend, replayable)
+        except Exception as e:
+            # Whatever is left of the request body is still unread on the socket
+            if has_body:
+                keep_alive = False
+            await self._write_simple(client_writer, version, 502, f"Bad Gateway: {str(e) or type(e).__name__}".encode(), keep_alive)
+            return keep_alive
+        pool = self.pools[backend]
+        status = response_status(status_line)
+
+        length = response_headers.get("Content-Length")
+        chunked = "chunked" in (response_headers.get("Transfer-Encoding") or "").lower()
+        backend_reusable = (response_headers.get("Connection") or "").lower() != "close"
+        no_body = method == "HEAD" or status in (204, 304) or status < 200
+        if no_body:
+            chunked = False
+            length = "0"
+        # Without a length or chunked framing the body runs until the backend
+        # closes, so the client can only learn where it ends the same way
+        elif length is None and not chunked:
+            backend_reusable = False
+            keep_alive = False
+        # HTTP/1.0 clients don't understand chunked encoding: decode it and
+        # delimit the body by closing the connection instead
+        relay_chunked = chunked and version == "HTTP/1.1"
+        if chunked and not relay_chunked:
+            keep_alive = False
+
+        head = [f"{version} {status_line.split(' ', 1)[1]}"]
+        for name, value in end_to_end_headers(response_headers):
+            head.append(f"{name}: {value}")
+        if relay_chunked:
+            head.append("Transfer-Encoding: chunked")
+        head.append("Connection: keep-alive" if keep_alive else "Connection: close")
+        client_writer.write(("\r\n".join(head) + "\r\n\r\n").encode("latin-1"))
+
+        try:
+            if chunked:
+                await self._relay_chunked(backend_reader, client_writer, relay_chunked)
+            elif length is not None:
+                await self._relay_exact(backend_reader, client_writer, int(length))
+            else:
+                await self._relay_until_eof(backend_reader, client_writer)
+        except Exception:
+            pool.release(backend_reader, backend_writer, reusable=False)
+            raise
+        pool.release(backend_reader, backend_writer, reusable=backend_reusable)
+        return keep_alive
+
+    async def _exchange(self, request, backend, replayable):
+        """
+        Send the request to backend and return (backend, reader, writer,
+        status line, headers) for the response to relay.
+
+        Replayable requests are retried on other backends and hedged as the
+        retry policy allows. Once retries run out the last failed response
+        is returned, or the last error raised.
+        """
+        policy = self.retry_policy
+        if policy is None or not replayable:
+            return (backend, *await self._attempt(request, backend, replayable))
+
+        key = request[2]
+        policy.budget.record_request()
+        tried = [backend]
+        while True:
+            result = error = None
+            try:
+                hedge_delay = policy.hedge_delay()
+                if hedge_delay is None:
+                    result = (backend, *await self._attempt(request, backend, True))
+                else:
+                    result = await self._hedged_attempt(request, backend, tried, hedge_delay)
+            except Exception as e:
+                error = e
+            if result is not None and response_status(result[3]) not in policy.retry_statuses:
+                return result
+
+            alternate = None
+            if (len(tried) <= policy.max_retries and len(tried) < len(self.strategy.active)
+                    and policy.budget.try_withdraw()):
+                alternate = self.strategy.pick_excluding(tried, key)
+            if alternate is None:
+                if result is None:
+                    raise error
+                return result
+            if result is not None:
+                # Its body is never read, so the connection can't be reused
+                self.pools[result[0]].release(result[1], result[2], reusable=False)
+            self.metrics.request_retried(alternate)
+            tried.append(alternate)
+            backend = alternate
+
+    async def _attempt(self, request, backend, retryable):
+        """Send the request to one backend; returns (reader, writer, status line, headers)."""
+        method, path, _, request_head, send_body = request
+        self.metrics.request_started(backend)
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        try:
+            result = await self._send_to_backend(self.pools[backend], request_head(backend), send_body, retryable)
+        except asyncio.CancelledError:
+            self._cancel(backend, loop.time() - started)
+            raise
+        except Exception:
+            self._record(backend, method, path, loop.time() - started, None)
+            raise
+        self._record(backend, method, path, loop.time() - started, response_status(result[2]))
+        return result
+
+    async def _hedged_attempt(self, request, backend, tried, delay):
+        """
+        Send the request to backend and, if it hasn't answered after delay
+        seconds, to a second backend too; the first response wins and the
+        other attempt is cancelled.
+        """
+        policy = self.retry_policy
+        tasks = {asyncio.create_task(self._attempt(request, backend, True)): backend}
+        done, _ = await asyncio.wait(tasks, timeout=delay)
+        if not done:
+            alternate = None
+            if len(tried) < len(self.strategy.active) and policy.budget.try_withdraw():
+                alternate = self.strategy.pick_excluding(tried, request[2])
+            if alternate is not None:
+                self.metrics.request_hedged(alternate)
+                tried.append(alternate)
+                tasks[asyncio.create_task(self._attempt(request, alternate, True))] = alternate
+
+        error = winner = None
+        while tasks and winner is None:
+            done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                answered = tasks.pop(task)
+                if task.exception() is not None:
+                    error = task.exception()
+                elif winner is None:
+                    winner = (answered, *task.result())
+                else:
+                    # Both answered at once; drop the slower one's connection
+                    reader, writer, _, _ = task.result()
+                    self.pools[answered].release(reader, writer, reusable=False)
+        for task in tasks:
+            task.cancel()
+        results = await asyncio.gather(*tasks, return_exceptions=True)
+        for answered, result in zip(tasks.values(), results):
+            # Finished before the cancellation landed
+            if not isinstance(result, BaseException):
+                reader, writer, _, _ = result
+                self.pools[answered].release(reader, writer, reusable=False)
+        if winner is None:
+            raise error
+        return winner
+
+    def _record(self, backend, method, path, latency, status):
+        # status is None when the backend never answered
+        failed = status is None or status in FAILURE_STATUSES
+        self.strategy.complete(backend, latency, failed)
+        if self.health_checker is not None:
+            self.health_checker.record_request(backend, latency, failed)
+        self.metrics.request_finished(backend, latency, failed)
+        if not failed and self.retry_policy is not None:
+            self.retry_policy.latencies.record(latency)
+        if self.access_log is not None and self.access_log.sampled():
+            target_host, target_port = backend
+            self.access_log.log(f"[LoadBalancer] {method} '{path}' -> http://{target_host}:{target_port} "
+                                f"{status or 502} {latency * 1000:.1f}ms")
+
+    def _cancel(self, backend, latency):
+        # An abandoned hedge: neither a success nor a failure of the backend
+        self.strategy.complete(backend, latency, failed=False)
+        self.metrics.request_cancelled(backend)
+
+    async def _send_to_backend(self, pool, request_head, send_body, retryable):
+        # A pooled socket may have been closed by the backend after our
+        # at_eof() check; retry once on a new connection when that's safe
+        for attempt in range(2):
+            reader, writer = await pool.acquire()
+            try:
+                writer.write(request_head)
+                await send_body(writer)
+                await writer.drain()
+                return (reader, writer, *await asyncio.wait_for(self._read_response_head(reader),
+                                                                 self.read_timeout))
+            except (ConnectionError, asyncio.IncompleteReadError):
+                pool.release(reader, writer, reusable=False)
+                if attempt or not retryable:
+                    raise
+            except BaseException:
+                # Includes cancellation of a hedge that lost the race
+                pool.release(reader, writer, reusable=False)
+                raise
+
+    @staticmethod
+    async def _read_response_head(reader):
+        while True:
+            status_line = (await reader.readline()).decode("latin-1").rstrip("\r\n")
+            if not status_line:
+                raise ConnectionResetError("Backend closed the connection")
+            headers = await read_headers(reader)
+            # Interim responses (100 Continue) are not relayed
+            if status_line.split(" ", 2)[1] not in ("100", "102"):
+                return status_line, headers
+
+    @staticmethod
+    async def _relay_exact(reader, writer, remaining):
+        while remaining > 0:
+            chunk = await reader.read(min(RELAY_CHUNK_SIZE, remaining))
+            if not chunk:
+                raise asyncio.IncompleteReadError(b"", remaining)
+            remaining -= len(chunk)
+            writer.write(chunk)
+            await writer.drain()
+
+    @staticmethod
+    async def _relay_until_eof(reader, writer):
+        while True:
+            chunk = await reader.read(RELAY_CHUNK_SIZE)
+            if not chunk:
+                return
+            writer.write(chunk)
+            await writer.drain()
+
+    @classmethod
+    async def _relay_chunked(cls, reader, writer, passthrough):
+        while True:
+            size_line = await reader.readline()
+            size = int(size_line.split(b";", 1)[0], 16)
+            if passthrough:
+                writer.write(size_line)
+            if size == 0:
+                # Trailers, terminated by an empty line
+                while True:
+                    line = await reader.readline()
+                    if passthrough:
+                        writer.write(line)
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                await writer.drain()
+                return
+            await cls._relay_exact(reader, writer, size)
+            crlf = await reader.readexactly(2)
+            if passthrough:
+                writer.write(crlf)
+
+    @staticmethod
+    async def _write_simple(writer, version, status, body, keep_alive):
+        reason = {204: "No Content", 400: "Bad Request", 501: "Not Implemented", 502: "Bad Gateway"}[status]
+        head = f"{version} {status} {reason}\r\n"
+        if status != 204:
+            head += f"Content-Length: {len(body)}\r\n"
+        head += "Connection: keep-alive\r\n" if keep_alive else "Connection: close\r\n"
+        writer.write(head.encode("latin-1") + b"\r\n" + body)
+        await writer.drain()
@@ -0,0 +1,295 @@
+#!/usr/bin/env python3
+"""
+Throughput and latency benchmark of load balancer serving modes and strategies.
+
+Backends and the load balancer each run in their own process so the load
+generator doesn't compete with them for the GIL. Every mode/strategy pair is
+driven with the same load for the same duration.
+
+By default load is open-loop: requests are sent at a constant arrival rate
+whether or not earlier ones have finished, and latency is measured from the
+time each request was *scheduled* to be sent. A closed-loop client waits for
+each response before sending the next request, so when the server stalls it
+simply stops sending and the stall never shows up in its percentiles
+("coordinated omission"). --closed-loop keeps that mode for raw throughput.
+
+    python benchmark.py --rate 500 --duration 5 --backend-delay 0.01
+    python benchmark.py --backends 4 --payload-size 65536 --rate 200 --json results.json
+    python benchmark.py --closed-loop --clients 50 --modes threaded asyncio
+    python benchmark.py --modes threaded --strategies round_robin peak_ewma --slow-backend-delay 0.1
+"""
+
+import argparse
+import asyncio
+import http.client
+import json
+import multiprocessing
+import os
+import socket
+import sys
+import threading
+import time
+from http.server import ThreadingHTTPServer
+
+import load_balancer
+from strategies import STRATEGIES, create_strategy
+
+# Seconds before an open-loop request is given up on and counted as an error
+REQUEST_TIMEOUT = 10.0
+
+
+def run_backends(ports, delays, payload_size):
+    # Also silences tracebacks from clients that gave up mid-response
+    sys.stdout = sys.stderr = open(os.devnull, "w")
+    threads = []
+    for index, (port, delay) in enumerate(zip(ports, delays)):
+        if payload_size is None:
+            content = load_balancer.BACKEND_RESPONSES[index % len(load_balancer.BACKEND_RESPONSES)]
+        else:
+            content = "x" * payload_size
+        base = load_balancer.create_backend_handler(content)
+
+        class DelayedBackendHandler(base):
+            def do_GET(self, delay=delay):
+                # Simulated backend work
+                if delay:
+                    time.sleep(delay)
+                super().do_GET()
+
+        server = ThreadingHTTPServer(("localhost", port), DelayedBackendHandler)
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        threads.append(thread)
+    for thread in threads:
+        thread.join()
+
+
+def run_load_balancer(port, mode, workers, strategy_name, backends):
+    sys.stdout = open(os.devnull, "w")
+    load_balancer.set_backends(backends)
+    strategy = create_strategy(strategy_name, load_balancer.BACKENDS)
+    load_balancer.start_load_balancer(port, mode=mode, workers=workers, strategy=strategy)
+
+
+def wait_for_port(port, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(("localhost", port), timeout=0.2).close()
+            return
+        except OSError:
+            time.sleep(0.05)
+    raise RuntimeError(f"Nothing listening on port {port}")
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(fraction * len(sorted_values)))
+    return sorted_values[index]
+
+
+def summarize(latencies, errors, elapsed):
+    """Result dict for one run; latencies are the successful requests' in seconds."""
+    latencies = sorted(latencies)
+    total = len(latencies) + errors
+    return {
+        "requests": total,
+        "errors": errors,
+        "error_rate": errors / total if total else 0.0,
+        "rps": len(latencies) / elapsed if elapsed else 0.0,
+        "latency_ms": {
+            "p50": percentile(latencies, 0.50) * 1000,
+            "p90": percentile(latencies, 0.90) * 1000,
+            "p99": percentile(latencies, 0.99) * 1000,
+            "p999": percentile(latencies, 0.999) * 1000,
+            "max": (latencies[-1] if latencies else 0.0) * 1000,
+        },
+    }
+
+
+def drive_closed_loop(port, clients, duration):
+    """Each client thread sends requests back to back until the duration elapses."""
+    latencies = [[] for _ in range(clients)]
+    errors = [0] * clients
+    deadline = time.monotonic() + duration
+
+    def client(index):
+        while time.monotonic() < deadline:
+            conn = http.client.HTTPConnection("localhost", port, timeout=REQUEST_TIMEOUT)
+            started = time.monotonic()
+            try:
+                conn.request("GET", "/")
+                response = conn.getresponse()
+                response.read()
+                if response.status == 200:
+                    latencies[index].append(time.monotonic() - started)
+                else:
+                    errors[index] += 1
+            except (OSError, http.client.HTTPException):
+                errors[index] += 1
+            finally:
+                conn.close()
+
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(clients)]
+    start = time.monotonic()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.monotonic() - start
+
+    merged = [latency for client_latencies in latencies for latency in client_latencies]
+    return summarize(merged, sum(errors), elapsed)
+
+
+def drive_open_loop(port, rate, duration, max_in_flight=1000):
+    """
+    Send rate requests per second for duration seconds, each on a new connection.
+
+    Request i is due at start + i / rate and its latency counts from then, so
+    time spent queued behind a slow server (or behind max_in_flight) is
+    included rather than omitted.
+    """
+    return asyncio.run(_open_loop(port, rate, duration, max_in_flight))
+
+
+async def _open_loop(port, rate, duration, max_in_flight):
+    loop = asyncio.get_running_loop()
+    latencies = []
+    errors = 0
+    in_flight = asyncio.Semaphore(max_in_flight)
+    request = f"GET / HTTP/1.1\r\nHost: localhost:{port}\r\nConnection: close\r\n\r\n".encode()
+
+    async def send():
+        reader, writer = await asyncio.open_connection("localhost", port)
+        try:
+            writer.write(request)
+            # Connection: close, so the response runs until EOF
+            response = await reader.read()
+            return response.startswith(b"HTTP/1.1 200") or response.startswith(b"HTTP/1.0 200")
+        finally:
+            writer.close()
+
+    async def one(due):
+        nonlocal errors
+        async with in_flight:
+            try:
+                ok = await asyncio.wait_for(send(), REQUEST_TIMEOUT)
+            except (OSError, asyncio.TimeoutError):
+                ok = False
+        if ok:
+            latencies.append(loop.time() - due)
+        else:
+            errors += 1
+
+    tasks = []
+    start = loop.time()
+    for i in range(int(rate * duration)):
+        due = start + i / rate
+        delay = due - loop.time()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        tasks.append(asyncio.create_task(one(due)))
+    await asyncio.gather(*tasks)
+    return summarize(latencies, errors, loop.time() - start)
+
+
+def benchmark_mode(mode, strategy, port, backends, args):
+    process = multiprocessing.Process(target=run_load_balancer,
+                                      args=(port, mode, args.workers, strategy, backends), daemon=True)
+    process.start()
+    try:
+        wait_for_port(port)
+        if args.closed_loop:
+            return drive_closed_loop(port, args.clients, args.duration)
+        return drive_open_loop(port, args.rate, args.duration, args.max_in_flight)
+    finally:
+        process.terminate()
+        process.join()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark load balancer serving modes and strategies")
+    parser.add_argument("--modes", nargs="+", choices=load_balancer.SERVING_MODES,
+                        default=list(load_balancer.SERVING_MODES))
+    parser.add_argument("--strategies", nargs="+", choices=STRATEGIES, default=["round_robin"])
+    parser.add_argument("--rate", type=float, default=200.0, help="open-loop arrival rate in requests/second")
+    parser.add_argument("--max-in-flight", type=int, default=1000,
+                        help="open-loop cap on concurrent connections; later requests queue (and it counts)")
+    parser.add_argument("--closed-loop", action="store_true",
+                        help="use back-to-back clients instead of a constant arrival rate")
+    parser.add_argument("--clients", type=int, default=50, help="concurrent clients for --closed-loop")
+    parser.add_argument("--duration", type=float, default=5.0, help="seconds per run")
+    parser.add_argument("--workers", type=int, default=32, help="worker threads for threaded mode")
+    parser.add_argument("--backends", type=int, default=len(load_balancer.BACKEND_PORTS),
+                        help="number of local backends")
+    parser.add_argument("--backend-port", type=int, default=load_balancer.BACKEND_PORTS[0],
+                        help="port of the first backend; the rest follow consecutively")
+    parser.add_argument("--backend-delay", type=float, default=0.01, help="seconds each backend request takes")
+    parser.add_argument("--slow-backend-delay", type=float,
+                        help="override the delay of the first backend to simulate one slow server")
+    parser.add_argument("--payload-size", type=int,
+                        help="response body size in bytes (default: the small demo pages)")
+    parser.add_argument("--port", type=int, default=9100, help="first load balancer port")
+    parser.add_argument("--json", metavar="PATH",
+                        help="write results as JSON to PATH ('-' for stdout instead of the table)")
+    args = parser.parse_args()
+    if args.backends <= 0 or args.rate <= 0 or args.max_in_flight <= 0:
+        parser.error("--backends, --rate and --max-in-flight must be greater than 0")
+
+    ports = [args.backend_port + i for i in range(args.backends)]
+    backends = [("localhost", port) for port in ports]
+    delays = [args.backend_delay] * len(ports)
+    if args.slow_backend_delay is not None:
+        delays[0] = args.slow_backend_delay
+
+    table = args.json != "-"
+    config = {
+        "load": "closed" if args.closed_loop else "open",
+        "rate": None if args.closed_loop else args.rate,
+        "clients": args.clients if args.closed_loop else None,
+        "duration": args.duration,
+        "backends": len(backends),
+        "backend_delays": delays,
+        "payload_size": args.payload_size,
+        "workers": args.workers,
+    }
+    runs = []
+
+    backend_process = multiprocessing.Process(target=run_backends, args=(ports, delays, args.payload_size),
+                                              daemon=True)
+    backend_process.start()
+    try:
+        for port in ports:
+            wait_for_port(port)
+
+        if table:
+            load = f"{args.clients} clients" if args.closed_loop else f"{args.rate:.0f} req/s open-loop"
+            print(f"{load}, {args.duration:.0f}s per run, {len(backends)} backends, "
+                  f"delays {', '.join(f'{delay * 1000:.0f}ms' for delay in delays)}")
+            print(f"{'mode':<10} {'strategy':<18} {'req/s':>10} {'p50 ms':>8} {'p99 ms':>8} "
+                  f"{'p99.9 ms':>9} {'errors':>8}")
+        pairs = [(mode, strategy) for mode in args.modes for strategy in args.strategies]
+        for offset, (mode, strategy) in enumerate(pairs):
+            result = benchmark_mode(mode, strategy, args.port + offset, backends, args)
+            runs.append({"mode": mode, "strategy": strategy, **result})
+            if table:
+                latency = result["latency_ms"]
+                print(f"{mode:<10} {strategy:<18} {result['rps']:>10.1f} {latency['p50']:>8.1f} "
+                      f"{latency['p99']:>8.1f} {latency['p999']:>9.1f} {result['errors']:>8}")
+    finally:
+        backend_process.terminate()
+        backend_process.join()
+
+    if args.json:
+        report = json.dumps({"config": config, "runs": runs}, indent=2)
+        if args.json == "-":
+            print(report)
+        else:
+            with open(args.json, "w") as f:
+                f.write(report + "\n")
+
+
+if __name__ == "__main__":
+    main()
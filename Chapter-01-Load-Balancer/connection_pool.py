@@ -0,0 +1,169 @@
+import http.client
+import select
+import socket
+import threading
+import time
+from collections import deque
+
+
+# HTTPConnection that remembers whether it came out of the pool and when it
+# was last handed back, so the pool can age out idle sockets. timeout is the
+# read timeout; connect_timeout, if given, bounds only the TCP connect.
+class KeepAliveConnection(http.client.HTTPConnection):
+    def __init__(self, host, port, timeout=None, connect_timeout=None):
+        if timeout is None:
+            super().__init__(host, port)
+        else:
+            super().__init__(host, port, timeout=timeout)
+        self.connect_timeout = connect_timeout
+        self.reused = False
+        self.last_used = time.monotonic()
+
+    def connect(self):
+        if self.connect_timeout is None:
+            super().connect()
+            return
+        read_timeout = self.timeout
+        self.timeout = self.connect_timeout
+        try:
+            super().connect()
+        finally:
+            self.timeout = read_timeout
+        if read_timeout is socket._GLOBAL_DEFAULT_TIMEOUT:
+            read_timeout = socket.getdefaulttimeout()
+        self.sock.settimeout(read_timeout)
+
+
+class ConnectionPool:
+    """
+    Thread-safe pool of HTTP/1.1 keep-alive connections to a single backend.
+
+    Idle connections are kept on a LIFO stack so the most recently used (and
+    therefore most likely still open) socket is handed out first. Connections
+    idle for longer than idle_timeout are evicted, sockets the backend has
+    already closed are detected before reuse, and at most max_idle idle
+    connections are retained - anything returned beyond that is closed.
+
+    Only idle connections are bounded: acquire() never waits, so the number
+    of connections open at once is set by how many requests are in flight
+    (the proxy's handler threads), not by the pool.
+    """
+
+    def __init__(self, host, port, max_idle=10, idle_timeout=30.0, timeout=None, connect_timeout=None):
+        if max_idle <= 0:
+            raise ValueError("Pool size must be greater than 0")
+        if idle_timeout <= 0:
+            raise ValueError("Idle timeout must be greater than 0")
+
+        self.host = host
+        self.port = port
+        self.max_idle = max_idle
+        self.idle_timeout = idle_timeout
+        self.timeout = timeout
+        self.connect_timeout = connect_timeout
+        self._idle = deque()
+        self._lock = threading.Lock()
+
+        # Counters reported by stats()
+        self.hits = 0
+        self.misses = 0
+        self.evicted_idle = 0
+        self.evicted_stale = 0
+        self.discarded = 0
+
+    def acquire(self, fresh=False):
+        """
+        Return a pooled connection if a healthy one is idle, otherwise open a new one.
+
+        Pass fresh=True to skip the idle stack, e.g. when retrying after a
+        reused socket turned out to be dead.
+        """
+        if fresh:
+            with self._lock:
+                self.misses += 1
+            return self._connect()
+
+        now = time.monotonic()
+        while True:
+            with self._lock:
+                if not self._idle:
+                    self.misses += 1
+                    break
+                conn = self._idle.pop()
+
+            if now - conn.last_used > self.idle_timeout:
+                conn.close()
+                with self._lock:
+                    self.evicted_idle += 1
+                continue
+            if self._is_stale(conn):
+                conn.close()
+                with self._lock:
+                    self.evicted_stale += 1
+                continue
+
+            with self._lock:
+                self.hits += 1
+            conn.reused = True
+            return conn
+
+        return self._connect()
+
+    def _connect(self):
+        return KeepAliveConnection(self.host, self.port, timeout=self.timeout, connect_timeout=self.connect_timeout)
+
+    def release(self, conn, reusable=True):
+        """
+        Hand a connection back to the pool.
+
+        Callers must have read the whole response first and pass reusable=False
+        when the backend asked to close the connection or the exchange failed.
+        """
+        if not reusable or conn.sock is None:
+            conn.close()
+            return
+
+        conn.last_used = time.monotonic()
+        with self._lock:
+            if len(self._idle) < self.max_idle:
+                self._idle.append(conn)
+                return
+            self.discarded += 1
+        conn.close()
+
+    def close(self):
+        """Close every idle connection held by the pool."""
+        with self._lock:
+            idle, self._idle = self._idle, deque()
+        for conn in idle:
+            conn.close()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "backend": f"{self.host}:{self.port}",
+                "idle": len(self._idle),
+                "hits": self.hits,
+                "misses": self.misses,
+                "evicted_idle": self.evicted_idle,
+                "evicted_stale": self.evicted_stale,
+                "discarded": self.discarded,
+            }
+
+    @staticmethod
+    def _is_stale(conn):
+        # An idle keep-alive socket should have nothing to read. If select()
+        # reports it readable, the backend has either closed it (EOF) or sent
+        # unsolicited data - neither is safe to reuse.
+        sock = conn.sock
+        if sock is None:
+            return True
+        try:
+            readable, _, _ = select.select([sock], [], [], 0)
+        except (OSError, ValueError):
+            return True
+        return bool(readable)
+
+    def __repr__(self):
+        return (f"ConnectionPool(backend={self.host}:{self.port}, "
+                f"max_idle={self.max_idle}, idle={len(self._idle)})")
@@ -0,0 +1,77 @@
+import hashlib
+import zlib
+from bisect import bisect_right
+
+
+# Keys are hashed with CRC32, which is cheap enough to keep lookups under a
+# microsecond; ring points use a cryptographic hash so they spread evenly.
+# Both are stable across processes (Python's hash() is salted per process),
+# so every load balancer replica agrees on which backend owns a key.
+
+def hash_point(name):
+    """Hash of a virtual node name: a cryptographic hash spreads the points evenly."""
+    return int.from_bytes(hashlib.blake2b(name.encode(), digest_size=4).digest(), "big")
+
+
+class HashRing:
+    """
+    Consistent-hash ring with virtual nodes.
+
+    Every node is placed on the ring at `replicas` pseudo-random points. A key
+    belongs to the first point clockwise from its own hash, so adding or
+    removing one of N nodes only moves the ~1/N of keys that land on that
+    node's points. The points are precomputed into a sorted list, and a lookup
+    is one hash plus one binary search.
+    """
+
+    def __init__(self, nodes, replicas=160):
+        if replicas <= 0:
+            raise ValueError("Replicas must be greater than 0")
+        self.replicas = replicas
+        self.nodes = list(nodes)
+        if not self.nodes:
+            raise ValueError("At least one node is required")
+
+        points = []
+        for node in self.nodes:
+            name = self.node_name(node)
+            for i in range(replicas):
+                points.append((hash_point(f"{name}#{i}"), node))
+        points.sort(key=lambda point: point[0])
+        self.hashes = [point[0] for point in points]
+        self.owners = [point[1] for point in points]
+
+    @staticmethod
+    def node_name(node):
+        if isinstance(node, tuple):
+            return ":".join(str(part) for part in node)
+        return str(node)
+
+    def position(self, key):
+        """Index on the ring of the first point after the key's CRC32."""
+        index = bisect_right(self.hashes, zlib.crc32(key.encode()))
+        return index if index < len(self.hashes) else 0
+
+    def lookup(self, key):
+        # position() inlined: this is the per-request hot path
+        index = bisect_right(self.hashes, zlib.crc32(key.encode()))
+        return self.owners[index if index < len(self.hashes) else 0]
+
+    def walk(self, key):
+        """Yield distinct nodes clockwise from the key: its owner, then fallbacks."""
+        start = self.position(key)
+        seen = set()
+        total = len(self.owners)
+        for offset in range(total):
+            node = self.owners[(start + offset) % total]
+            if node not in seen:
+                seen.add(node)
+                yield node
+                if len(seen) == len(self.nodes):
+                    return
+
+    def __len__(self):
+        return len(self.hashes)
+
+    def __repr__(self):
+        return f"HashRing(nodes={len(self.nodes)}, replicas={self.replicas})"
@@ -0,0 +1,189 @@
+import http.client
+import threading
+import time
+
+
+# Responses that count as a backend failure for passive ejection and the
+# latency-aware strategies. Other 5xx, such as 501 for a method the backend
+# doesn't implement, are answers about the request, not the backend's health.
+FAILURE_STATUSES = frozenset({502, 503, 504})
+
+
+class BackendHealth:
+    """Health bookkeeping for one backend."""
+
+    def __init__(self):
+        self.healthy = True
+        self.consecutive_failures = 0
+        self.consecutive_successes = 0
+        self.ejections = 0
+        self.last_probe_time = None
+        self.last_error = None
+
+
+class HealthChecker:
+    """
+    Active and passive health checking with automatic ejection.
+
+    Active: a background thread probes every backend with GET probe_path each
+    interval seconds. unhealthy_threshold consecutive failed probes eject a
+    backend; healthy_threshold consecutive successful probes re-admit it.
+
+    Passive: the proxy reports every request through record_request().
+    outlier_errors consecutive failures - connection errors, FAILURE_STATUSES
+    responses,
+    or requests slower than slow_request_threshold - eject the backend
+    without waiting for the next probe. Re-admission always goes through
+    the active probes.
+
+    Whenever the healthy set changes, every subscribed callback is called
+    with the new list of healthy backends (see Strategy.set_active).
+    """
+
+    def __init__(self, backends, interval=2.0, timeout=1.0, probe_path="/",
+                 unhealthy_threshold=2, healthy_threshold=2,
+                 outlier_errors=5, slow_request_threshold=None):
+        if interval <= 0:
+            raise ValueError("Interval must be greater than 0")
+        if timeout <= 0:
+            raise ValueError("Timeout must be greater than 0")
+        if unhealthy_threshold <= 0 or healthy_threshold <= 0 or outlier_errors <= 0:
+            raise ValueError("Thresholds must be greater than 0")
+
+        self.backends = list(backends)
+        self.interval = interval
+        self.timeout = timeout
+        self.probe_path = probe_path
+        self.unhealthy_threshold = unhealthy_threshold
+        self.healthy_threshold = healthy_threshold
+        self.outlier_errors = outlier_errors
+        self.slow_request_threshold = slow_request_threshold
+
+        self.health = {backend: BackendHealth() for backend in self.backends}
+        self.passive_failures = {backend: 0 for backend in self.backends}
+        self.lock = threading.Lock()
+        self.callbacks = []
+        self._stop = threading.Event()
+        self._thread = None
+
+    def subscribe(self, callback):
+        """Call callback(healthy_backends) now and on every health change."""
+        with self.lock:
+            self.callbacks.append(callback)
+            healthy = self._healthy_locked()
+        callback(healthy)
+
+    def healthy_backends(self):
+        with self.lock:
+            return self._healthy_locked()
+
+    def is_healthy(self, backend):
+        with self.lock:
+            return self.health[backend].healthy
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="health-checker", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self):
+        while not self._stop.is_set():
+            for backend in self.backends:
+                ok, error = self.probe(backend)
+                self.record_probe(backend, ok, error)
+            self._stop.wait(self.interval)
+
+    def probe(self, backend):
+        """Send one health probe. Returns (ok, error message)."""
+        host, port = backend
+        conn = http.client.HTTPConnection(host, port, timeout=self.timeout)
+        try:
+            conn.request("GET", self.probe_path)
+            response = conn.getresponse()
+            response.read()
+            if response.status >= 500:
+                return False, f"HTTP {response.status}"
+            return True, None
+        except (OSError, http.client.HTTPException) as e:
+            return False, str(e) or type(e).__name__
+        finally:
+            conn.close()
+
+    def record_probe(self, backend, ok, error=None):
+        with self.lock:
+            state = self.health[backend]
+            state.last_probe_time = time.monotonic()
+            state.last_error = error
+            if ok:
+                state.consecutive_failures = 0
+                state.consecutive_successes += 1
+                if not state.healthy and state.consecutive_successes >= self.healthy_threshold:
+                    self._set_healthy_locked(backend, True)
+                    print(f"[HealthCheck] {self._name(backend)} is healthy again, re-admitting")
+            else:
+                state.consecutive_successes = 0
+                state.consecutive_failures += 1
+                if state.healthy and state.consecutive_failures >= self.unhealthy_threshold:
+                    self._set_healthy_locked(backend, False)
+                    print(f"[HealthCheck] {self._name(backend)} failed {state.consecutive_failures} probes "
+                          f"({error}), ejecting")
+
+    def record_request(self, backend, latency, failed=False):
+        """Passive outlier detection from proxied traffic."""
+        if self.slow_request_threshold is not None and latency > self.slow_request_threshold:
+            failed = True
+        with self.lock:
+            if backend not in self.health:
+                return
+            if not failed:
+                self.passive_failures[backend] = 0
+                return
+            self.passive_failures[backend] += 1
+            state = self.health[backend]
+            if state.healthy and self.passive_failures[backend] >= self.outlier_errors:
+                state.consecutive_successes = 0
+                self._set_healthy_locked(backend, False)
+                print(f"[HealthCheck] {self._name(backend)} failed {self.passive_failures[backend]} "
+                      f"requests in a row, ejecting")
+
+    def _set_healthy_locked(self, backend, healthy):
+        state = self.health[backend]
+        state.healthy = healthy
+        self.passive_failures[backend] = 0
+        if not healthy:
+            state.ejections += 1
+        healthy_backends = self._healthy_locked()
+        # Callbacks only take the strategy's own lock, never ours
+        for callback in self.callbacks:
+            callback(healthy_backends)
+
+    def _healthy_locked(self):
+        return [backend for backend in self.backends if self.health[backend].healthy]
+
+    def stats(self):
+        with self.lock:
+            return {
+                self._name(backend): {
+                    "healthy": state.healthy,
+                    "consecutive_failures": state.consecutive_failures,
+                    "ejections": state.ejections,
+                    "last_error": state.last_error,
+                }
+                for backend, state in self.health.items()
+            }
+
+    @staticmethod
+    def _name(backend):
+        host, port = backend
+        return f"{host}:{port}"
+
+    def __repr__(self):
+        return f"HealthChecker(backends={self.backends}, interval={self.interval})"
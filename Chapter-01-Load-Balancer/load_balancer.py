@@ -1,9 +1,20 @@
+import argparse
+import asyncio
+import queue
+import select
 import threading
-from http.server import BaseHTTPRequestHandler, HTTPServer
+from http.server import BaseHTTPRequestHandler, HTTPServer, ThreadingHTTPServer
 import http.client
-import itertools
 import time
 
+from access_log import AccessLog
+from connection_pool import ConnectionPool
+from health_check import FAILURE_STATUSES, HealthChecker
+from metrics import LoadBalancerMetrics, render_health_stats, render_pool_stats, start_admin_server
+from resilience import RetryBudget, RetryPolicy
+from stream_relay import end_to_end_headers, relay_body, relay_request_body
+from strategies import STRATEGIES, create_strategy
+
 # Define backend server ports and responses
 BACKEND_PORTS = [8001, 8002]
 BACKEND_RESPONSES = [
@@ -13,12 +24,35 @@ BACKEND_RESPONSES = [
 
 # Factory function to create a custom handler for each backend
 def create_backend_handler(response_body):
+    body = response_body.encode()
+
     class CustomBackendHandler(BaseHTTPRequestHandler):
+        # HTTP/1.1 so the load balancer can keep connections alive. Nagle has
+        # to go too, otherwise the separate header and body writes stall on
+        # delayed ACKs once the socket is reused.
+        protocol_version = "HTTP/1.1"
+        disable_nagle_algorithm = True
+
         def do_GET(self):
             self.send_response(200)
             self.send_header('Content-type', 'text/html')
+            self.send_header('Content-Length', str(len(body)))
             self.end_headers()
-            self.wfile.write(response_body.encode())
+            self.wfile.write(body)
+
+        def do_POST(self):
+            # Read (and drop) the request body so the connection can be reused
+            if "chunked" in self.headers.get('Transfer-Encoding', '').lower():
+                while True:
+                    size = int(self.rfile.readline().split(b";", 1)[0], 16)
+                    self.rfile.read(size + 2)
+                    if size == 0:
+                        break
+            else:
+                self.rfile.read(int(self.headers.get('Content-Length', 0)))
+            self.do_GET()
+
+        do_PUT = do_POST
 
         def log_message(self, format, *args):
             # Silence backend logging for clarity
@@ -28,60 +62,561 @@ def create_backend_handler(response_body):
 # Start backend servers in threads
 def start_backend_server(port, response_body):
     handler_class = create_backend_handler(response_body)
-    server = HTTPServer(('localhost', port), handler_class)
+    # Threaded so the load balancer can hold several keep-alive connections
+    # to the same backend at once
+    server = ThreadingHTTPServer(('localhost', port), handler_class)
     print(f"[Backend] Server started at http://localhost:{port}")
     server.serve_forever()
 
 # Backend addresses for load balancer
 BACKENDS = [("localhost", port) for port in BACKEND_PORTS]
-backend_iterator = itertools.cycle(BACKENDS)
+
+# One keep-alive connection pool per backend
+POOL_MAX_IDLE = 10
+POOL_IDLE_TIMEOUT = 30.0
+# Seconds to establish a backend connection, and to wait on each read from it
+CONNECT_TIMEOUT = 1.0
+READ_TIMEOUT = 10.0
+
+def create_pool(backend):
+    return ConnectionPool(*backend, max_idle=POOL_MAX_IDLE, idle_timeout=POOL_IDLE_TIMEOUT,
+                          timeout=READ_TIMEOUT, connect_timeout=CONNECT_TIMEOUT)
+
+BACKEND_POOLS = {backend: create_pool(backend) for backend in BACKENDS}
+
+def set_backends(backends):
+    """Balance across a different list of (host, port) backends, e.g. from the benchmark."""
+    for pool in BACKEND_POOLS.values():
+        pool.close()
+    BACKENDS[:] = backends
+    BACKEND_POOLS.clear()
+    for backend in BACKENDS:
+        BACKEND_POOLS[backend] = create_pool(backend)
+
+def set_timeouts(connect_timeout, read_timeout):
+    """Change the backend timeouts; applies to connections opened from now on."""
+    global CONNECT_TIMEOUT, READ_TIMEOUT
+    CONNECT_TIMEOUT, READ_TIMEOUT = connect_timeout, read_timeout
+    for pool in BACKEND_POOLS.values():
+        pool.connect_timeout = connect_timeout
+        pool.timeout = read_timeout
+
+# Errors a reused keep-alive socket raises when the backend closed it between
+# our staleness check and the request - safe to retry on a fresh connection
+STALE_CONNECTION_ERRORS = (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError)
+
+# Methods that are safe to send again if the first attempt never reached the backend
+IDEMPOTENT_METHODS = {"GET", "HEAD", "PUT", "DELETE", "OPTIONS", "TRACE"}
+
+# Request headers the proxy sets itself instead of copying from the client.
+# Host is rewritten to the backend by http.client, and Expect was already
+# answered with 100 Continue by BaseHTTPRequestHandler.
+REWRITTEN_REQUEST_HEADERS = {"host", "content-length", "expect", "x-forwarded-for"}
+
+# Per-backend request counts, errors, in-flight gauges and latency
+# histograms, shared by every listener and served on the admin port
+METRICS = LoadBalancerMetrics()
+
+def report_pool_stats():
+    for pool in BACKEND_POOLS.values():
+        stats = pool.stats()
+        print(f"[LoadBalancer] Pool {stats['backend']}: hits={stats['hits']} misses={stats['misses']} "
+              f"idle={stats['idle']} evicted_idle={stats['evicted_idle']} "
+              f"evicted_stale={stats['evicted_stale']} discarded={stats['discarded']}")
 
 # Load Balancer handler
 class LoadBalancerHandler(BaseHTTPRequestHandler):
-    def do_GET(self):
+    # HTTP/1.1 lets chunked backend responses stream through to the client
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+    # Seconds an idle keep-alive client may hold a worker thread
+    timeout = 15
+
+    # BaseHTTPRequestHandler dispatches each request to do_<METHOD>. Every
+    # method is proxied the same way, so all of them resolve to proxy_request
+    # (CONNECT tunnelling is not supported and gets the usual 501).
+    def __getattr__(self, name):
+        if name.startswith("do_") and name != "do_CONNECT":
+            return self.proxy_request
+        raise AttributeError(name)
+
+    def proxy_request(self):
+        # Only servers with worker threads can afford to park a thread on an
+        # idle keep-alive client
+        if not getattr(self.server, "allow_keep_alive", False):
+            self.close_connection = True
+
         # Filter favicon.ico to avoid confusion
-        if self.path == "/favicon.ico":
+        if self.path == "/favicon.ico" and self.command == "GET":
             self.send_response(204)
-            self.end_headers()
+            self._end_headers()
             return
 
-        # Pick backend in round-robin
-        target_host, target_port = next(backend_iterator)
-        print(f"[LoadBalancer] Routing path '{self.path}' to http://{target_host}:{target_port}")
-
         try:
-            conn = http.client.HTTPConnection(target_host, target_port)
-            conn.request("GET", self.path)
-            response = conn.getresponse()
+            body_length, chunked = self._request_body_framing()
+        except ValueError as e:
+            self.close_connection = True
+            self.send_error(400, str(e))
+            return
 
-            self.send_response(response.status)
-            for header, value in response.getheaders():
-                self.send_header(header, value)
-            self.end_headers()
-            self.wfile.write(response.read())
-            conn.close()
+        # Pick a backend using this listener's strategy
+        strategy = self.server.strategy
+        key = strategy.request_key(self.path, self.headers)
+        backend = strategy.pick(key)
+
+        try:
+            backend, conn, response = self._exchange(backend, key, body_length, chunked)
         except Exception as e:
+            # Whatever is left of the request body is still unread on the socket
+            if chunked or body_length:
+                self.close_connection = True
+            body = f"Bad Gateway: {e}".encode()
             self.send_response(502)
-            self.end_headers()
-            self.wfile.write(f"Bad Gateway: {e}".encode())
+            self.send_header("Content-Length", str(len(body)))
+            self._end_headers()
+            self.wfile.write(body)
+            return
+
+        pool = BACKEND_POOLS[backend]
+        try:
+            self._relay_response(response)
+        except Exception:
+            # Headers are already on the wire, so a 502 is no longer possible;
+            # dropping the connection tells the client the body is incomplete
+            self.close_connection = True
+            pool.release(conn, reusable=False)
+            return
+        pool.release(conn, reusable=not response.will_close)
+
+    def _request_body_framing(self):
+        """Return (content length, chunked) for the client's request body."""
+        if "chunked" in self.headers.get("Transfer-Encoding", "").lower():
+            return None, True
+        length = self.headers.get("Content-Length")
+        if length is None:
+            return None, False
+        if not length.isdigit():
+            raise ValueError(f"Invalid Content-Length: {length}")
+        return int(length), False
+
+    def _exchange(self, backend, key, body_length, chunked):
+        """
+        Send the request to backend and return (backend, conn, response) for
+        the response to relay to the client.
+
+        Replayable requests (idempotent, no streamed body) are retried on
+        other backends and hedged as the listener's RetryPolicy allows.
+        Once retries run out the last failed response is returned, or the
+        last error raised.
+        """
+        policy = self.server.retry_policy
+        replayable = (policy is not None and self.command in IDEMPOTENT_METHODS
+                      and not chunked and not body_length)
+        if not replayable:
+            conn, response = self._attempt(backend, body_length, chunked)
+            return backend, conn, response
+
+        strategy = self.server.strategy
+        policy.budget.record_request()
+        tried = [backend]
+        while True:
+            conn = response = error = None
+            try:
+                hedge_delay = policy.hedge_delay()
+                if hedge_delay is None:
+                    conn, response = self._attempt(backend, body_length, chunked)
+                else:
+                    backend, conn, response = self._hedged_attempt(backend, key, body_length, tried, hedge_delay)
+            except Exception as e:
+                error = e
+            if response is not None and response.status not in policy.retry_statuses:
+                return backend, conn, response
+
+            alternate = None
+            if (len(tried) <= policy.max_retries and len(tried) < len(strategy.active)
+                    and policy.budget.try_withdraw()):
+                alternate = strategy.pick_excluding(tried, key)
+            if alternate is None:
+                if response is None:
+                    raise error
+                return backend, conn, response
+            if response is not None:
+                # Its body is never read, so the connection can't be reused
+                BACKEND_POOLS[backend].release(conn, reusable=False)
+            METRICS.request_retried(alternate)
+            tried.append(alternate)
+            backend = alternate
+
+    def _attempt(self, backend, body_length, chunked):
+        """Send the request to one backend and wait for its response headers."""
+        METRICS.request_started(backend)
+        started = time.monotonic()
+        try:
+            conn, response = self._send_to_backend(BACKEND_POOLS[backend], body_length, chunked)
+        except Exception:
+            self._record(backend, time.monotonic() - started, None)
+            raise
+        # Latency is measured to the response headers: that is the backend's
+        # share of the time, whereas relaying the body depends on the client
+        self._record(backend, time.monotonic() - started, response.status)
+        return conn, response
+
+    def _hedged_attempt(self, backend, key, body_length, tried, delay):
+        """
+        Send the request to backend and, if no response has started to arrive
+        after delay seconds, to a second backend as well. Returns (backend,
+        conn, response) for whichever answers first; the other is abandoned.
+
+        Waiting is done with select() on the backend sockets, so hedging needs
+        no extra threads.
+        """
+        policy = self.server.retry_policy
+        pending = []
+        self._start_attempt(backend, body_length, pending)
+        hedge_at = time.monotonic() + delay
+        error = None
+        while pending:
+            wake_at = min(attempt[3] for attempt in pending)
+            if hedge_at is not None:
+                wake_at = min(wake_at, hedge_at)
+            timeout = None if wake_at == float("inf") else max(wake_at - time.monotonic(), 0)
+            readable, _, _ = select.select([attempt[1].sock for attempt in pending], [], [], timeout)
+
+            if not readable:
+                now = time.monotonic()
+                if hedge_at is not None and now >= hedge_at:
+                    hedge_at = None
+                    strategy = self.server.strategy
+                    alternate = None
+                    if len(tried) < len(strategy.active) and policy.budget.try_withdraw():
+                        alternate = strategy.pick_excluding(tried, key)
+                    if alternate is not None:
+                        METRICS.request_hedged(alternate)
+                        tried.append(alternate)
+                        try:
+                            self._start_attempt(alternate, body_length, pending)
+                        except Exception as e:
+                            error = e
+                    continue
+                for attempt in [attempt for attempt in pending if attempt[3] <= now]:
+                    pending.remove(attempt)
+                    timed_out, conn, started, _ = attempt
+                    BACKEND_POOLS[timed_out].release(conn, reusable=False)
+                    self._record(timed_out, now - started, None)
+                    error = TimeoutError(f"No response within {READ_TIMEOUT}s")
+                continue
+
+            attempt = next(attempt for attempt in pending if attempt[1].sock is readable[0])
+            pending.remove(attempt)
+            answered, conn, started, _ = attempt
+            try:
+                response = conn.getresponse()
+            except Exception as e:
+                BACKEND_POOLS[answered].release(conn, reusable=False)
+                if conn.reused and isinstance(e, STALE_CONNECTION_ERRORS):
+                    # The pooled socket was already closed; resend on a new one
+                    try:
+                        self._start_attempt(answered, body_length, pending, started=started)
+                        continue
+                    except Exception as retry_error:
+                        e = retry_error
+                else:
+                    self._record(answered, time.monotonic() - started, None)
+                error = e
+                continue
+
+            now = time.monotonic()
+            self._record(answered, now - started, response.status)
+            for loser, loser_conn, loser_started, _ in pending:
+                BACKEND_POOLS[loser].release(loser_conn, reusable=False)
+                self._cancel(loser, now - loser_started)
+            return answered, conn, response
+        raise error
+
+    def _start_attempt(self, backend, body_length, pending, started=None):
+        """
+        Send a bodyless request without waiting for its response and add it to
+        pending. started is passed when resending after a stale pooled socket.
+        """
+        pool = BACKEND_POOLS[backend]
+        fresh = started is not None
+        if started is None:
+            METRICS.request_started(backend)
+            started = time.monotonic()
+        while True:
+            conn = pool.acquire(fresh=fresh)
+            try:
+                self._send_request(conn, body_length, False)
+                break
+            except Exception as e:
+                pool.release(conn, reusable=False)
+                if fresh or not (conn.reused and isinstance(e, STALE_CONNECTION_ERRORS)):
+                    self._record(backend, time.monotonic() - started, None)
+                    raise
+                fresh = True
+        deadline = started + pool.timeout if pool.timeout is not None else float("inf")
+        pending.append((backend, conn, started, deadline))
+
+    def _cancel(self, backend, latency):
+        # An abandoned hedge: neither a success nor a failure of the backend.
+        # latency is a lower bound on its response time, which still tells
+        # latency-aware strategies that it was slow.
+        self.server.strategy.complete(backend, latency, failed=False)
+        METRICS.request_cancelled(backend)
+
+    def _record(self, backend, latency, status):
+        # status is None when the backend never answered
+        failed = status is None or status in FAILURE_STATUSES
+        self.server.strategy.complete(backend, latency, failed)
+        if self.server.health_checker is not None:
+            self.server.health_checker.record_request(backend, latency, failed)
+        METRICS.request_finished(backend, latency, failed)
+        if not failed and self.server.retry_policy is not None:
+            self.server.retry_policy.latencies.record(latency)
+        access_log = self.server.access_log
+        if access_log is not None and access_log.sampled():
+            target_host, target_port = backend
+            access_log.log(f"[LoadBalancer] {self.command} '{self.path}' -> http://{target_host}:{target_port} "
+                           f"{status or 502} {latency * 1000:.1f}ms")
+
+    def _relay_response(self, response):
+        self.send_response(response.status)
+        for header, value in end_to_end_headers(response.getheaders()):
+            self.send_header(header, value)
+
+        no_body = self.command == "HEAD" or response.status in (204, 304)
+        chunked = False
+        if no_body:
+            pass
+        elif response.chunked and self.request_version == "HTTP/1.1":
+            chunked = True
+            self.send_header("Transfer-Encoding", "chunked")
+        elif response.getheader("Content-Length") is None:
+            # Close-delimited body (or chunked to an HTTP/1.0 client): the only
+            # way to mark the end is to close the connection
+            self.close_connection = True
+        self._end_headers()
+
+        relay_body(response, self.connection, chunked=chunked)
+
+    def _end_headers(self):
+        if self.close_connection:
+            self.send_header("Connection", "close")
+        self.end_headers()
+
+    def _send_to_backend(self, pool, body_length, chunked):
+        conn = pool.acquire()
+        try:
+            self._send_request(conn, body_length, chunked)
+            return conn, conn.getresponse()
+        except STALE_CONNECTION_ERRORS:
+            pool.release(conn, reusable=False)
+            # A streamed body can't be replayed, and only idempotent requests
+            # are safe to send twice
+            retryable = self.command in IDEMPOTENT_METHODS and not chunked and not body_length
+            if not (conn.reused and retryable):
+                raise
+        except Exception:
+            pool.release(conn, reusable=False)
+            raise
+
+        # The pooled socket went away under us; retry once on a new connection
+        conn = pool.acquire(fresh=True)
+        try:
+            self._send_request(conn, body_length, chunked)
+            return conn, conn.getresponse()
+        except Exception:
+            pool.release(conn, reusable=False)
+            raise
+
+    def _send_request(self, conn, body_length, chunked):
+        conn.putrequest(self.command, self.path, skip_accept_encoding=True)
+        for name, value in end_to_end_headers(self.headers.items()):
+            if name.lower() not in REWRITTEN_REQUEST_HEADERS:
+                conn.putheader(name, value)
+        forwarded_for = self.headers.get("X-Forwarded-For")
+        client_ip = self.client_address[0]
+        conn.putheader("X-Forwarded-For", f"{forwarded_for}, {client_ip}" if forwarded_for else client_ip)
+        if chunked:
+            conn.putheader("Transfer-Encoding", "chunked")
+        elif body_length is not None:
+            conn.putheader("Content-Length", str(body_length))
+        conn.endheaders()
+
+        # Stream the body straight from the client socket to the backend
+        if chunked or body_length:
+            relay_request_body(self.rfile, conn.sock, body_length, chunked)
 
     def log_message(self, format, *args):
         # Silence load balancer access logs for clarity
         return
 
+# HTTPServer that hands each connection to a fixed-size pool of worker threads.
+# Once every worker is busy and the hand-off queue is full the accept loop
+# blocks, leaving new connections in the kernel backlog instead of spawning
+# unbounded threads.
+class ThreadPoolHTTPServer(HTTPServer):
+    request_queue_size = 128
+    allow_keep_alive = True
+
+    def __init__(self, server_address, handler_class, max_workers=32):
+        super().__init__(server_address, handler_class)
+        self.requests = queue.Queue(maxsize=max_workers)
+        # Daemon workers, like ThreadingHTTPServer, so a client holding a
+        # keep-alive connection open can't keep the process from exiting
+        self.workers = [
+            threading.Thread(target=self.worker_loop, name=f"lb-worker-{i}", daemon=True)
+            for i in range(max_workers)
+        ]
+        for worker in self.workers:
+            worker.start()
+
+    def process_request(self, request, client_address):
+        self.requests.put((request, client_address))
+
+    def worker_loop(self):
+        while True:
+            request, client_address = self.requests.get()
+            try:
+                self.finish_request(request, client_address)
+            except Exception:
+                self.handle_error(request, client_address)
+            finally:
+                self.shutdown_request(request)
+
+SERVING_MODES = ("single", "threaded", "asyncio")
+
 # Start the load balancer
-def start_load_balancer(port=9000):
-    server = HTTPServer(('localhost', port), LoadBalancerHandler)
-    print(f"[LoadBalancer] Running at http://localhost:{port}")
-    server.serve_forever()
+#   single   - one connection at a time (the original behaviour)
+#   threaded - bounded pool of worker threads
+#   asyncio  - event-loop proxy engine (async_proxy.py)
+# Each listener gets its own strategy instance (round-robin by default), so
+# several listeners in one process can balance differently. A HealthChecker
+# can be shared between listeners; ejected backends are removed from the
+# strategy's rotation until they recover. Requests are logged through
+# access_log (a sampled AccessLog; None disables logging), and with
+# admin_port set Prometheus metrics are served at /metrics on that port.
+# retry_policy (a RetryPolicy) enables retries and hedged requests.
+def start_load_balancer(port=9000, mode="single", workers=32, strategy=None, health_checker=None,
+                        access_log=None, admin_port=None, retry_policy=None):
+    if mode not in SERVING_MODES:
+        raise ValueError(f"Unknown serving mode: {mode}")
+    if strategy is None:
+        strategy = create_strategy("round_robin", BACKENDS)
+    if health_checker is not None:
+        health_checker.subscribe(strategy.set_active)
+
+    def render_metrics(pools):
+        text = METRICS.render_prometheus() + render_pool_stats(pools)
+        if health_checker is not None:
+            text += render_health_stats(health_checker)
+        return text
+
+    if mode == "asyncio":
+        from async_proxy import AsyncLoadBalancer
+        engine = AsyncLoadBalancer(strategy, BACKENDS, health_checker=health_checker,
+                                   metrics=METRICS, access_log=access_log, retry_policy=retry_policy,
+                                   connect_timeout=CONNECT_TIMEOUT, read_timeout=READ_TIMEOUT)
+        if admin_port is not None:
+            start_admin_server(admin_port, lambda: render_metrics(engine.pools.values()))
+        try:
+            asyncio.run(engine.serve(port=port))
+        except KeyboardInterrupt:
+            pass
+        return
+
+    if mode == "threaded":
+        server = ThreadPoolHTTPServer(('localhost', port), LoadBalancerHandler, max_workers=workers)
+        print(f"[LoadBalancer] Running at http://localhost:{port} ({workers} worker threads)")
+    else:
+        server = HTTPServer(('localhost', port), LoadBalancerHandler)
+        print(f"[LoadBalancer] Running at http://localhost:{port}")
+    server.strategy = strategy
+    server.health_checker = health_checker
+    server.access_log = access_log
+    server.retry_policy = retry_policy
+    if admin_port is not None:
+        start_admin_server(admin_port, lambda: render_metrics(BACKEND_POOLS.values()))
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        report_pool_stats()
+        for pool in BACKEND_POOLS.values():
+            pool.close()
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="HTTP load balancer")
+    parser.add_argument("--port", type=int, default=9000)
+    parser.add_argument("--mode", choices=SERVING_MODES, default="single",
+                        help="how the front end serves client connections")
+    parser.add_argument("--workers", type=int, default=32,
+                        help="worker threads for --mode threaded")
+    parser.add_argument("--strategy", choices=STRATEGIES, default="round_robin",
+                        help="how backends are chosen")
+    parser.add_argument("--weights", type=int, nargs="+",
+                        help="per-backend weights for --strategy weighted")
+    parser.add_argument("--hash-key", default="path",
+                        help="routing key for --strategy consistent_hash: path, header:NAME or query:NAME")
+    parser.add_argument("--hash-load-factor", type=float,
+                        help="bound each backend to this multiple of the average load (consistent_hash)")
+    parser.add_argument("--health-interval", type=float, default=2.0,
+                        help="seconds between active health probes (0 disables health checking)")
+    parser.add_argument("--healthy-threshold", type=int, default=2,
+                        help="successful probes needed to re-admit an ejected backend")
+    parser.add_argument("--unhealthy-threshold", type=int, default=2,
+                        help="failed probes before a backend is ejected")
+    parser.add_argument("--connect-timeout", type=float, default=CONNECT_TIMEOUT,
+                        help="seconds to wait for a backend connection")
+    parser.add_argument("--read-timeout", type=float, default=READ_TIMEOUT,
+                        help="seconds to wait on each read from a backend")
+    parser.add_argument("--max-retries", type=int, default=1,
+                        help="retries on other backends for idempotent requests (0 disables retries)")
+    parser.add_argument("--retry-budget", type=float, default=0.1,
+                        help="retries and hedges allowed as a fraction of requests")
+    parser.add_argument("--hedge", action="store_true",
+                        help="resend idempotent requests slower than the recent p95 to a second backend")
+    parser.add_argument("--admin-port", type=int,
+                        help="serve Prometheus metrics at /metrics on this port")
+    parser.add_argument("--log-sample-rate", type=float, default=0.01,
+                        help="fraction of requests written to the access log (0 disables it)")
+    return parser.parse_args()
 
 # Run everything
 if __name__ == "__main__":
+    args = parse_args()
+
     # Start backend servers
     for port, content in zip(BACKEND_PORTS, BACKEND_RESPONSES):
         t = threading.Thread(target=start_backend_server, args=(port, content), daemon=True)
         t.start()
         time.sleep(0.5)  # Stagger startup
 
+    options = {}
+    if args.strategy == "weighted":
+        options = {"weights": args.weights}
+    elif args.strategy == "consistent_hash":
+        options = {"key": args.hash_key, "load_factor": args.hash_load_factor}
+    strategy = create_strategy(args.strategy, BACKENDS, **options)
+
+    health_checker = None
+    if args.health_interval > 0:
+        health_checker = HealthChecker(BACKENDS, interval=args.health_interval,
+                                       healthy_threshold=args.healthy_threshold,
+                                       unhealthy_threshold=args.unhealthy_threshold)
+        health_checker.start()
+
+    set_timeouts(args.connect_timeout, args.read_timeout)
+    retry_policy = None
+    if args.max_retries > 0 or args.hedge:
+        retry_policy = RetryPolicy(max_retries=args.max_retries, budget=RetryBudget(ratio=args.retry_budget),
+                                   hedge=args.hedge)
+
+    access_log = AccessLog(sample_rate=args.log_sample_rate) if args.log_sample_rate > 0 else None
+
     # Start load balancer
-    start_load_balancer()
+    start_load_balancer(args.port, mode=args.mode, workers=args.workers, strategy=strategy,
+                        health_checker=health_checker, access_log=access_log, admin_port=args.admin_port,
+                        retry_policy=retry_policy)
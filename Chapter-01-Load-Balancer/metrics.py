@@ -0,0 +1,278 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Latencies are recorded in whole microseconds
+MICROS_PER_SECOND = 1_000_000
+
+# HDR-style log-linear buckets: every power of two is split into
+# 2 ** (SUB_BUCKET_BITS - 1) linear sub-buckets, which bounds the relative
+# error of any recorded value to under 1% whatever its magnitude
+SUB_BUCKET_BITS = 8
+SUB_BUCKET_COUNT = 1 << SUB_BUCKET_BITS
+SUB_BUCKET_HALF = SUB_BUCKET_COUNT >> 1
+
+# Longest latency tracked exactly; slower requests land in the last bucket
+MAX_TRACKED_MICROS = 600 * MICROS_PER_SECOND
+
+QUANTILES = (0.5, 0.9, 0.99, 0.999)
+
+
+def bucket_index(value):
+    if value < SUB_BUCKET_COUNT:
+        return value
+    shift = value.bit_length() - SUB_BUCKET_BITS
+    return shift * SUB_BUCKET_HALF + (value >> shift)
+
+
+def bucket_value(index):
+    """Lowest value that maps to the bucket."""
+    if index < SUB_BUCKET_COUNT:
+        return index
+    shift = index // SUB_BUCKET_HALF - 1
+    return (index - shift * SUB_BUCKET_HALF) << shift
+
+
+BUCKETS = bucket_index(MAX_TRACKED_MICROS) + 1
+
+
+class LatencyHistogram:
+    """
+    Fixed-size log-linear latency histogram (HDR histogram style).
+
+    record() is a couple of integer operations and a list increment, so it is
+    cheap enough to call on every request. Histograms with the same layout
+    merge by adding their bucket counts.
+    """
+
+    __slots__ = ("counts", "count", "total_micros")
+
+    def __init__(self):
+        self.counts = [0] * BUCKETS
+        self.count = 0
+        self.total_micros = 0
+
+    def record(self, seconds):
+        micros = min(int(seconds * MICROS_PER_SECOND), MAX_TRACKED_MICROS)
+        self.counts[bucket_index(micros)] += 1
+        self.count += 1
+        self.total_micros += micros
+
+    def merge(self, other):
+        counts = self.counts
+        for index, n in enumerate(other.counts):
+            if n:
+                counts[index] += n
+        self.count += other.count
+        self.total_micros += other.total_micros
+
+    def percentile(self, fraction):
+        """Latency in seconds below which `fraction` of the recorded values fall."""
+        if not self.count:
+            return 0.0
+        target = max(1, int(fraction * self.count + 0.5))
+        seen = 0
+        for index, n in enumerate(self.counts):
+            seen += n
+            if seen >= target:
+                return bucket_value(index) / MICROS_PER_SECOND
+        return MAX_TRACKED_MICROS / MICROS_PER_SECOND
+
+    @property
+    def total_seconds(self):
+        return self.total_micros / MICROS_PER_SECOND
+
+
+class _Shard:
+    # Counters written by exactly one thread, so updates need no lock
+    __slots__ = ("requests", "errors", "in_flight", "retries", "hedges", "cancelled", "latency")
+
+    def __init__(self):
+        self.requests = {}
+        self.errors = {}
+        self.in_flight = {}
+        self.retries = {}
+        self.hedges = {}
+        self.cancelled = {}
+        self.latency = {}
+
+
+# (shard field, metric name, type, help) for the plain per-backend numbers
+COUNTERS = (
+    ("requests", "lb_requests_total", "counter", "Requests proxied to each backend."),
+    ("errors", "lb_request_errors_total", "counter", "Proxied requests that failed or returned 502, 503 or 504."),
+    ("in_flight", "lb_requests_in_flight", "gauge",
+     "Requests sent to each backend that are still waiting for its response."),
+    ("retries", "lb_retries_total", "counter", "Retries sent to each backend after another backend failed."),
+    ("hedges", "lb_hedged_requests_total", "counter", "Hedged copies of slow requests sent to each backend."),
+    ("cancelled", "lb_requests_cancelled_total", "counter",
+     "Requests abandoned because a hedged copy answered first."),
+)
+
+
+class LoadBalancerMetrics:
+    """
+    Per-backend request metrics, sharded by thread.
+
+    Each thread writes only to its own shard, so the request path never takes
+    a lock or contends on a shared counter. Readers (the admin endpoint) sum
+    every shard; a scrape may miss requests that finish while it runs, which
+    is fine for monitoring.
+    """
+
+    def __init__(self):
+        self._local = threading.local()
+        self._shards = []
+        self._shards_lock = threading.Lock()
+
+    def _shard(self):
+        try:
+            return self._local.shard
+        except AttributeError:
+            shard = _Shard()
+            with self._shards_lock:
+                self._shards.append(shard)
+            self._local.shard = shard
+            return shard
+
+    def request_started(self, backend):
+        shard = self._shard()
+        shard.in_flight[backend] = shard.in_flight.get(backend, 0) + 1
+
+    def request_finished(self, backend, latency, failed=False):
+        shard = self._shard()
+        shard.in_flight[backend] = shard.in_flight.get(backend, 0) - 1
+        shard.requests[backend] = shard.requests.get(backend, 0) + 1
+        if failed:
+            shard.errors[backend] = shard.errors.get(backend, 0) + 1
+        histogram = shard.latency.get(backend)
+        if histogram is None:
+            histogram = shard.latency[backend] = LatencyHistogram()
+        histogram.record(latency)
+
+    def request_cancelled(self, backend):
+        shard = self._shard()
+        shard.in_flight[backend] = shard.in_flight.get(backend, 0) - 1
+        shard.cancelled[backend] = shard.cancelled.get(backend, 0) + 1
+
+    def request_retried(self, backend):
+        shard = self._shard()
+        shard.retries[backend] = shard.retries.get(backend, 0) + 1
+
+    def request_hedged(self, backend):
+        shard = self._shard()
+        shard.hedges[backend] = shard.hedges.get(backend, 0) + 1
+
+    def snapshot(self):
+        """Merge all shards into {backend: {requests, errors, in_flight, ..., latency}}."""
+        with self._shards_lock:
+            shards = list(self._shards)
+
+        merged = {}
+        for shard in shards:
+            for field, _, _, _ in COUNTERS:
+                for backend, value in list(getattr(shard, field).items()):
+                    entry = merged.setdefault(backend, self._empty_entry())
+                    entry[field] += value
+            for backend, histogram in list(shard.latency.items()):
+                entry = merged.setdefault(backend, self._empty_entry())
+                entry["latency"].merge(histogram)
+        return merged
+
+    @staticmethod
+    def _empty_entry():
+        entry = {field: 0 for field, _, _, _ in COUNTERS}
+        entry["latency"] = LatencyHistogram()
+        return entry
+
+    def render_prometheus(self):
+        snapshot = sorted(self.snapshot().items())
+        lines = []
+        for field, name, kind, help_text in COUNTERS:
+            lines += [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}"]
+            for backend, entry in snapshot:
+                lines.append(f'{name}{{backend="{backend_label(backend)}"}} {entry[field]}')
+
+        lines += [
+            "# HELP lb_backend_response_seconds Time from sending a request until the backend's response headers arrived.",
+            "# TYPE lb_backend_response_seconds summary",
+        ]
+        for backend, entry in snapshot:
+            label = backend_label(backend)
+            histogram = entry["latency"]
+            for quantile in QUANTILES:
+                lines.append(f'lb_backend_response_seconds{{backend="{label}",quantile="{quantile}"}} '
+                             f'{histogram.percentile(quantile):.6f}')
+            lines.append(f'lb_backend_response_seconds_sum{{backend="{label}"}} {histogram.total_seconds:.6f}')
+            lines.append(f'lb_backend_response_seconds_count{{backend="{label}"}} {histogram.count}')
+        return "\n".join(lines) + "\n"
+
+
+def backend_label(backend):
+    if isinstance(backend, tuple):
+        host, port = backend
+        return f"{host}:{port}"
+    return str(backend)
+
+
+def render_pool_stats(pools):
+    """Prometheus lines for ConnectionPool / AsyncBackendPool stats()."""
+    stats = [pool.stats() for pool in pools]
+    lines = []
+    for field, kind, help_text in (
+        ("hits", "counter", "Requests served on a reused keep-alive connection."),
+        ("misses", "counter", "Requests that had to open a new backend connection."),
+        ("idle", "gauge", "Idle keep-alive connections waiting in the pool."),
+    ):
+        name = f"lb_pool_{field}_total" if kind == "counter" else f"lb_pool_{field}_connections"
+        lines += [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}"]
+        for entry in stats:
+            lines.append(f'{name}{{backend="{entry["backend"]}"}} {entry[field]}')
+    return "\n".join(lines) + "\n"
+
+
+def render_health_stats(health_checker):
+    """Prometheus lines for HealthChecker.stats()."""
+    stats = sorted(health_checker.stats().items())
+    lines = [
+        "# HELP lb_backend_healthy Whether the backend is in rotation (1) or ejected (0).",
+        "# TYPE lb_backend_healthy gauge",
+    ]
+    for backend, entry in stats:
+        lines.append(f'lb_backend_healthy{{backend="{backend}"}} {int(entry["healthy"])}')
+    lines += [
+        "# HELP lb_backend_ejections_total Times the backend was ejected by health checking.",
+        "# TYPE lb_backend_ejections_total counter",
+    ]
+    for backend, entry in stats:
+        lines.append(f'lb_backend_ejections_total{{backend="{backend}"}} {entry["ejections"]}')
+    return "\n".join(lines) + "\n"
+
+
+def start_admin_server(port, render, host="localhost"):
+    """
+    Serve GET /metrics in Prometheus text format on a separate admin port.
+
+    render is called per scrape and returns the exposition text. The server
+    runs in a daemon thread and is returned so callers can shut it down.
+    """
+
+    class AdminHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?", 1)[0] != "/metrics":
+                self.send_error(404)
+                return
+            body = render().encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            return
+
+    server = ThreadingHTTPServer((host, port), AdminHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="admin-server", daemon=True).start()
+    print(f"[Admin] Metrics at http://{host}:{port}/metrics")
+    return server
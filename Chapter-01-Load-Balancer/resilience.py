@@ -0,0 +1,111 @@
+import threading
+import time
+from collections import deque
+
+
+class RetryBudget:
+    """
+    Caps retries (and hedged requests) at a fraction of normal traffic.
+
+    Every request deposits `ratio` of a token and every retry withdraws a
+    whole one, so retries can add at most ratio x the offered load. When a
+    backend goes down and every request starts failing, the budget runs dry
+    instead of multiplying the load on the backends that are left.
+    min_per_second tokens are added over time so low-traffic listeners can
+    still retry occasionally.
+    """
+
+    def __init__(self, ratio=0.1, min_per_second=1.0, max_tokens=100.0):
+        if ratio < 0 or min_per_second < 0:
+            raise ValueError("Retry budget rates must not be negative")
+        if max_tokens < 1:
+            raise ValueError("Retry budget must hold at least one token")
+        self.ratio = ratio
+        self.min_per_second = min_per_second
+        self.max_tokens = max_tokens
+        self.tokens = max_tokens
+        self.last_refill = time.monotonic()
+        self.lock = threading.Lock()
+
+    def record_request(self):
+        with self.lock:
+            self.tokens = min(self.max_tokens, self.tokens + self.ratio)
+
+    def try_withdraw(self):
+        """Take a token for one retry; False when the budget is spent."""
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.max_tokens, self.tokens + (now - self.last_refill) * self.min_per_second)
+            self.last_refill = now
+            if self.tokens < 1:
+                return False
+            self.tokens -= 1
+            return True
+
+    def __repr__(self):
+        return f"RetryBudget(ratio={self.ratio}, tokens={self.tokens:.1f})"
+
+
+class LatencyWindow:
+    """
+    Recent backend latencies, used to pick the hedging delay.
+
+    Keeps the last `size` samples and recomputes the quantile every
+    `recompute_every` samples, so reading it is O(1) on the request path.
+    """
+
+    def __init__(self, quantile=0.95, size=1000, min_samples=100, recompute_every=100):
+        if not 0 < quantile < 1:
+            raise ValueError("Quantile must be between 0 and 1")
+        self.quantile = quantile
+        self.min_samples = min_samples
+        self.recompute_every = recompute_every
+        self.samples = deque(maxlen=size)
+        self.since_recompute = 0
+        self.value = None
+        self.lock = threading.Lock()
+
+    def record(self, latency):
+        with self.lock:
+            self.samples.append(latency)
+            self.since_recompute += 1
+            if self.since_recompute < self.recompute_every or len(self.samples) < self.min_samples:
+                return
+            self.since_recompute = 0
+            ordered = sorted(self.samples)
+        index = min(len(ordered) - 1, int(self.quantile * len(ordered)))
+        self.value = ordered[index]
+
+
+class RetryPolicy:
+    """
+    Retries and hedged requests for one listener.
+
+    Only requests that are safe to send twice are retried or hedged:
+    idempotent methods without a streamed body. A retry goes to a different
+    backend after a connection error, timeout or a status in retry_statuses,
+    at most max_retries times. With hedge=True, a request that has not
+    received response headers after the hedge delay (the recent p95 latency,
+    but at least min_hedge_delay) is also sent to a second backend and the
+    first response wins. Retries and hedges share one RetryBudget.
+    """
+
+    def __init__(self, max_retries=1, retry_statuses=(502, 503, 504), budget=None,
+                 hedge=False, hedge_quantile=0.95, min_hedge_delay=0.001):
+        if max_retries < 0:
+            raise ValueError("Max retries must not be negative")
+        self.max_retries = max_retries
+        self.retry_statuses = frozenset(retry_statuses)
+        self.budget = budget or RetryBudget()
+        self.hedge = hedge
+        self.min_hedge_delay = min_hedge_delay
+        self.latencies = LatencyWindow(quantile=hedge_quantile)
+
+    def hedge_delay(self):
+        """Seconds to wait before hedging, or None while hedging is off or still warming up."""
+        if not self.hedge or self.latencies.value is None:
+            return None
+        return max(self.latencies.value, self.min_hedge_delay)
+
+    def __repr__(self):
+        return f"RetryPolicy(max_retries={self.max_retries}, hedge={self.hedge}, budget={self.budget})"
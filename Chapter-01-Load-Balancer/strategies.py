@@ -0,0 +1,406 @@
+import itertools
+import math
+import random
+import threading
+import time
+from collections import OrderedDict
+from functools import reduce
+from urllib.parse import parse_qs, urlsplit
+
+from consistent_hash import HashRing
+
+
+class Strategy:
+    """
+    Base class for load-balancing strategies.
+
+    pick() chooses a backend and marks a request to it as in flight; every
+    pick() must be paired with a complete() once the backend has answered (or
+    failed), which is how load- and latency-aware strategies learn about the
+    backends. All strategies are safe to share between handler threads.
+
+    backends is every configured backend; active is the subset pick() may
+    choose from, narrowed by set_active() when backends are ejected.
+
+    Strategies that route on request content (consistent hashing) derive a
+    key with request_key() and receive it in pick(); the rest ignore it.
+    """
+
+    name = "base"
+
+    def __init__(self, backends):
+        if not backends:
+            raise ValueError("At least one backend is required")
+        self.backends = list(backends)
+        self.active = list(self.backends)
+        self.lock = threading.Lock()
+
+    def pick(self, key=None):
+        raise NotImplementedError
+
+    def pick_excluding(self, exclude, key=None):
+        """
+        Pick a backend that is not in exclude, for retries and hedged requests.
+
+        Returns None when every active backend is excluded. Like pick(), the
+        result must be paired with a complete(). This default walks pick()
+        and suits strategies that keep no per-backend state; the others
+        override it.
+        """
+        for _ in range(len(self.active)):
+            backend = self.pick(key)
+            if backend not in exclude:
+                return backend
+        return None
+
+    def request_key(self, path, headers):
+        """Routing key for a request; headers needs a case-insensitive get()."""
+        return None
+
+    def set_active(self, backends):
+        """
+        Restrict routing to the given backends, e.g. the ones passing health checks.
+
+        Changes are rare, so subclasses rebuild their selection state here to
+        keep pick() cheap. An empty set re-enables every backend: sending
+        traffic to possibly-down backends beats rejecting all of it.
+        """
+        wanted = set(backends)
+        active = [backend for backend in self.backends if backend in wanted]
+        with self.lock:
+            self.active = active or list(self.backends)
+            self._rebuild()
+
+    def _rebuild(self):
+        # Called with self.lock held after self.active changes
+        return
+
+    def complete(self, backend, latency, failed=False):
+        """Record that a request picked earlier finished after latency seconds."""
+        return
+
+    def __repr__(self):
+        return f"{type(self).__name__}(backends={self.backends})"
+
+
+class RoundRobinStrategy(Strategy):
+    """Cycle through backends in order - the original load balancer behaviour."""
+
+    name = "round_robin"
+
+    def __init__(self, backends):
+        super().__init__(backends)
+        self.iterator = itertools.cycle(self.active)
+
+    def _rebuild(self):
+        self.iterator = itertools.cycle(self.active)
+
+    def pick(self, key=None):
+        with self.lock:
+            return next(self.iterator)
+
+
+class WeightedRoundRobinStrategy(Strategy):
+    """
+    Weighted round-robin with an O(1) pick.
+
+    The smooth weighted round-robin sequence (as used by nginx) is computed
+    once up front, so heavier backends are interleaved with lighter ones
+    rather than receiving their whole share in a burst. pick() just walks
+    the precomputed schedule.
+    """
+
+    name = "weighted"
+
+    def __init__(self, backends, weights=None):
+        super().__init__(backends)
+        weights = list(weights) if weights is not None else [1] * len(self.backends)
+        if len(weights) != len(self.backends):
+            raise ValueError("Need exactly one weight per backend")
+        if any(weight <= 0 or int(weight) != weight for weight in weights):
+            raise ValueError("Weights must be positive integers")
+
+        self.weights = dict(zip(self.backends, (int(weight) for weight in weights)))
+        self._rebuild()
+
+    def _rebuild(self):
+        divisor = reduce(math.gcd, (self.weights[backend] for backend in self.active))
+        weights = [self.weights[backend] // divisor for backend in self.active]
+        total = sum(weights)
+        current = [0] * len(weights)
+        schedule = []
+        for _ in range(total):
+            for i, weight in enumerate(weights):
+                current[i] += weight
+            best = max(range(len(current)), key=current.__getitem__)
+            current[best] -= total
+            schedule.append(self.active[best])
+        self.schedule = schedule
+        self.position = 0
+
+    def pick(self, key=None):
+        with self.lock:
+            backend = self.schedule[self.position]
+            self.position = (self.position + 1) % len(self.schedule)
+            return backend
+
+    def pick_excluding(self, exclude, key=None):
+        with self.lock:
+            for _ in range(len(self.schedule)):
+                backend = self.schedule[self.position]
+                self.position = (self.position + 1) % len(self.schedule)
+                if backend not in exclude:
+                    return backend
+            return None
+
+
+class LeastOutstandingStrategy(Strategy):
+    """
+    Route to the backend with the fewest requests in flight.
+
+    Backends are grouped into buckets keyed by their outstanding count and the
+    lowest non-empty bucket is tracked, so pick() and complete() are O(1)
+    instead of scanning every backend. Ties rotate through the bucket.
+    Inactive backends keep their outstanding count but sit in no bucket.
+    """
+
+    name = "least_outstanding"
+
+    def __init__(self, backends):
+        super().__init__(backends)
+        self.outstanding = {backend: 0 for backend in self.backends}
+        self._rebuild()
+
+    def _rebuild(self):
+        self.bucketed = set(self.active)
+        self.buckets = {}
+        for backend in self.active:
+            self.buckets.setdefault(self.outstanding[backend], OrderedDict())[backend] = None
+        self.min_count = min(self.buckets)
+
+    def _move(self, backend, old, new):
+        self.outstanding[backend] = new
+        if backend not in self.bucketed:
+            return
+        bucket = self.buckets[old]
+        del bucket[backend]
+        if not bucket:
+            del self.buckets[old]
+        self.buckets.setdefault(new, OrderedDict())[backend] = None
+
+    def pick(self, key=None):
+        with self.lock:
+            bucket = self.buckets[self.min_count]
+            backend = next(iter(bucket))
+            # Rotate so the next tie goes to a different backend
+            bucket.move_to_end(backend)
+            count = self.min_count
+            self._move(backend, count, count + 1)
+            if count not in self.buckets:
+                self.min_count = count + 1
+            return backend
+
+    def pick_excluding(self, exclude, key=None):
+        # Retries are rare, so a linear scan is fine here
+        with self.lock:
+            candidates = [backend for backend in self.active if backend not in exclude]
+            if not candidates:
+                return None
+            backend = min(candidates, key=self.outstanding.__getitem__)
+            count = self.outstanding[backend]
+            self._move(backend, count, count + 1)
+            if count == self.min_count and count not in self.buckets:
+                self.min_count = count + 1
+            return backend
+
+    def complete(self, backend, latency, failed=False):
+        with self.lock:
+            count = self.outstanding[backend]
+            if count == 0:
+                return
+            self._move(backend, count, count - 1)
+            if backend in self.bucketed and count - 1 < self.min_count:
+                self.min_count = count - 1
+
+
+class PowerOfTwoChoicesStrategy(Strategy):
+    """
+    Sample two distinct backends at random and send to the less loaded one.
+
+    Nearly as good as a full least-loaded scan but O(1), and the randomness
+    avoids every handler piling onto the same "best" backend at once.
+    """
+
+    name = "p2c"
+
+    def __init__(self, backends, rng=None):
+        super().__init__(backends)
+        self.outstanding = {backend: 0 for backend in self.backends}
+        self.rng = rng or random.Random()
+
+    def load(self, backend):
+        return self.outstanding[backend]
+
+    def pick(self, key=None):
+        with self.lock:
+            if len(self.active) == 1:
+                backend = self.active[0]
+            else:
+                first, second = self.rng.sample(self.active, 2)
+                backend = first if self.load(first) <= self.load(second) else second
+            self.outstanding[backend] += 1
+            return backend
+
+    def pick_excluding(self, exclude, key=None):
+        with self.lock:
+            candidates = [backend for backend in self.active if backend not in exclude]
+            if not candidates:
+                return None
+            if len(candidates) == 1:
+                backend = candidates[0]
+            else:
+                first, second = self.rng.sample(candidates, 2)
+                backend = first if self.load(first) <= self.load(second) else second
+            self.outstanding[backend] += 1
+            return backend
+
+    def complete(self, backend, latency, failed=False):
+        with self.lock:
+            if self.outstanding[backend] > 0:
+                self.outstanding[backend] -= 1
+
+
+class PeakEWMAStrategy(PowerOfTwoChoicesStrategy):
+    """
+    Latency-aware power-of-two-choices (Finagle's "peak EWMA").
+
+    Each backend keeps an exponentially weighted moving average of response
+    latency that jumps straight up to any slower sample (the peak) and decays
+    back over decay_time seconds. The load of a backend is that latency times
+    its outstanding requests plus one, so a backend that slows down stops
+    receiving traffic almost immediately.
+    """
+
+    name = "peak_ewma"
+
+    # Cost applied to failed requests so erroring backends look slow
+    FAILURE_PENALTY = 1.0
+
+    def __init__(self, backends, decay_time=10.0, initial_latency=0.001, rng=None):
+        super().__init__(backends, rng=rng)
+        if decay_time <= 0:
+            raise ValueError("Decay time must be greater than 0")
+        self.decay_time = decay_time
+        now = time.monotonic()
+        self.ewma = {backend: initial_latency for backend in self.backends}
+        self.last_update = {backend: now for backend in self.backends}
+
+    def load(self, backend):
+        return self.ewma[backend] * (self.outstanding[backend] + 1)
+
+    def complete(self, backend, latency, failed=False):
+        if failed:
+            latency = max(latency, self.FAILURE_PENALTY)
+        with self.lock:
+            if self.outstanding[backend] > 0:
+                self.outstanding[backend] -= 1
+
+            now = time.monotonic()
+            elapsed = max(now - self.last_update[backend], 0.0)
+            self.last_update[backend] = now
+            if latency > self.ewma[backend]:
+                self.ewma[backend] = latency
+            else:
+                weight = math.exp(-elapsed / self.decay_time)
+                self.ewma[backend] = self.ewma[backend] * weight + latency * (1 - weight)
+
+
+class ConsistentHashStrategy(Strategy):
+    """
+    Cache-affine routing: requests with the same key always go to the same
+    backend, so each cache node only holds its share of the keys.
+
+    The key comes from the request path (default), a header ("header:X-User")
+    or a query parameter ("query:id"), and is looked up on a HashRing with
+    virtual nodes. With load_factor set, consistent hashing with bounded
+    loads is used: no backend may have more than load_factor times the
+    average number of requests in flight, and a hot key spills over to the
+    next backend clockwise on the ring instead of overloading its owner.
+    """
+
+    name = "consistent_hash"
+
+    def __init__(self, backends, key="path", replicas=160, load_factor=None):
+        super().__init__(backends)
+        if load_factor is not None and load_factor < 1:
+            raise ValueError("Load factor must be at least 1")
+        self.key_source, _, self.key_name = key.partition(":")
+        if self.key_source not in ("path", "header", "query") or (self.key_source != "path" and not self.key_name):
+            raise ValueError(f"Unknown hash key: {key}")
+        self.replicas = replicas
+        self.load_factor = load_factor
+        self.outstanding = {backend: 0 for backend in self.backends}
+        self.total_outstanding = 0
+        self._rebuild()
+
+    def _rebuild(self):
+        self.ring = HashRing(self.active, replicas=self.replicas)
+
+    def request_key(self, path, headers):
+        if self.key_source == "header":
+            return headers.get(self.key_name) or ""
+        if self.key_source == "query":
+            values = parse_qs(urlsplit(path).query).get(self.key_name)
+            return values[0] if values else ""
+        return urlsplit(path).path
+
+    def pick(self, key=None):
+        key = key or ""
+        with self.lock:
+            if self.load_factor is None:
+                backend = self.ring.lookup(key)
+            else:
+                # Ceiling of load_factor x the average load, counting this request
+                capacity = math.ceil(self.load_factor * (self.total_outstanding + 1) / len(self.active))
+                for backend in self.ring.walk(key):
+                    if self.outstanding[backend] < capacity:
+                        break
+            self.outstanding[backend] += 1
+            self.total_outstanding += 1
+            return backend
+
+    def pick_excluding(self, exclude, key=None):
+        # The next backend clockwise, i.e. the key's next replica
+        with self.lock:
+            for backend in self.ring.walk(key or ""):
+                if backend not in exclude:
+                    self.outstanding[backend] += 1
+                    self.total_outstanding += 1
+                    return backend
+            return None
+
+    def complete(self, backend, latency, failed=False):
+        with self.lock:
+            if self.outstanding[backend] > 0:
+                self.outstanding[backend] -= 1
+                self.total_outstanding -= 1
+
+
+STRATEGIES = {
+    strategy.name: strategy
+    for strategy in (
+        RoundRobinStrategy,
+        WeightedRoundRobinStrategy,
+        LeastOutstandingStrategy,
+        PowerOfTwoChoicesStrategy,
+        PeakEWMAStrategy,
+        ConsistentHashStrategy,
+    )
+}
+
+
+def create_strategy(name, backends, **options):
+    """Build a strategy by its name, e.g. create_strategy("p2c", BACKENDS)."""
+    if name not in STRATEGIES:
+        raise ValueError(f"Unknown strategy: {name}")
+    return STRATEGIES[name](backends, **options)
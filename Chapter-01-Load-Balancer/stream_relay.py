@@ -0,0 +1,163 @@
+import threading
+
+# Bytes copied per read/write when relaying a body. Each in-flight request
+# holds exactly one buffer of this size, which is the per-request ceiling on
+# relay memory regardless of how large the payload is.
+RELAY_BUFFER_SIZE = 64 * 1024
+
+# Idle buffers kept for reuse; anything beyond this is left to the GC
+MAX_POOLED_BUFFERS = 64
+
+# Hop-by-hop headers (RFC 9110 section 7.6.1) describe a single connection
+# and are never forwarded by a proxy
+HOP_BY_HOP_HEADERS = frozenset({
+    "connection",
+    "keep-alive",
+    "proxy-connection",
+    "proxy-authenticate",
+    "proxy-authorization",
+    "te",
+    "trailer",
+    "transfer-encoding",
+    "upgrade",
+})
+
+# Longest chunk-size line accepted from a client
+MAX_CHUNK_LINE = 1024
+
+
+def end_to_end_headers(headers):
+    """
+    Drop hop-by-hop headers from (name, value) pairs, including any extra
+    header names the sender listed in its Connection header.
+    """
+    listed = set()
+    for name, value in headers:
+        if name.lower() == "connection":
+            listed.update(token.strip().lower() for token in value.split(","))
+    return [
+        (name, value) for name, value in headers
+        if name.lower() not in HOP_BY_HOP_HEADERS and name.lower() not in listed
+    ]
+
+
+class BufferPool:
+    """
+    Free list of fixed-size bytearrays shared by all handler threads.
+
+    Reusing buffers means a relay allocates nothing per chunk: readinto()
+    fills the buffer in place and a memoryview slice is written out without
+    copying.
+    """
+
+    def __init__(self, buffer_size=RELAY_BUFFER_SIZE, max_buffers=MAX_POOLED_BUFFERS):
+        if buffer_size <= 0:
+            raise ValueError("Buffer size must be greater than 0")
+        self.buffer_size = buffer_size
+        self.max_buffers = max_buffers
+        self._free = []
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        with self._lock:
+            if self._free:
+                return self._free.pop()
+        return bytearray(self.buffer_size)
+
+    def release(self, buffer):
+        with self._lock:
+            if len(self._free) < self.max_buffers:
+                self._free.append(buffer)
+
+
+buffer_pool = BufferPool()
+
+
+def send_chunk(sock, view):
+    # Scatter/gather the chunk size line, payload and trailing CRLF into one
+    # sendmsg() call so the payload is never concatenated into a new bytes
+    parts = [b"%x\r\n" % len(view), view, b"\r\n"]
+    total = len(parts[0]) + len(view) + 2
+    if hasattr(sock, "sendmsg"):
+        sent = sock.sendmsg(parts)
+    else:
+        sent = 0
+    if sent < total:
+        sock.sendall(b"".join(parts)[sent:])
+
+
+def relay_body(response, sock, chunked=False, pool=buffer_pool):
+    """
+    Copy an http.client response body to a client socket in fixed-size chunks.
+
+    http.client undoes any chunked encoding from the backend; pass chunked=True
+    to re-frame the body as chunked for the client (the caller must have sent
+    the Transfer-Encoding header). Returns the number of body bytes relayed.
+    """
+    buffer = pool.acquire()
+    view = memoryview(buffer)
+    relayed = 0
+    try:
+        while True:
+            n = response.readinto(view)
+            if not n:
+                break
+            relayed += n
+            if chunked:
+                send_chunk(sock, view[:n])
+            else:
+                sock.sendall(view[:n])
+        if chunked:
+            sock.sendall(b"0\r\n\r\n")
+    finally:
+        view.release()
+        pool.release(buffer)
+    return relayed
+
+
+def relay_request_body(rfile, sock, length=None, chunked=False, pool=buffer_pool):
+    """
+    Stream a client request body from rfile to a backend socket.
+
+    Copies exactly length bytes, or with chunked=True decodes the client's
+    chunked body and re-frames it chunk by chunk for the backend. Like
+    relay_body(), only one pooled buffer is held however large the upload.
+    Raises ConnectionError if the client disconnects mid-body and ValueError
+    on malformed chunk framing.
+    """
+    buffer = pool.acquire()
+    view = memoryview(buffer)
+    try:
+        if not chunked:
+            _copy_exact(rfile, sock, length or 0, view, chunked=False)
+            return
+
+        while True:
+            size_line = rfile.readline(MAX_CHUNK_LINE)
+            if not size_line.endswith(b"\n"):
+                raise ValueError("Malformed chunk size line")
+            size = int(size_line.split(b";", 1)[0], 16)
+            if size == 0:
+                # Trailers are hop-by-hop here; skip them up to the blank line
+                while rfile.readline(MAX_CHUNK_LINE) not in (b"\r\n", b"\n", b""):
+                    pass
+                sock.sendall(b"0\r\n\r\n")
+                return
+            _copy_exact(rfile, sock, size, view, chunked=True)
+            if rfile.readline(MAX_CHUNK_LINE) not in (b"\r\n", b"\n"):
+                raise ValueError("Missing CRLF after chunk")
+    finally:
+        view.release()
+        pool.release(buffer)
+
+
+def _copy_exact(rfile, sock, remaining, view, chunked):
+    while remaining > 0:
+        n = rfile.readinto(view[:min(remaining, len(view))])
+        if not n:
+            raise ConnectionError("Client closed the connection mid-body")
+        remaining -= n
+        if chunked:
+            send_chunk(sock, view[:n])
+        else:
+            sock.sendall(view[:n])
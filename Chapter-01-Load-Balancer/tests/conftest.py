@@ -0,0 +1,143 @@
+import os
+import sys
+
+# The chapter's modules sit next to load_balancer.py rather than in a package
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import asyncio
+import pytest
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, HTTPServer, ThreadingHTTPServer
+
+import load_balancer
+from async_proxy import AsyncLoadBalancer
+from strategies import create_strategy
+
+
+class BackendHandler(BaseHTTPRequestHandler):
+    """Test backend answering with its name and the request path."""
+
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        if self.path.startswith("/chunked/"):
+            # /chunked/<count>: count chunks of 1000 bytes each
+            self.send_response(200)
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            for i in range(int(self.path.rsplit("/", 1)[1])):
+                self.wfile.write(b"3e8\r\n" + bytes([48 + i % 10]) * 1000 + b"\r\n")
+            self.wfile.write(b"0\r\n\r\n")
+            return
+        # /fail/<name> and /slow/<name>: only the named backend answers 503 or takes a second
+        if self.path == f"/fail/{self.server.name}":
+            self.reply(b"", status=503)
+            return
+        if self.path == f"/slow/{self.server.name}":
+            time.sleep(1)
+        if self.path.startswith("/status/"):
+            self.reply(b"", status=int(self.path.rsplit("/", 1)[1]))
+            return
+        self.reply(f"{self.server.name} {self.command} {self.path}".encode())
+
+    def do_POST(self):
+        # Echo the request body, de-chunked
+        if "chunked" in self.headers.get("Transfer-Encoding", "").lower():
+            body = b""
+            while True:
+                size = int(self.rfile.readline().split(b";", 1)[0], 16)
+                body += self.rfile.read(size + 2)[:size]
+                if size == 0:
+                    break
+        else:
+            body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        self.reply(f"{self.server.name} {self.command} ".encode() + body)
+
+    do_PUT = do_PATCH = do_DELETE = do_POST
+
+    def reply(self, body, status=200):
+        self.send_response(status)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def backends():
+    """Two local backends named red and blue; the proxy balances across them while the test runs."""
+    servers = []
+    for name in ("red", "blue"):
+        server = ThreadingHTTPServer(("127.0.0.1", 0), BackendHandler)
+        server.daemon_threads = True
+        server.name = name
+        threading.Thread(target=server.serve_forever, args=(0.05,), daemon=True).start()
+        servers.append(server)
+    addresses = [server.server_address for server in servers]
+    original = list(load_balancer.BACKENDS)
+    load_balancer.set_backends(addresses)
+    yield addresses
+    load_balancer.set_backends(original)
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+@pytest.fixture
+def start_proxy(backends):
+    """start_proxy(mode, **options) runs the load balancer on a free port and returns its address."""
+    stops = []
+
+    def start(mode, strategy=None, health_checker=None, retry_policy=None):
+        strategy = strategy or create_strategy("round_robin", backends)
+        if mode == "asyncio":
+            loop = asyncio.new_event_loop()
+            engine = AsyncLoadBalancer(strategy, backends, health_checker=health_checker, metrics=load_balancer.METRICS,
+                                       retry_policy=retry_policy, read_timeout=5)
+            server = loop.run_until_complete(asyncio.start_server(engine.handle_client, "127.0.0.1", 0))
+            thread = threading.Thread(target=loop.run_forever, daemon=True)
+            thread.start()
+
+            async def shutdown():
+                server.close()
+                # Connections still held open by keep-alive clients
+                tasks = [task for task in asyncio.all_tasks() if task is not asyncio.current_task()]
+                for task in tasks:
+                    task.cancel()
+                await asyncio.gather(*tasks, return_exceptions=True)
+
+            def stop():
+                asyncio.run_coroutine_threadsafe(shutdown(), loop).result()
+                loop.call_soon_threadsafe(loop.stop)
+                thread.join()
+                loop.close()
+
+            stops.append(stop)
+            return server.sockets[0].getsockname()[:2]
+
+        if mode == "threaded":
+            server = load_balancer.ThreadPoolHTTPServer(("127.0.0.1", 0), load_balancer.LoadBalancerHandler,
+                                                        max_workers=4)
+        else:
+            server = HTTPServer(("127.0.0.1", 0), load_balancer.LoadBalancerHandler)
+        server.strategy = strategy
+        server.health_checker = health_checker
+        server.access_log = None
+        server.retry_policy = retry_policy
+        threading.Thread(target=server.serve_forever, args=(0.05,), daemon=True).start()
+
+        def stop():
+            server.shutdown()
+            server.server_close()
+
+        stops.append(stop)
+        return server.server_address
+
+    yield start
+    for stop in stops:
+        stop()
+
@@ -0,0 +1,54 @@
+import pytest
+import socket
+from benchmark import drive_closed_loop, drive_open_loop, percentile, summarize, wait_for_port
+
+
+class TestBenchmark:
+    """Test cases for the benchmark's load generators and result summaries"""
+
+    def test_percentile(self):
+        """Test percentiles index into the sorted values"""
+        values = list(range(100))
+
+        assert percentile(values, 0.5) == 50
+        assert percentile(values, 0.99) == 99
+        assert percentile(values, 1.0) == 99
+        assert percentile([], 0.5) == 0.0
+
+    def test_summarize(self):
+        """Test the result dict counts errors and reports latencies in milliseconds"""
+        result = summarize([0.003, 0.001, 0.002], errors=1, elapsed=0.5)
+
+        assert result["requests"] == 4
+        assert result["error_rate"] == 0.25
+        assert result["rps"] == 6.0
+        assert result["latency_ms"]["p50"] == pytest.approx(2.0)
+        assert result["latency_ms"]["max"] == pytest.approx(3.0)
+        assert summarize([], 0, 0)["rps"] == 0.0
+
+    def test_wait_for_port_times_out(self):
+        """Test waiting on a port nothing listens on fails"""
+        with socket.socket() as sock:
+            sock.bind(("127.0.0.1", 0))
+            port = sock.getsockname()[1]
+        with pytest.raises(RuntimeError):
+            wait_for_port(port, timeout=0.2)
+
+    @pytest.mark.parametrize("mode", ["threaded", "asyncio"])
+    def test_closed_loop(self, start_proxy, mode):
+        """Test the closed-loop driver gets answers from a running load balancer"""
+        _, port = start_proxy(mode)
+        result = drive_closed_loop(port, clients=2, duration=0.2)
+
+        assert result["requests"] > 0
+        assert result["errors"] == 0
+
+    @pytest.mark.parametrize("mode", ["threaded", "asyncio"])
+    def test_open_loop(self, start_proxy, mode):
+        """Test the open-loop driver sends rate x duration requests"""
+        _, port = start_proxy(mode)
+        result = drive_open_loop(port, rate=50, duration=0.2)
+
+        assert result["requests"] == 10
+        assert result["errors"] == 0
+        assert result["latency_ms"]["max"] > 0
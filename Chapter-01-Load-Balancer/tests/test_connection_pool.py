@@ -0,0 +1,113 @@
+import pytest
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from connection_pool import ConnectionPool
+
+
+class KeepAliveHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        body = b"ok"
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        if self.path == "/close":
+            self.send_header("Connection", "close")
+            self.close_connection = True
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def backend():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), KeepAliveHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, args=(0.05,), daemon=True).start()
+    yield server.server_address
+    server.shutdown()
+    server.server_close()
+
+
+def fetch(pool, path="/"):
+    conn = pool.acquire()
+    conn.request("GET", path)
+    response = conn.getresponse()
+    body = response.read()
+    pool.release(conn, reusable=not response.will_close)
+    return conn, body
+
+
+class TestConnectionPool:
+    """Test cases for ConnectionPool implementation"""
+
+    def test_initialization_with_invalid_parameters(self):
+        """Test ConnectionPool initialization with invalid parameters"""
+        with pytest.raises(ValueError):
+            ConnectionPool("localhost", 8001, max_idle=0)
+
+        with pytest.raises(ValueError):
+            ConnectionPool("localhost", 8001, idle_timeout=0)
+
+    def test_connection_reused(self, backend):
+        """Test a released keep-alive connection is handed out again"""
+        pool = ConnectionPool(*backend)
+        first, body = fetch(pool)
+        second, _ = fetch(pool)
+
+        assert body == b"ok"
+        assert second is first and second.reused
+        assert pool.stats()["hits"] == 1 and pool.stats()["misses"] == 1
+        pool.close()
+
+    def test_connection_close_not_pooled(self, backend):
+        """Test a connection the backend asked to close is not kept"""
+        pool = ConnectionPool(*backend)
+        first, _ = fetch(pool, "/close")
+        second, _ = fetch(pool)
+
+        assert second is not first
+        assert pool.stats()["misses"] == 2
+        pool.close()
+
+    def test_idle_timeout_evicts(self, backend):
+        """Test connections idle for longer than idle_timeout are closed instead of reused"""
+        pool = ConnectionPool(*backend, idle_timeout=0.05)
+        first, _ = fetch(pool)
+        time.sleep(0.1)
+        second, _ = fetch(pool)
+
+        assert second is not first
+        assert pool.stats()["evicted_idle"] == 1
+        pool.close()
+
+    def test_stale_socket_evicted(self, backend):
+        """Test a pooled socket the backend has closed is detected before reuse"""
+        pool = ConnectionPool(*backend)
+        conn, _ = fetch(pool)
+        conn.sock.shutdown(0)
+        time.sleep(0.05)
+        second, _ = fetch(pool)
+
+        assert second is not conn
+        assert pool.stats()["evicted_stale"] == 1
+        pool.close()
+
+    def test_max_idle_discards_extra(self, backend):
+        """Test only max_idle connections are kept idle; the rest are closed on release"""
+        pool = ConnectionPool(*backend, max_idle=2)
+        conns = [pool.acquire() for _ in range(3)]
+        for conn in conns:
+            conn.request("GET", "/")
+            conn.getresponse().read()
+        for conn in conns:
+            pool.release(conn)
+
+        assert pool.stats()["idle"] == 2
+        assert pool.stats()["discarded"] == 1
+        assert conns[2].sock is None
+        pool.close()
+        assert pool.stats()["idle"] == 0
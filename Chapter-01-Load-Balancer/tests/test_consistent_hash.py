@@ -0,0 +1,60 @@
+import pytest
+from consistent_hash import HashRing
+
+
+class TestHashRing:
+    """Test cases for HashRing implementation"""
+
+    def test_initialization_with_invalid_parameters(self):
+        """Test HashRing initialization with invalid parameters"""
+        with pytest.raises(ValueError):
+            HashRing([])
+
+        with pytest.raises(ValueError):
+            HashRing(["a"], replicas=0)
+
+    def test_virtual_nodes(self):
+        """Test every node is placed at `replicas` points, in sorted order"""
+        ring = HashRing(["a", "b", "c"], replicas=10)
+
+        assert len(ring) == 30
+        assert ring.hashes == sorted(ring.hashes)
+
+    def test_lookup_is_stable(self):
+        """Test lookups agree across ring instances (no per-process hash salt)"""
+        first = HashRing([("localhost", 8001), ("localhost", 8002)])
+        second = HashRing([("localhost", 8001), ("localhost", 8002)])
+
+        for i in range(100):
+            assert first.lookup(f"key-{i}") == second.lookup(f"key-{i}")
+
+    def test_keys_spread_evenly(self):
+        """Test keys are shared roughly evenly between nodes"""
+        nodes = [f"node-{i}" for i in range(4)]
+        ring = HashRing(nodes)
+
+        counts = {node: 0 for node in nodes}
+        for i in range(10000):
+            counts[ring.lookup(f"key-{i}")] += 1
+        assert all(1500 < count < 3500 for count in counts.values())
+
+    def test_adding_node_moves_few_keys(self):
+        """Test adding one of N nodes only moves about 1/N of the keys"""
+        nodes = [f"node-{i}" for i in range(9)]
+        before = HashRing(nodes)
+        after = HashRing(nodes + ["node-9"])
+
+        keys = [f"key-{i}" for i in range(10000)]
+        moved = [key for key in keys if before.lookup(key) != after.lookup(key)]
+        assert len(moved) < 1500
+        # Keys only ever move to the new node
+        assert all(after.lookup(key) == "node-9" for key in moved)
+
+    def test_walk(self):
+        """Test walk yields the owner first, then every other node once"""
+        ring = HashRing(["a", "b", "c"])
+
+        for i in range(20):
+            nodes = list(ring.walk(f"key-{i}"))
+            assert nodes[0] == ring.lookup(f"key-{i}")
+            assert sorted(nodes) == ["a", "b", "c"]
@@ -0,0 +1,95 @@
+import http.client
+import pytest
+import socket
+import time
+from health_check import HealthChecker
+from strategies import create_strategy
+
+
+def closed_port():
+    """A local port nothing listens on."""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()
+
+
+class TestActiveHealthChecks:
+    """Test cases for active probing in HealthChecker"""
+
+    def test_initialization_with_invalid_parameters(self):
+        """Test HealthChecker initialization with invalid parameters"""
+        with pytest.raises(ValueError):
+            HealthChecker([], interval=0)
+
+        with pytest.raises(ValueError):
+            HealthChecker([], timeout=0)
+
+        with pytest.raises(ValueError):
+            HealthChecker([], unhealthy_threshold=0)
+
+    def test_probe_results(self, backends):
+        """Test probes pass on a 2xx, fail on a 5xx and on a refused connection"""
+        assert HealthChecker(backends).probe(backends[0]) == (True, None)
+        assert HealthChecker(backends, probe_path="/status/503").probe(backends[0]) == (False, "HTTP 503")
+        dead = closed_port()
+        ok, error = HealthChecker([dead], timeout=0.5).probe(dead)
+        assert not ok and error
+
+    def test_probe_transitions(self):
+        """Test unhealthy_threshold failed probes eject and healthy_threshold good ones re-admit"""
+        backends = [("localhost", 8001), ("localhost", 8002)]
+        checker = HealthChecker(backends, unhealthy_threshold=2, healthy_threshold=2)
+        changes = []
+        checker.subscribe(changes.append)
+
+        checker.record_probe(backends[0], False, "refused")
+        assert checker.is_healthy(backends[0])
+        checker.record_probe(backends[0], False, "refused")
+        assert checker.healthy_backends() == [backends[1]]
+
+        checker.record_probe(backends[0], True)
+        checker.record_probe(backends[0], False, "refused")
+        checker.record_probe(backends[0], True)
+        # The failure in between reset the run of successes
+        assert not checker.is_healthy(backends[0])
+        checker.record_probe(backends[0], True)
+        assert checker.is_healthy(backends[0])
+
+        assert changes == [backends, [backends[1]], backends]
+        stats = checker.stats()["localhost:8001"]
+        assert stats["ejections"] == 1 and stats["healthy"] and stats["last_error"] is None
+
+    def test_background_probes_eject_dead_backend(self, backends):
+        """Test the probe thread ejects a backend nobody listens on"""
+        dead = closed_port()
+        checker = HealthChecker([backends[0], dead], interval=0.02, timeout=0.5, unhealthy_threshold=2)
+        checker.start()
+        try:
+            deadline = time.monotonic() + 5
+            while checker.is_healthy(dead) and time.monotonic() < deadline:
+                time.sleep(0.01)
+        finally:
+            checker.stop()
+
+        assert checker.healthy_backends() == [backends[0]]
+
+    @pytest.mark.parametrize("mode", ["threaded", "asyncio"])
+    def test_ejected_backend_gets_no_traffic(self, backends, start_proxy, mode):
+        """Test the proxy routes around an ejected backend and back once it recovers"""
+        checker = HealthChecker(backends, unhealthy_threshold=1, healthy_threshold=1)
+        strategy = create_strategy("round_robin", backends)
+        checker.subscribe(strategy.set_active)
+        conn = http.client.HTTPConnection(*start_proxy(mode, strategy=strategy, health_checker=checker), timeout=5)
+
+        def names(count):
+            result = []
+            for _ in range(count):
+                conn.request("GET", "/")
+                result.append(conn.getresponse().read().split()[0])
+            return result
+
+        checker.record_probe(backends[0], False, "refused")
+        assert names(4) == [b"blue"] * 4
+        checker.record_probe(backends[0], True)
+        assert sorted(names(4)) == [b"blue", b"blue", b"red", b"red"]
+        conn.close()
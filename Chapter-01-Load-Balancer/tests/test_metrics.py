@@ -0,0 +1,132 @@
+import http.client
+import pytest
+import threading
+import urllib.error
+import urllib.request
+from health_check import HealthChecker
+from load_balancer import METRICS
+from metrics import (LatencyHistogram, LoadBalancerMetrics, bucket_index, bucket_value, render_health_stats,
+                     start_admin_server)
+
+
+BACKEND = ("localhost", 8001)
+
+
+class TestLatencyHistogram:
+    """Test cases for LatencyHistogram implementation"""
+
+    @pytest.mark.parametrize("micros", [0, 1, 255, 256, 1000, 123_456, 9_999_999])
+    def test_bucket_relative_error(self, micros):
+        """Test every value maps to a bucket whose lower bound is within 1% of it"""
+        low = bucket_value(bucket_index(micros))
+
+        assert low <= micros
+        assert micros - low <= micros * 0.01
+
+    def test_percentiles(self):
+        """Test percentiles of a uniform spread of latencies"""
+        histogram = LatencyHistogram()
+        for ms in range(1, 1001):
+            histogram.record(ms / 1000)
+
+        assert histogram.count == 1000
+        assert histogram.percentile(0.5) == pytest.approx(0.5, rel=0.01)
+        assert histogram.percentile(0.99) == pytest.approx(0.99, rel=0.01)
+        assert histogram.total_seconds == pytest.approx(500.5)
+        assert LatencyHistogram().percentile(0.5) == 0.0
+
+    def test_merge(self):
+        """Test merged histograms add up counts and totals"""
+        fast, slow = LatencyHistogram(), LatencyHistogram()
+        for _ in range(90):
+            fast.record(0.001)
+        for _ in range(10):
+            slow.record(1.0)
+        fast.merge(slow)
+
+        assert fast.count == 100
+        assert fast.percentile(0.5) == pytest.approx(0.001, rel=0.01)
+        assert fast.percentile(0.95) == pytest.approx(1.0, rel=0.01)
+
+
+class TestLoadBalancerMetrics:
+    """Test cases for LoadBalancerMetrics implementation"""
+
+    def test_shards_merged_across_threads(self):
+        """Test counts recorded on several threads add up in the snapshot"""
+        metrics = LoadBalancerMetrics()
+
+        def record():
+            for i in range(100):
+                metrics.request_started(BACKEND)
+                metrics.request_finished(BACKEND, 0.01, failed=i % 10 == 0)
+
+        threads = [threading.Thread(target=record) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        metrics.request_started(BACKEND)
+        metrics.request_hedged(BACKEND)
+        metrics.request_cancelled(BACKEND)
+        metrics.request_retried(BACKEND)
+
+        entry = metrics.snapshot()[BACKEND]
+        assert len(metrics._shards) == 5
+        assert (entry["requests"], entry["errors"], entry["in_flight"]) == (400, 40, 0)
+        assert (entry["hedges"], entry["cancelled"], entry["retries"]) == (1, 1, 1)
+        assert entry["latency"].count == 400
+
+    def test_render_prometheus(self):
+        """Test the exposition text carries counters and latency quantiles per backend"""
+        metrics = LoadBalancerMetrics()
+        metrics.request_started(BACKEND)
+        metrics.request_finished(BACKEND, 0.25, failed=True)
+        text = metrics.render_prometheus()
+
+        assert "# TYPE lb_requests_total counter" in text
+        assert 'lb_requests_total{backend="localhost:8001"} 1' in text
+        assert 'lb_request_errors_total{backend="localhost:8001"} 1' in text
+        assert 'lb_backend_response_seconds{backend="localhost:8001",quantile="0.99"} 0.24' in text
+        assert 'lb_backend_response_seconds_count{backend="localhost:8001"} 1' in text
+
+    def test_render_health_stats(self):
+        """Test health gauges and ejection counters"""
+        checker = HealthChecker([BACKEND], unhealthy_threshold=1)
+        checker.record_probe(BACKEND, False, "refused")
+        text = render_health_stats(checker)
+
+        assert 'lb_backend_healthy{backend="localhost:8001"} 0' in text
+        assert 'lb_backend_ejections_total{backend="localhost:8001"} 1' in text
+
+    def test_admin_server(self):
+        """Test /metrics serves the rendered text and other paths 404"""
+        server = start_admin_server(0, lambda: "lb_up 1\n", host="127.0.0.1")
+        base = "http://127.0.0.1:%d" % server.server_address[1]
+        try:
+            with urllib.request.urlopen(base + "/metrics", timeout=5) as response:
+                assert response.read() == b"lb_up 1\n"
+                assert response.headers["Content-Type"].startswith("text/plain")
+            with pytest.raises(urllib.error.HTTPError) as error:
+                urllib.request.urlopen(base + "/other", timeout=5)
+            assert error.value.code == 404
+        finally:
+            server.shutdown()
+            server.server_close()
+
+    def test_proxy_records_requests(self, backends, start_proxy):
+        """Test proxied requests are counted per backend with their latency"""
+        before = METRICS.snapshot()
+        conn = http.client.HTTPConnection(*start_proxy("threaded"), timeout=5)
+        for path in ("/", "/", "/status/503", "/"):
+            conn.request("GET", path)
+            conn.getresponse().read()
+        conn.close()
+
+        after = METRICS.snapshot()
+        requests = {backend: after[backend]["requests"] - before.get(backend, {"requests": 0})["requests"]
+                    for backend in backends}
+        errors = sum(after[backend]["errors"] - before.get(backend, {"errors": 0})["errors"] for backend in backends)
+        assert requests == {backends[0]: 2, backends[1]: 2}
+        assert errors == 1
+        assert all(after[backend]["in_flight"] == 0 for backend in backends)
@@ -0,0 +1,197 @@
+import http.client
+import pytest
+import time
+from health_check import FAILURE_STATUSES, HealthChecker
+from load_balancer import METRICS
+from resilience import LatencyWindow, RetryBudget, RetryPolicy
+
+
+BACKENDS = [("localhost", 8001), ("localhost", 8002)]
+
+
+class TestRetryBudget:
+    """Test cases for RetryBudget implementation"""
+
+    def test_initialization_with_invalid_parameters(self):
+        """Test RetryBudget initialization with invalid parameters"""
+        with pytest.raises(ValueError):
+            RetryBudget(ratio=-0.1)
+
+        with pytest.raises(ValueError):
+            RetryBudget(min_per_second=-1)
+
+        with pytest.raises(ValueError):
+            RetryBudget(max_tokens=0.5)
+
+    def test_budget_runs_dry(self):
+        """Test retries stop once the budget is spent"""
+        budget = RetryBudget(ratio=0.1, min_per_second=0, max_tokens=3)
+
+        assert [budget.try_withdraw() for _ in range(4)] == [True, True, True, False]
+
+    def test_requests_earn_retries(self):
+        """Test every request deposits ratio of a retry"""
+        budget = RetryBudget(ratio=0.25, min_per_second=0, max_tokens=3)
+        for _ in range(3):
+            budget.try_withdraw()
+
+        for _ in range(4):
+            budget.record_request()
+        assert budget.try_withdraw() is True
+        assert budget.try_withdraw() is False
+
+    def test_budget_capped(self):
+        """Test deposits never exceed max_tokens"""
+        budget = RetryBudget(ratio=1, min_per_second=0, max_tokens=2)
+
+        for _ in range(10):
+            budget.record_request()
+        assert budget.tokens == 2
+
+    def test_min_per_second_refill(self):
+        """Test the budget refills over time without traffic"""
+        budget = RetryBudget(ratio=0, min_per_second=20, max_tokens=1)
+        assert budget.try_withdraw() is True
+        assert budget.try_withdraw() is False
+
+        # Wait for a bit more than one token's worth
+        time.sleep(0.1)
+
+        assert budget.try_withdraw() is True
+
+
+class TestRetryPolicy:
+    """Test cases for LatencyWindow and RetryPolicy"""
+
+    def test_latency_window_quantile(self):
+        """Test the quantile is computed once enough samples arrive"""
+        window = LatencyWindow(quantile=0.9, min_samples=10, recompute_every=10)
+
+        for i in range(9):
+            window.record(i / 1000)
+        assert window.value is None
+
+        window.record(0.009)
+        assert window.value == 0.009
+
+        with pytest.raises(ValueError):
+            LatencyWindow(quantile=1)
+
+    def test_hedge_delay(self):
+        """Test hedging waits for warm-up and never goes below min_hedge_delay"""
+        assert RetryPolicy(hedge=False).hedge_delay() is None
+
+        policy = RetryPolicy(hedge=True, min_hedge_delay=0.005)
+        assert policy.hedge_delay() is None
+
+        for _ in range(100):
+            policy.latencies.record(0.001)
+        assert policy.hedge_delay() == 0.005
+
+        with pytest.raises(ValueError):
+            RetryPolicy(max_retries=-1)
+
+
+class TestPassiveHealth:
+    """Test cases for passive ejection in HealthChecker"""
+
+    def test_failure_statuses(self):
+        """Test only gateway errors count against a backend"""
+        assert FAILURE_STATUSES == {502, 503, 504}
+        assert 500 not in FAILURE_STATUSES and 501 not in FAILURE_STATUSES
+
+    def test_consecutive_failures_eject(self):
+        """Test a run of failed requests ejects the backend and notifies subscribers"""
+        checker = HealthChecker(BACKENDS, outlier_errors=3)
+        changes = []
+        checker.subscribe(changes.append)
+
+        for _ in range(2):
+            checker.record_request(BACKENDS[0], 0.01, failed=True)
+        checker.record_request(BACKENDS[0], 0.01)
+        for _ in range(2):
+            checker.record_request(BACKENDS[0], 0.01, failed=True)
+        # The success in between reset the count
+        assert checker.is_healthy(BACKENDS[0])
+
+        checker.record_request(BACKENDS[0], 0.01, failed=True)
+        assert not checker.is_healthy(BACKENDS[0])
+        assert changes[-1] == [BACKENDS[1]]
+
+    def test_slow_requests_count_as_failures(self):
+        """Test requests over slow_request_threshold count as failures"""
+        checker = HealthChecker(BACKENDS, outlier_errors=2, slow_request_threshold=0.5)
+
+        checker.record_request(BACKENDS[1], 1.0)
+        checker.record_request(BACKENDS[1], 1.0)
+        assert checker.healthy_backends() == [BACKENDS[0]]
+
+    def test_probes_readmit(self):
+        """Test healthy_threshold good probes re-admit an ejected backend"""
+        checker = HealthChecker(BACKENDS, unhealthy_threshold=1, healthy_threshold=2)
+
+        checker.record_probe(BACKENDS[0], False, "refused")
+        assert not checker.is_healthy(BACKENDS[0])
+
+        checker.record_probe(BACKENDS[0], True)
+        assert not checker.is_healthy(BACKENDS[0])
+        checker.record_probe(BACKENDS[0], True)
+        assert checker.is_healthy(BACKENDS[0])
+
+
+def retries_and_hedges():
+    snapshot = METRICS.snapshot().values()
+    return sum(entry["retries"] for entry in snapshot), sum(entry["hedges"] for entry in snapshot)
+
+
+class TestRetriesThroughProxy:
+    """Test cases for retries and hedged requests in the proxy path"""
+
+    @pytest.mark.parametrize("mode", ["threaded", "asyncio"])
+    def test_failed_request_retried_elsewhere(self, backends, start_proxy, mode):
+        """Test a 503 from one backend is retried on the other"""
+        conn = http.client.HTTPConnection(*start_proxy(mode, retry_policy=RetryPolicy(max_retries=1)), timeout=5)
+        results = []
+        for _ in range(4):
+            conn.request("GET", "/fail/red")
+            response = conn.getresponse()
+            results.append((response.status, response.read().split()[0]))
+        conn.close()
+
+        assert results == [(200, b"blue")] * 4
+
+    @pytest.mark.parametrize("mode", ["threaded", "asyncio"])
+    def test_budget_limits_retries(self, backends, start_proxy, mode):
+        """Test retries stop once the retry budget is spent"""
+        policy = RetryPolicy(max_retries=1, budget=RetryBudget(ratio=0, min_per_second=0, max_tokens=1))
+        conn = http.client.HTTPConnection(*start_proxy(mode, retry_policy=policy), timeout=5)
+        retried_before, _ = retries_and_hedges()
+        statuses = []
+        for _ in range(4):
+            conn.request("GET", "/fail/red")
+            response = conn.getresponse()
+            response.read()
+            statuses.append(response.status)
+        conn.close()
+
+        assert retries_and_hedges()[0] - retried_before == 1
+        assert 503 in statuses
+
+    @pytest.mark.parametrize("mode", ["threaded", "asyncio"])
+    def test_slow_request_hedged(self, backends, start_proxy, mode):
+        """Test a request slower than the hedge delay is answered by a second backend"""
+        policy = RetryPolicy(hedge=True, min_hedge_delay=0.05)
+        for _ in range(100):
+            policy.latencies.record(0.001)
+        conn = http.client.HTTPConnection(*start_proxy(mode, retry_policy=policy), timeout=5)
+        _, hedged_before = retries_and_hedges()
+
+        started = time.monotonic()
+        conn.request("GET", "/slow/red")
+        body = conn.getresponse().read()
+        elapsed = time.monotonic() - started
+        conn.close()
+
+        assert body.split()[0] == b"blue"
+        assert elapsed < 0.9
+        assert retries_and_hedges()[1] - hedged_before == 1
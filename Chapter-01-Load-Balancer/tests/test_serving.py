@@ -0,0 +1,60 @@
+import http.client
+import pytest
+import threading
+
+
+def send(address, method="GET", path="/", body=None, headers=None, conn=None):
+    """Send one request through the proxy and return (status, body)."""
+    conn = conn or http.client.HTTPConnection(*address, timeout=5)
+    conn.request(method, path, body=body, headers=headers or {})
+    response = conn.getresponse()
+    return response.status, response.read()
+
+
+class TestServingModes:
+    """Test cases for the single, threaded and asyncio front ends"""
+
+    @pytest.mark.parametrize("mode", ["single", "threaded", "asyncio"])
+    def test_round_robin_through_proxy(self, start_proxy, mode):
+        """Test requests are proxied and alternate between the backends"""
+        address = start_proxy(mode)
+        bodies = [send(address, path="/article")[1] for _ in range(4)]
+
+        assert bodies == [b"red GET /article", b"blue GET /article"] * 2
+
+    @pytest.mark.parametrize("mode", ["threaded", "asyncio"])
+    def test_client_keep_alive(self, start_proxy, mode):
+        """Test several requests share one client connection"""
+        conn = http.client.HTTPConnection(*start_proxy(mode), timeout=5)
+        results = [send(None, path=f"/{i}", conn=conn) for i in range(3)]
+        conn.close()
+
+        assert [status for status, _ in results] == [200] * 3
+        assert results[2][1].endswith(b"/2")
+
+    @pytest.mark.parametrize("mode", ["threaded", "asyncio"])
+    def test_concurrent_clients(self, start_proxy, mode):
+        """Test concurrent clients are all answered"""
+        address = start_proxy(mode)
+        results = []
+
+        def client():
+            for _ in range(5):
+                results.append(send(address)[0])
+
+        threads = [threading.Thread(target=client) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert results == [200] * 40
+
+    def test_single_mode_closes_connections(self, start_proxy):
+        """Test the single-connection server doesn't park on keep-alive clients"""
+        conn = http.client.HTTPConnection(*start_proxy("single"), timeout=5)
+        conn.request("GET", "/")
+        response = conn.getresponse()
+        response.read()
+
+        assert response.getheader("Connection") == "close"
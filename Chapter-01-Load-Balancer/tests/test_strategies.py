@@ -0,0 +1,158 @@
+import pytest
+import random
+from collections import Counter
+from strategies import (
+    ConsistentHashStrategy,
+    LeastOutstandingStrategy,
+    PeakEWMAStrategy,
+    PowerOfTwoChoicesStrategy,
+    RoundRobinStrategy,
+    WeightedRoundRobinStrategy,
+    STRATEGIES,
+    create_strategy,
+)
+
+
+BACKENDS = [("localhost", 8001), ("localhost", 8002), ("localhost", 8003)]
+A, B, C = BACKENDS
+
+
+class TestStrategies:
+    """Test cases for the load-balancing strategies"""
+
+    def test_create_strategy(self):
+        """Test building every strategy by name and rejecting unknown ones"""
+        for name in STRATEGIES:
+            assert create_strategy(name, BACKENDS).name == name
+
+        with pytest.raises(ValueError):
+            create_strategy("random", BACKENDS)
+
+        with pytest.raises(ValueError):
+            RoundRobinStrategy([])
+
+    def test_round_robin_order(self):
+        """Test round-robin cycles through backends in order"""
+        strategy = RoundRobinStrategy(BACKENDS)
+
+        assert [strategy.pick() for _ in range(6)] == BACKENDS * 2
+
+    def test_set_active_restricts_picks(self):
+        """Test ejected backends are skipped and an empty set re-enables all"""
+        strategy = RoundRobinStrategy(BACKENDS)
+
+        strategy.set_active([A, C])
+        assert {strategy.pick() for _ in range(6)} == {A, C}
+
+        strategy.set_active([])
+        assert {strategy.pick() for _ in range(6)} == set(BACKENDS)
+
+    def test_pick_excluding(self):
+        """Test retries go to a backend not tried yet, or None when all were"""
+        for name in STRATEGIES:
+            strategy = create_strategy(name, BACKENDS)
+            for _ in range(10):
+                assert strategy.pick_excluding({A, B}) == C
+            assert strategy.pick_excluding(set(BACKENDS)) is None
+
+    def test_weighted_round_robin_is_smooth(self):
+        """Test weights set each backend's share, interleaved rather than in bursts"""
+        strategy = WeightedRoundRobinStrategy(BACKENDS, weights=[5, 1, 1])
+
+        picks = [strategy.pick() for _ in range(7)]
+        assert Counter(picks) == {A: 5, B: 1, C: 1}
+        # The heavy backend is never picked more than three times in a row
+        assert all(picks[i:i + 4] != [A] * 4 for i in range(4))
+
+    def test_weighted_round_robin_invalid_weights(self):
+        """Test weights must be positive integers, one per backend"""
+        with pytest.raises(ValueError):
+            WeightedRoundRobinStrategy(BACKENDS, weights=[1, 2])
+
+        with pytest.raises(ValueError):
+            WeightedRoundRobinStrategy(BACKENDS, weights=[1, 0, 1])
+
+        with pytest.raises(ValueError):
+            WeightedRoundRobinStrategy(BACKENDS, weights=[1, 1.5, 1])
+
+    def test_least_outstanding(self):
+        """Test requests go to the backend with the fewest in flight"""
+        strategy = LeastOutstandingStrategy(BACKENDS)
+
+        assert {strategy.pick() for _ in range(3)} == set(BACKENDS)
+        strategy.complete(B, 0.01)
+        assert strategy.pick() == B
+
+        # Completing more than was picked doesn't go below zero
+        for _ in range(5):
+            strategy.complete(C, 0.01)
+        assert strategy.outstanding[C] == 0
+
+    def test_least_outstanding_ignores_inactive(self):
+        """Test an ejected backend isn't picked even when it is least loaded"""
+        strategy = LeastOutstandingStrategy(BACKENDS)
+        strategy.set_active([A, B])
+
+        assert {strategy.pick() for _ in range(4)} == {A, B}
+        assert strategy.outstanding[C] == 0
+
+    def test_power_of_two_choices_prefers_less_loaded(self):
+        """Test p2c never picks the more loaded of two sampled backends"""
+        strategy = PowerOfTwoChoicesStrategy(BACKENDS[:2], rng=random.Random(1))
+        for _ in range(3):
+            strategy.outstanding[A] += 1
+
+        assert [strategy.pick() for _ in range(3)] == [B, B, B]
+
+    def test_peak_ewma_avoids_slow_backend(self):
+        """Test a slow response makes peak EWMA steer traffic away at once"""
+        strategy = PeakEWMAStrategy(BACKENDS[:2], rng=random.Random(1))
+
+        strategy.complete(A, 0.5)
+        assert [strategy.pick() for _ in range(3)] == [B, B, B]
+
+    def test_peak_ewma_penalizes_failures(self):
+        """Test a fast failure counts as a slow response"""
+        strategy = PeakEWMAStrategy(BACKENDS[:2])
+
+        strategy.complete(A, 0.001, failed=True)
+        assert strategy.ewma[A] == PeakEWMAStrategy.FAILURE_PENALTY
+
+        with pytest.raises(ValueError):
+            PeakEWMAStrategy(BACKENDS, decay_time=0)
+
+    def test_consistent_hash_is_sticky(self):
+        """Test a key always maps to the same backend"""
+        strategy = ConsistentHashStrategy(BACKENDS)
+
+        for i in range(50):
+            key = strategy.request_key(f"/articles/{i}?page=2", {})
+            assert key == f"/articles/{i}"
+            assert len({strategy.pick(key) for _ in range(5)}) == 1
+
+    def test_consistent_hash_key_sources(self):
+        """Test keys taken from a header or a query parameter"""
+        by_header = ConsistentHashStrategy(BACKENDS, key="header:X-User")
+        assert by_header.request_key("/", {"X-User": "alice"}) == "alice"
+        assert by_header.request_key("/", {}) == ""
+
+        by_query = ConsistentHashStrategy(BACKENDS, key="query:id")
+        assert by_query.request_key("/a?id=7&x=1", {}) == "7"
+
+        with pytest.raises(ValueError):
+            ConsistentHashStrategy(BACKENDS, key="header")
+
+        with pytest.raises(ValueError):
+            ConsistentHashStrategy(BACKENDS, key="cookie:session")
+
+    def test_consistent_hash_bounded_load(self):
+        """Test a hot key spills over once its owner exceeds the load factor"""
+        strategy = ConsistentHashStrategy(BACKENDS, load_factor=1.25)
+
+        picks = Counter(strategy.pick("hot") for _ in range(30))
+        # Ceiling of 1.25 x the average of 10 in flight
+        assert max(picks.values()) <= 13
+        assert len(picks) == 3
+
+        with pytest.raises(ValueError):
+            ConsistentHashStrategy(BACKENDS, load_factor=0.5)
@@ -0,0 +1,155 @@
+import asyncio
+import http.client
+import io
+import pytest
+from async_proxy import AsyncLoadBalancer
+from stream_relay import BufferPool, end_to_end_headers, relay_body, relay_request_body
+
+
+class RecordingSocket:
+    """Collects what would have been sent, like a socket with sendall/sendmsg."""
+
+    def __init__(self):
+        self.data = bytearray()
+
+    def sendall(self, data):
+        self.data += data
+
+    def sendmsg(self, parts):
+        for part in parts:
+            self.data += part
+        return sum(len(part) for part in parts)
+
+
+class RecordingWriter:
+    """Collects what an asyncio StreamWriter would have sent."""
+
+    def __init__(self):
+        self.data = bytearray()
+
+    def write(self, data):
+        self.data += data
+
+    async def drain(self):
+        pass
+
+
+class TestStreamRelay:
+    """Test cases for the response relay and its buffer pool"""
+
+    def test_end_to_end_headers(self):
+        """Test hop-by-hop headers and those listed in Connection are dropped"""
+        headers = [("Content-Type", "text/html"), ("Connection", "close, X-Private"),
+                   ("Transfer-Encoding", "chunked"), ("x-private", "1"), ("Keep-Alive", "timeout=5")]
+
+        assert end_to_end_headers(headers) == [("Content-Type", "text/html")]
+
+    def test_buffer_pool_reuses_buffers(self):
+        """Test released buffers are handed out again, up to max_buffers kept"""
+        pool = BufferPool(buffer_size=16, max_buffers=1)
+        first, second = pool.acquire(), pool.acquire()
+        pool.release(first)
+        pool.release(second)
+
+        assert pool.acquire() is first
+        assert pool.acquire() is not second
+        with pytest.raises(ValueError):
+            BufferPool(buffer_size=0)
+
+    def test_relay_body_in_fixed_chunks(self):
+        """Test a body larger than the buffer is copied whole, through one pooled buffer"""
+        pool = BufferPool(buffer_size=1000)
+        body = bytes(range(256)) * 20
+        sock = RecordingSocket()
+
+        assert relay_body(io.BytesIO(body), sock, pool=pool) == len(body)
+        assert bytes(sock.data) == body
+        assert len(pool._free) == 1
+
+    def test_relay_body_rechunked(self):
+        """Test chunked=True frames the body as chunks ending with a zero-size one"""
+        sock = RecordingSocket()
+        relay_body(io.BytesIO(b"x" * 25), sock, chunked=True, pool=BufferPool(buffer_size=10))
+
+        assert bytes(sock.data) == b"a\r\n" + b"x" * 10 + b"\r\na\r\n" + b"x" * 10 + b"\r\n5\r\nxxxxx\r\n0\r\n\r\n"
+
+    @pytest.mark.parametrize("mode", ["threaded", "asyncio"])
+    def test_chunked_response_streamed(self, start_proxy, mode):
+        """Test a chunked backend response reaches the client intact and chunked"""
+        conn = http.client.HTTPConnection(*start_proxy(mode), timeout=5)
+        conn.request("GET", "/chunked/200")
+        response = conn.getresponse()
+        body = response.read()
+
+        assert response.getheader("Transfer-Encoding") == "chunked"
+        assert body == b"".join(bytes([48 + i % 10]) * 1000 for i in range(200))
+
+
+class TestRequestBodyRelay:
+    """Test cases for streaming request bodies to the backend"""
+
+    def test_exact_length(self):
+        """Test exactly Content-Length bytes are copied, leaving the next request unread"""
+        rfile = io.BytesIO(b"x" * 25 + b"GET / HTTP/1.1")
+        sock = RecordingSocket()
+        relay_request_body(rfile, sock, length=25, pool=BufferPool(buffer_size=10))
+
+        assert bytes(sock.data) == b"x" * 25
+        assert rfile.read() == b"GET / HTTP/1.1"
+
+    def test_chunked_reframed(self):
+        """Test a chunked body is decoded, re-framed chunk by chunk and its trailers dropped"""
+        rfile = io.BytesIO(b"5;ext=1\r\nhello\r\n6\r\n world\r\n0\r\nX-Trailer: 1\r\n\r\nnext")
+        sock = RecordingSocket()
+        relay_request_body(rfile, sock, chunked=True)
+
+        assert bytes(sock.data) == b"5\r\nhello\r\n6\r\n world\r\n0\r\n\r\n"
+        assert rfile.read() == b"next"
+
+    @pytest.mark.parametrize("body, error", [
+        (b"5\r\nhelloXX0\r\n\r\n", ValueError),
+        (b"zz\r\n", ValueError),
+        (b"a" * 2000, ValueError),
+        (b"5\r\nhel", ConnectionError),
+    ])
+    def test_malformed_chunked(self, body, error):
+        """Test broken chunk framing raises ValueError and a truncated body ConnectionError"""
+        with pytest.raises(error):
+            relay_request_body(io.BytesIO(body), RecordingSocket(), chunked=True)
+
+    def test_truncated_length(self):
+        """Test a client disconnecting mid-body raises ConnectionError"""
+        with pytest.raises(ConnectionError):
+            relay_request_body(io.BytesIO(b"abc"), RecordingSocket(), length=10)
+
+    @pytest.mark.parametrize("passthrough", [True, False])
+    def test_async_relay_chunked(self, passthrough):
+        """Test the asyncio engine relays chunked bodies verbatim, or decoded when not passing through"""
+        raw = b"5\r\nhello\r\n6\r\n world\r\n0\r\nX-Trailer: 1\r\n\r\n"
+
+        async def run():
+            reader = asyncio.StreamReader()
+            reader.feed_data(raw + b"next")
+            writer = RecordingWriter()
+            await AsyncLoadBalancer._relay_chunked(reader, writer, passthrough)
+            return bytes(writer.data), await reader.read(4)
+
+        relayed, rest = asyncio.run(run())
+        assert relayed == (raw if passthrough else b"hello world")
+        assert rest == b"next"
+
+    @pytest.mark.parametrize("mode", ["threaded", "asyncio"])
+    @pytest.mark.parametrize("method", ["POST", "PUT", "PATCH", "DELETE"])
+    def test_bodies_proxied(self, start_proxy, mode, method):
+        """Test every method's body reaches the backend, with a length or chunked"""
+        conn = http.client.HTTPConnection(*start_proxy(mode), timeout=5)
+        body = b"payload " * 20000
+
+        conn.request(method, "/items", body=body)
+        first = conn.getresponse().read()
+        conn.request(method, "/items", body=iter([body[:1000], body[1000:]]), encode_chunked=True)
+        second = conn.getresponse().read()
+        conn.close()
+
+        assert first.split(b" ", 2)[1:] == [method.encode(), body]
+        assert second.split(b" ", 2)[1:] == [method.encode(), body]
@@ -0,0 +1,68 @@
+"""
+Throughput of the sharded cache core as threads are added, for several segment counts
+"""
+
+import argparse
+import random
+import sys
+import threading
+import time
+from typing import List
+
+from eviction import BoundedCache
+from sharded import ShardedCache
+
+
+def zipf_keys(count: int, key_space: int, skew: float, seed: int) -> List[str]:
+    rng = random.Random(seed)
+    weights = [1 / (rank ** skew) for rank in range(1, key_space + 1)]
+    return [f"https://example.com/article/{rank}" for rank in rng.choices(range(key_space), weights, k=count)]
+
+
+def run(segments: int, threads: int, args) -> float:
+    """Operations per second with `threads` threads hitting one cache."""
+    per_segment = -(-args.max_entries // segments)
+    cache = ShardedCache(lambda: BoundedCache(max_entries=per_segment, policy=args.policy), segments)
+    # Warm up so reads mostly hit
+    cache.put_many({key: "x" * 100 for key in zipf_keys(args.max_entries, args.key_space, args.skew, seed=0)})
+    keys = [zipf_keys(args.ops, args.key_space, args.skew, seed=i + 1) for i in range(threads)]
+    start = threading.Barrier(threads + 1)
+
+    def worker(my_keys):
+        rng = random.Random()
+        start.wait()
+        for key in my_keys:
+            if rng.random() < args.write_ratio:
+                cache.put(key, "x" * 100)
+            elif cache.get(key) is None:
+                cache.put(key, "x" * 100)
+
+    workers = [threading.Thread(target=worker, args=(k,)) for k in keys]
+    for thread in workers:
+        thread.start()
+    start.wait()
+    began = time.perf_counter()
+    for thread in workers:
+        thread.join()
+    return threads * args.ops / (time.perf_counter() - began)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark sharded cache throughput by thread count")
+    parser.add_argument("--threads", type=int, nargs="+", default=[1, 2, 4, 8, 16])
+    parser.add_argument("--segments", type=int, nargs="+", default=[1, 16, 64],
+                        help="Segment counts to compare; 1 is a single global lock")
+    parser.add_argument("--ops", type=int, default=100_000, help="Operations per thread")
+    parser.add_argument("--write-ratio", type=float, default=0.1)
+    parser.add_argument("--max-entries", type=int, default=10_000)
+    parser.add_argument("--key-space", type=int, default=100_000)
+    parser.add_argument("--skew", type=float, default=0.9, help="Zipf exponent of key popularity")
+    parser.add_argument("--policy", default="lru")
+    args = parser.parse_args()
+
+    gil = getattr(sys, "_is_gil_enabled", lambda: True)()
+    print(f"Python {sys.version.split()[0]}, GIL {'enabled' if gil else 'disabled'}, policy {args.policy}")
+    print(f"{'threads':>8}" + "".join(f"{f'{n} segment(s)':>16}" for n in args.segments))
+    for threads in args.threads:
+        row = [run(segments, threads, args) for segments in args.segments]
+        print(f"{threads:>8}" + "".join(f"{ops / 1000:>13.0f}k/s" for ops in row))
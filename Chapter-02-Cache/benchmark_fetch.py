@@ -0,0 +1,119 @@
+"""
+Compare blocking and async origin fetching against a local stand-in origin
+"""
+
+import argparse
+import asyncio
+import multiprocessing
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List
+
+from origin_client import AsyncOriginClient
+
+
+def run_origin(port: int, delay: float, size: int) -> None:
+    """Serve a fixed-size article at every path after `delay` seconds."""
+    body = (b"lorem ipsum " * (size // 12 + 1))[:size]
+
+    class OriginHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self):
+            time.sleep(delay)
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    ThreadingHTTPServer.request_queue_size = 1024
+    ThreadingHTTPServer.daemon_threads = True
+    ThreadingHTTPServer(("localhost", port), OriginHandler).serve_forever()
+
+
+def summarize(latencies: List[float], elapsed: float) -> Dict[str, float]:
+    latencies.sort()
+    pick = lambda q: latencies[min(len(latencies) - 1, int(q * len(latencies)))] * 1000
+    return {
+        "fetches": len(latencies),
+        "seconds": round(elapsed, 2),
+        "fetches_per_second": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(pick(0.5), 1),
+        "p99_ms": round(pick(0.99), 1),
+    }
+
+
+def bench_blocking(urls: List[str], threads: int) -> Dict[str, float]:
+    """
+    The old fetch path: one blocking call per miss on a worker thread and a
+    new connection each time, as requests.get() without a Session does.
+    threads defaults to 40, the size of the thread pool FastAPI runs sync
+    routes on.
+    """
+    def fetch(url):
+        with urllib.request.urlopen(url, timeout=30) as response:
+            response.read()
+        return time.perf_counter() - started
+
+    # Every miss arrives at once, so latency is measured from the start and
+    # includes waiting for a free thread
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        latencies = list(pool.map(fetch, urls))
+    result = summarize(latencies, time.perf_counter() - started)
+    result["connections_opened"] = len(urls)
+    return result
+
+
+async def bench_async(urls: List[str], max_concurrency: int) -> Dict[str, float]:
+    """The new fetch path: every miss is a coroutine sharing one pooled client."""
+    client = AsyncOriginClient(max_concurrency_per_origin=max_concurrency, max_idle_per_origin=max_concurrency)
+
+    async def fetch(url):
+        await client.get(url)
+        return time.perf_counter() - started
+
+    started = time.perf_counter()
+    latencies = await asyncio.gather(*(fetch(url) for url in urls))
+    elapsed = time.perf_counter() - started
+    stats = client.stats()
+    await client.close()
+    result = summarize(list(latencies), elapsed)
+    result["connections_opened"] = stats["connections_opened"]
+    return result
+
+
+def print_result(name: str, result: Dict[str, float]) -> None:
+    print(f"{name:<10} {result['fetches_per_second']:>10.1f} fetches/s   "
+          f"p50 {result['p50_ms']:>8.1f}ms   p99 {result['p99_ms']:>8.1f}ms   "
+          f"connections {result['connections_opened']}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark blocking vs async origin fetches")
+    parser.add_argument("--fetches", type=int, default=2000, help="Number of distinct URLs to fetch (all misses)")
+    parser.add_argument("--origin-port", type=int, default=8090)
+    parser.add_argument("--origin-delay", type=float, default=0.05, help="Seconds the origin takes per request")
+    parser.add_argument("--size", type=int, default=10_000, help="Article size in bytes")
+    parser.add_argument("--threads", type=int, default=40, help="Worker threads for the blocking path")
+    parser.add_argument("--max-concurrency", type=int, default=200, help="Per-origin concurrency for the async path")
+    args = parser.parse_args()
+
+    origin = multiprocessing.Process(
+        target=run_origin, args=(args.origin_port, args.origin_delay, args.size), daemon=True)
+    origin.start()
+    time.sleep(0.5)
+
+    urls = [f"http://localhost:{args.origin_port}/article/{i}" for i in range(args.fetches)]
+    try:
+        print(f"{args.fetches} misses, origin delay {args.origin_delay * 1000:.0f}ms, {args.size} byte articles")
+        print_result("blocking", bench_blocking(urls, args.threads))
+        print_result("async", asyncio.run(bench_async(urls, args.max_concurrency)))
+    finally:
+        origin.terminate()
@@ -1,37 +1,415 @@
-import requests
-from fastapi import FastAPI, HTTPException
-from pydantic import BaseModel
-from typing import Dict
+import asyncio
+import json
+import os
+import threading
+import time
+from contextlib import asynccontextmanager
 
+from fastapi import FastAPI, Header, HTTPException, Request, Response
+from pydantic import BaseModel, ValidationError
+from typing import Dict, List, Optional, Set
 
-app = FastAPI(title="Custom Article Cache Service")
+from compression import accepts_gzip
+from disk_tier import DiskTier
+from eviction import BoundedCache
+from freshness import CachedArticle, article_weigher, freshness_lifetime, wall_clock
+from origin_client import AsyncOriginClient, FetchError, FetchTimeout, OriginResponse
+from sharded import ShardedCache
+from single_flight import AsyncSingleFlight
+from snapshot import Snapshotter, read_snapshot
 
 
-cache: Dict[str, str] = {}
+# Cache limits: entry count and/or total bytes, and the eviction policy
+# (lru, lfu or tinylfu). Overridable through the environment.
+CACHE_MAX_ENTRIES: Optional[int] = int(os.environ.get("CACHE_MAX_ENTRIES", "10000")) or None
+CACHE_MAX_BYTES: Optional[int] = int(os.environ.get("CACHE_MAX_BYTES", "0")) or None
+CACHE_POLICY = os.environ.get("CACHE_POLICY", "tinylfu")
+# Independently locked segments; each holds 1/CACHE_SEGMENTS of the limits
+CACHE_SEGMENTS = int(os.environ.get("CACHE_SEGMENTS", "16"))
 
-def fetch_article_from_server(url: str) -> str:
+# Freshness in seconds for articles whose origin sends no Cache-Control or
+# Expires (and for PUT without a ttl), and how long after that stale content
+# may still be served while it is refreshed in the background
+CACHE_DEFAULT_TTL = float(os.environ.get("CACHE_DEFAULT_TTL", "300"))
+CACHE_STALE_WHILE_REVALIDATE = float(os.environ.get("CACHE_STALE_WHILE_REVALIDATE", "60"))
+
+# Articles whose response body is at least this many bytes are stored
+# gzip-compressed (0 turns compression off), at this zlib level
+CACHE_COMPRESS_MIN_BYTES: Optional[int] = int(os.environ.get("CACHE_COMPRESS_MIN_BYTES", "1024")) or None
+CACHE_COMPRESS_LEVEL = int(os.environ.get("CACHE_COMPRESS_LEVEL", "6"))
+
+# Second tier on disk (off unless CACHE_L2_DIR is set): articles evicted
+# from memory are demoted there, and it survives restarts
+CACHE_L2_DIR = os.environ.get("CACHE_L2_DIR")
+CACHE_L2_MAX_BYTES = int(os.environ.get("CACHE_L2_MAX_BYTES", str(1 << 30)))
+
+# Periodic snapshot of the in-memory articles (off unless
+# CACHE_SNAPSHOT_PATH is set), restored in batches of CACHE_RESTORE_BATCH
+# in the background on startup
+CACHE_SNAPSHOT_PATH = os.environ.get("CACHE_SNAPSHOT_PATH")
+CACHE_SNAPSHOT_INTERVAL = float(os.environ.get("CACHE_SNAPSHOT_INTERVAL", "60"))
+CACHE_RESTORE_BATCH = int(os.environ.get("CACHE_RESTORE_BATCH", "500"))
+
+# Most URLs one /mget/ or /mput/ request may carry, how many NDJSON
+# records /bulk/ validates before inserting them together, and the longest
+# NDJSON line it accepts
+CACHE_BATCH_MAX_URLS = int(os.environ.get("CACHE_BATCH_MAX_URLS", "1000"))
+CACHE_BULK_BATCH = int(os.environ.get("CACHE_BULK_BATCH", "500"))
+CACHE_BULK_MAX_LINE_BYTES = int(os.environ.get("CACHE_BULK_MAX_LINE_BYTES", str(16 << 20)))
+
+# Origin fetches: timeouts in seconds and how many requests may be in
+# flight to a single origin at once
+ORIGIN_CONNECT_TIMEOUT = float(os.environ.get("ORIGIN_CONNECT_TIMEOUT", "5"))
+ORIGIN_READ_TIMEOUT = float(os.environ.get("ORIGIN_READ_TIMEOUT", "30"))
+ORIGIN_MAX_CONCURRENCY = int(os.environ.get("ORIGIN_MAX_CONCURRENCY", "100"))
+# Most origins kept with a connection pool at once
+ORIGIN_MAX_POOLS = int(os.environ.get("ORIGIN_MAX_POOLS", "1000"))
+# Largest origin response body accepted, before and after decoding
+ORIGIN_MAX_BODY_BYTES = int(os.environ.get("ORIGIN_MAX_BODY_BYTES", str(64 * 1024 * 1024)))
+
+def per_segment(limit: Optional[int]) -> Optional[int]:
+    return -(-limit // CACHE_SEGMENTS) if limit else None
+
+l2 = DiskTier(os.path.join(CACHE_L2_DIR, "articles.log"), max_bytes=CACHE_L2_MAX_BYTES) if CACHE_L2_DIR else None
+
+def demote(url: str, article: CachedArticle) -> None:
+    """Move an article out of memory into L2, until its stale window ends."""
+    if article.stale_until > time.monotonic():
+        l2.put(url, article.to_bytes(), expires_at=wall_clock(article.stale_until))
+
+cache = ShardedCache(
+    lambda: BoundedCache(
+        max_entries=per_segment(CACHE_MAX_ENTRIES),
+        max_bytes=per_segment(CACHE_MAX_BYTES),
+        policy=CACHE_POLICY,
+        weigher=article_weigher,
+        on_evict=demote if l2 is not None else None,
+    ),
+    segments=CACHE_SEGMENTS,
+)
+
+def snapshot_entries():
+    now = time.monotonic()
+    return ((url, article.to_bytes()) for url, article in cache.items() if article.stale_until > now)
+
+snapshotter = (
+    Snapshotter(snapshot_entries, CACHE_SNAPSHOT_PATH, CACHE_SNAPSHOT_INTERVAL) if CACHE_SNAPSHOT_PATH else None
+)
+restore_stats = {"restored": 0, "expired": 0, "invalid": 0, "error": None, "done": False}
+
+def restore_snapshot() -> None:
+    """Load the last snapshot into memory batch by batch while requests are already served."""
+    try:
+        for batch in read_snapshot(CACHE_SNAPSHOT_PATH, CACHE_RESTORE_BATCH):
+            now = time.monotonic()
+            articles = {}
+            for url, data in batch:
+                try:
+                    article = CachedArticle.from_bytes(data)
+                except Exception:
+                    # Written by an incompatible version; skip it rather than the whole snapshot
+                    restore_stats["invalid"] += 1
+                    continue
+                if article.stale_until > now:
+                    articles[url] = article
+                else:
+                    restore_stats["expired"] += 1
+            # Anything fetched since startup is newer than the snapshot
+            cache.put_many(articles, replace=False)
+            restore_stats["restored"] += len(articles)
+    except Exception as e:
+        restore_stats["error"] = repr(e)
+        print(f"Restoring snapshot {CACHE_SNAPSHOT_PATH} failed: {e!r}")
+    finally:
+        restore_stats["done"] = True
+        # Snapshots only start once restored, or they would drop what is still unread
+        snapshotter.start()
+
+def promote(url: str) -> Optional[CachedArticle]:
+    """Move an article from L2 back into memory."""
+    if l2 is None:
+        return None
+    data = l2.get(url)
+    if data is None:
+        return None
+    # Each article lives in one tier: it goes back to L2 when evicted again
+    l2.delete(url)
+    try:
+        article = CachedArticle.from_bytes(data)
+    except ValueError:
+        # Written in an older layout: treat as a miss
+        return None
+    cache.put(url, article)
+    return article
+
+def promote_many(urls: List[str]) -> Dict[str, CachedArticle]:
+    """The articles among urls found in L2, moved back into memory."""
+    promoted = {}
+    for url in urls:
+        article = promote(url)
+        if article is not None:
+            promoted[url] = article
+    return promoted
+
+async def lookup(url: str) -> Optional[CachedArticle]:
+    """The article from memory, or promoted back into memory from L2."""
+    article = cache.get(url)
+    if article is None and l2 is not None:
+        # L2 reads are disk I/O: keep them off the event loop
+        article = await asyncio.to_thread(promote, url)
+    return article
+
+def demote_all() -> None:
+    """Move every in-memory article to L2 and close it, on shutdown."""
+    for url, article in cache.items():
+        demote(url, article)
+    l2.close()
+
+# One pooled client shared by all requests, closed when the app shuts down
+origin_client = AsyncOriginClient(
+    max_concurrency_per_origin=ORIGIN_MAX_CONCURRENCY,
+    connect_timeout=ORIGIN_CONNECT_TIMEOUT,
+    read_timeout=ORIGIN_READ_TIMEOUT,
+    max_origins=ORIGIN_MAX_POOLS,
+    max_body_bytes=ORIGIN_MAX_BODY_BYTES,
+)
+
+# Concurrent misses for the same URL share one origin fetch
+origin_fetches = AsyncSingleFlight()
+
+# Refreshes of stale articles running behind already-answered requests
+background_refreshes: Set[asyncio.Task] = set()
+freshness_stats = {"stale_served": 0, "revalidated": 0, "refresh_failures": 0}
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if snapshotter is not None:
+        threading.Thread(target=restore_snapshot, name="cache-restore", daemon=True).start()
+    yield
+    for task in list(background_refreshes):
+        task.cancel()
+    await origin_client.close()
+    if snapshotter is not None:
+        # A snapshot taken before the restore finished would lose the rest
+        snapshotter.stop(final_snapshot=restore_stats["done"])
+    if l2 is not None:
+        # Keep the in-memory articles for the next start
+        await asyncio.to_thread(demote_all)
+
+app = FastAPI(title="Custom Article Cache Service", lifespan=lifespan)
+
+async def fetch_article_from_server(url: str, headers: Optional[Dict[str, str]] = None) -> OriginResponse:
     print("Fetching article from server...")
     try:
-        response = requests.get(url)
-        response.raise_for_status()
-        return response.text
-    except requests.RequestException as e:
+        return await origin_client.get(url, headers)
+    except FetchTimeout as e:
+        raise HTTPException(status_code=504, detail=str(e))
+    except FetchError as e:
         raise HTTPException(status_code=400, detail=str(e))
 
+def make_article(url: str, content: str, ttl: float, stale: float, **validators) -> CachedArticle:
+    return CachedArticle(url, content, ttl, stale, **validators,
+                         compress_min_bytes=CACHE_COMPRESS_MIN_BYTES, compress_level=CACHE_COMPRESS_LEVEL)
+
+async def load_article(url: str, previous: Optional[CachedArticle] = None) -> CachedArticle:
+    """Fetch url - or revalidate the previous copy with a conditional request - and cache it."""
+    response = await fetch_article_from_server(url, previous.validators() if previous else None)
+    lifetime = freshness_lifetime(response, CACHE_DEFAULT_TTL, CACHE_STALE_WHILE_REVALIDATE)
+    ttl, stale = lifetime or (0.0, 0.0)
+    if response.status == 304 and previous is not None:
+        # Not modified: keep the stored body, take the new freshness
+        freshness_stats["revalidated"] += 1
+        article = previous
+        article.renew(ttl, stale, etag=response.header("ETag") or previous.etag,
+                      last_modified=response.header("Last-Modified") or previous.last_modified)
+    else:
+        article = make_article(url, response.text, ttl, stale, etag=response.header("ETag"),
+                               last_modified=response.header("Last-Modified"))
+
+    if lifetime is None:
+        cache.delete(url)
+    elif l2 is not None:
+        # The insert may demote evicted articles to L2, which writes to disk
+        await asyncio.to_thread(cache.put, url, article)
+    else:
+        cache.put(url, article)
+    return article
+
+def article_response(article: CachedArticle, accept_encoding: Optional[str]) -> Response:
+    """The stored body as is: gzipped to clients that accept it, decompressed for the rest."""
+    headers = {"Vary": "Accept-Encoding"}
+    gzipped = article.gzip_body()
+    if gzipped is not None and accepts_gzip(accept_encoding):
+        headers["Content-Encoding"] = "gzip"
+        return Response(gzipped, media_type="application/json", headers=headers)
+    return Response(article.json_body(), media_type="application/json", headers=headers)
+
+async def resolve(url: str, article: Optional[CachedArticle]) -> CachedArticle:
+    """The article to answer with: the cached one while fresh or servable stale, else fetched."""
+    if article is not None:
+        now = time.monotonic()
+        if article.is_fresh(now):
+            return article
+        if article.is_servable_stale(now):
+            # Answer right away and refresh behind the response
+            freshness_stats["stale_served"] += 1
+            refresh_in_background(url, article)
+            return article
+    return await origin_fetches.do(url, lambda: load_article(url, article))
+
+def store_articles(records: List["ArticleInput"]) -> None:
+    """Build (and compress) the articles, then insert them locking each segment once."""
+    articles = {}
+    for record in records:
+        ttl = CACHE_DEFAULT_TTL if record.ttl is None else record.ttl
+        articles[record.url] = make_article(record.url, record.content, ttl, CACHE_STALE_WHILE_REVALIDATE)
+    cache.put_many(articles)
+
+def refresh_in_background(url: str, previous: CachedArticle) -> None:
+    if url in origin_fetches.calls:
+        return
+    task = asyncio.ensure_future(origin_fetches.do(url, lambda: load_article(url, previous)))
+    background_refreshes.add(task)
+    task.add_done_callback(refresh_done)
+
+def refresh_done(task: asyncio.Task) -> None:
+    background_refreshes.discard(task)
+    if not task.cancelled() and task.exception() is not None:
+        # Keep serving the stale copy until its window runs out
+        freshness_stats["refresh_failures"] += 1
+        print(f"Background refresh failed: {task.exception()}")
+
 
 class ArticleInput(BaseModel):
     url: str
     content: str
+    ttl: Optional[float] = None
+
+class BatchGetInput(BaseModel):
+    urls: List[str]
+
+class BatchPutInput(BaseModel):
+    articles: List[ArticleInput]
+
+def check_batch_size(count: int) -> None:
+    if count > CACHE_BATCH_MAX_URLS:
+        raise HTTPException(status_code=413, detail=f"At most {CACHE_BATCH_MAX_URLS} URLs per request")
 
 @app.get("/get/")
-def get_article(url: str):
+async def get_article(url: str, accept_encoding: Optional[str] = Header(None)):
     print("Getting article...")
-    if url not in cache:
-        cache[url] = fetch_article_from_server(url)
-    return {"url": url, "content": cache[url]}
+    article = await resolve(url, await lookup(url))
+    return article_response(article, accept_encoding)
+
+@app.post("/mget/")
+async def get_articles(data: BatchGetInput):
+    """Several articles at once; the misses are fetched concurrently."""
+    urls = list(dict.fromkeys(data.urls))
+    check_batch_size(len(urls))
+    print(f"Getting {len(urls)} articles...")
+    found = cache.get_many(urls)
+    if l2 is not None:
+        # One trip to a worker thread for all L2 reads
+        found.update(await asyncio.to_thread(promote_many, [url for url in urls if url not in found]))
+    results = await asyncio.gather(
+        *(resolve(url, found.get(url)) for url in urls),
+        return_exceptions=True,
+    )
+
+    bodies, errors = [], []
+    for url, result in zip(urls, results):
+        if isinstance(result, HTTPException):
+            errors.append({"url": url, "status": result.status_code, "detail": result.detail})
+        elif isinstance(result, BaseException):
+            raise result
+        else:
+            bodies.append(result.json_body())
+    # The stored bodies are already JSON; splice them in instead of re-encoding
+    body = b'{"articles":[' + b",".join(bodies) + b'],"errors":' + json.dumps(errors).encode("utf-8") + b"}"
+    return Response(body, media_type="application/json")
 
 @app.put("/put/")
 def put_article(data: ArticleInput):
     print("Putting article in cache...")
-    cache[data.url] = data.content
+    ttl = CACHE_DEFAULT_TTL if data.ttl is None else data.ttl
+    cache.put(data.url, make_article(data.url, data.content, ttl, CACHE_STALE_WHILE_REVALIDATE))
     return {"message": "Article cached successfully"}
+
+@app.put("/mput/")
+def put_articles(data: BatchPutInput):
+    check_batch_size(len(data.articles))
+    print(f"Putting {len(data.articles)} articles in cache...")
+    store_articles(data.articles)
+    return {"message": "Articles cached successfully", "count": len(data.articles)}
+
+@app.post("/bulk/")
+async def bulk_load(request: Request):
+    """
+    Stream newline-delimited JSON records ({"url", "content", "ttl"?} per
+    line) into the cache. Records are validated as they arrive and stored
+    every CACHE_BULK_BATCH records, so the body is never held in memory;
+    invalid lines are skipped and reported. A line longer than
+    CACHE_BULK_MAX_LINE_BYTES ends the upload with 413.
+    """
+    inserted = failed = line_number = 0
+    errors: List[Dict] = []
+    batch: List[ArticleInput] = []
+    # The unfinished last line so far
+    pending = bytearray()
+
+    async def flush() -> None:
+        nonlocal inserted, batch
+        if batch:
+            # Compressing thousands of articles would stall the event loop
+            await asyncio.to_thread(store_articles, batch)
+            inserted += len(batch)
+            batch = []
+
+    def parse(line: bytes) -> None:
+        nonlocal failed, line_number
+        line_number += 1
+        if not line.strip():
+            return
+        try:
+            batch.append(ArticleInput.model_validate_json(line))
+        except ValidationError as e:
+            failed += 1
+            if len(errors) < 100:
+                errors.append({"line": line_number, "detail": str(e)})
+
+    async for chunk in request.stream():
+        # Only the new chunk can hold the newline ending the pending line
+        start, search = 0, len(pending)
+        pending += chunk
+        end = pending.find(b"\n", search)
+        while end >= 0:
+            parse(bytes(pending[start:end]))
+            # One chunk can hold many batches' worth of lines
+            if len(batch) >= CACHE_BULK_BATCH:
+                await flush()
+            start = end + 1
+            end = pending.find(b"\n", start)
+        del pending[:start]
+        if len(pending) > CACHE_BULK_MAX_LINE_BYTES:
+            await flush()
+            raise HTTPException(
+                status_code=413,
+                detail=f"Line {line_number + 1} exceeds {CACHE_BULK_MAX_LINE_BYTES} bytes "
+                       f"({inserted} articles inserted before it)",
+            )
+    parse(bytes(pending))
+    await flush()
+    print(f"Bulk loaded {inserted} articles ({failed} invalid)")
+    return {"inserted": inserted, "failed": failed, "errors": errors}
+
+@app.get("/stats/")
+def cache_stats():
+    return {
+        **cache.stats(),
+        "freshness": {**freshness_stats, "refreshing": len(background_refreshes)},
+        "origin_fetches": origin_fetches.stats(),
+        "origin_client": origin_client.stats(),
+        "l2": l2.stats() if l2 is not None else None,
+        "snapshots": {**snapshotter.stats(), "restore": restore_stats} if snapshotter is not None else None,
+    }
@@ -0,0 +1,36 @@
+"""
+gzip helpers for compressed cache values and pre-compressed responses
+"""
+
+import zlib
+from typing import Optional
+
+
+# wbits for a gzip container instead of a bare zlib stream
+GZIP_WBITS = 16 + zlib.MAX_WBITS
+
+
+def gzip_compress(data: bytes, level: int = 6) -> bytes:
+    """gzip-framed bytes, valid as a `Content-Encoding: gzip` body."""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, GZIP_WBITS)
+    return compressor.compress(data) + compressor.flush()
+
+
+def gzip_decompress(data: bytes) -> bytes:
+    return zlib.decompress(data, GZIP_WBITS)
+
+
+def accepts_gzip(accept_encoding: Optional[str]) -> bool:
+    """Whether an Accept-Encoding header allows gzip (and doesn't give it q=0)."""
+    for coding in (accept_encoding or "").split(","):
+        name, _, params = coding.strip().partition(";")
+        if name.strip().lower() not in ("gzip", "x-gzip", "*"):
+            continue
+        quality = params.strip()
+        if quality.startswith("q="):
+            try:
+                return float(quality[2:]) > 0
+            except ValueError:
+                return False
+        return True
+    return False
@@ -0,0 +1,292 @@
+"""
+Disk-backed second cache tier: an append-only log with an in-memory index, read through mmap
+"""
+
+import mmap
+import os
+import struct
+import threading
+import time
+import zlib
+from typing import Dict, List, Optional, Tuple
+
+
+# crc32 of everything after it, key length, value length, expiry (wall clock, 0 = never)
+RECORD = struct.Struct("<IIId")
+TOMBSTONE = 0xFFFFFFFF
+# When over max_bytes, compaction trims the live data to this fraction of it
+TRIM_TO = 0.8
+# The file grows at least this much at a time, so the mmap is rarely remapped
+MIN_GROWTH = 1 << 16
+
+
+class DiskTier:
+    """
+    Log-structured key -> bytes store in one file.
+
+    Every put or delete appends a record; an in-memory index maps each key to
+    where its latest value sits in the file, and reads return a memoryview
+    into an mmap of the file, so a hit costs no read() call and no copy. The
+    file is extended in doubling steps ahead of the writes, so the mmap only
+    has to be remapped when it doubles rather than after every put; the
+    zeroed space past the last record is cut off again on close or restart.
+    Overwritten, deleted and expired records stay in the file as
+    garbage until a background thread compacts it: live records are copied
+    to a new file, which then atomically replaces the old one. When the live
+    data outgrows max_bytes, compaction also drops the oldest records.
+
+    On startup the index is rebuilt by scanning the log; a torn record or
+    unused space at the end (from a crash) fails its checksum and is cut off. Nothing
+    is fsynced on write - this is a cache, and losing the last few records
+    only costs a refetch.
+    """
+
+    def __init__(self, path: str, max_bytes: Optional[int] = None,
+                 compact_ratio: float = 0.5, min_compact_bytes: int = 1 << 20):
+        if max_bytes is not None and max_bytes <= 0:
+            raise ValueError("max_bytes must be greater than 0")
+        if not 0 < compact_ratio < 1:
+            raise ValueError("Compact ratio must be between 0 and 1")
+        self.path = path
+        self.max_bytes = max_bytes
+        self.compact_ratio = compact_ratio
+        self.min_compact_bytes = min_compact_bytes
+        self.lock = threading.Lock()
+        # One compaction at a time; it holds self.lock only briefly
+        self.compaction_lock = threading.Lock()
+        # key -> (value offset, value length, expires_at, record length)
+        self.index: Dict[str, Tuple[int, int, float, int]] = {}
+        self.live_bytes = 0
+        self.file_bytes = 0
+        # Size of the file on disk, including space not written yet
+        self.allocated_bytes = 0
+        self.map: Optional[mmap.mmap] = None
+
+        self.hits = 0
+        self.misses = 0
+        self.compactions = 0
+
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.file = self._open(path)
+        self._load()
+
+        self.closed = False
+        self.compact_requested = threading.Event()
+        self.compactor = threading.Thread(target=self._compact_loop, name="l2-compaction", daemon=True)
+        self.compactor.start()
+
+    @staticmethod
+    def _open(path: str):
+        # Not in append mode: records are written at file_bytes, before the preallocated space
+        return os.fdopen(os.open(path, os.O_RDWR | os.O_CREAT, 0o644), "r+b", buffering=0)
+
+    @staticmethod
+    def _encode(key: str, value: Optional[bytes], expires_at: float) -> bytes:
+        key_bytes = key.encode("utf-8")
+        body = RECORD.pack(0, len(key_bytes), TOMBSTONE if value is None else len(value), expires_at)[4:]
+        body += key_bytes + (value or b"")
+        return struct.pack("<I", zlib.crc32(body)) + body
+
+    def _records(self, data, start: int, end: int):
+        """(offset, key, value offset, value length or TOMBSTONE, expires_at, record length) per valid record."""
+        offset = start
+        while offset + RECORD.size <= end:
+            crc, key_length, value_length, expires_at = RECORD.unpack_from(data, offset)
+            key_start = offset + RECORD.size
+            record_end = key_start + key_length + (0 if value_length == TOMBSTONE else value_length)
+            if record_end > end or zlib.crc32(data[offset + 4:record_end]) != crc:
+                return
+            key = bytes(data[key_start:key_start + key_length]).decode("utf-8")
+            yield offset, key, key_start + key_length, value_length, expires_at, record_end - offset
+            offset = record_end
+
+    def _apply(self, key: str, value_offset: int, value_length: int, expires_at: float, record_length: int) -> None:
+        old = self.index.pop(key, None)
+        if old is not None:
+            self.live_bytes -= old[3]
+        if value_length != TOMBSTONE:
+            self.index[key] = (value_offset, value_length, expires_at, record_length)
+            self.live_bytes += record_length
+
+    def _load(self) -> None:
+        size = os.fstat(self.file.fileno()).st_size
+        valid_end = 0
+        if size:
+            data = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+            for offset, key, value_offset, value_length, expires_at, record_length in self._records(data, 0, size):
+                self._apply(key, value_offset, value_length, expires_at, record_length)
+                valid_end = offset + record_length
+            data.close()
+        now = time.time()
+        for key in [key for key, entry in self.index.items() if entry[2] and entry[2] <= now]:
+            self.live_bytes -= self.index.pop(key)[3]
+        if valid_end < size:
+            # Torn or corrupt tail, or unused space, from a crash: drop it
+            self.file.truncate(valid_end)
+        self.file_bytes = self.allocated_bytes = valid_end
+
+    def _view(self, end: int) -> mmap.mmap:
+        """An mmap covering the file up to at least end."""
+        if self.map is None or len(self.map) < end:
+            # The old map is closed once nothing (such as a returned memoryview) references it any more
+            self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        return self.map
+
+    def _append(self, record: bytes) -> int:
+        """Write record after the last one and return its offset."""
+        offset = self.file_bytes
+        end = offset + len(record)
+        if end > self.allocated_bytes:
+            self.allocated_bytes = max(end, 2 * self.allocated_bytes, MIN_GROWTH)
+            self.file.truncate(self.allocated_bytes)
+        os.pwrite(self.file.fileno(), record, offset)
+        self.file_bytes = end
+        return offset
+
+    def put(self, key: str, value: bytes, expires_at: float = 0.0) -> None:
+        """Store value under key; it is dropped after expires_at (time.time() seconds) unless 0."""
+        record = self._encode(key, value, expires_at)
+        with self.lock:
+            offset = self._append(record)
+            self._apply(key, offset + len(record) - len(value), len(value), expires_at, len(record))
+            self._maybe_compact()
+
+    def get(self, key: str) -> Optional[memoryview]:
+        """The value stored under key, as a read-only view of the mapped file."""
+        with self.lock:
+            entry = self.index.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            value_offset, value_length, expires_at, record_length = entry
+            if expires_at and expires_at <= time.time():
+                del self.index[key]
+                self.live_bytes -= record_length
+                self.misses += 1
+                return None
+            self.hits += 1
+            return memoryview(self._view(value_offset + value_length))[value_offset:value_offset + value_length]
+
+    def delete(self, key: str) -> bool:
+        with self.lock:
+            if key not in self.index:
+                return False
+            record = self._encode(key, None, 0.0)
+            self._append(record)
+            self._apply(key, 0, TOMBSTONE, 0.0, len(record))
+            self._maybe_compact()
+            return True
+
+    def _maybe_compact(self) -> None:
+        garbage = self.file_bytes - self.live_bytes
+        if (self.file_bytes >= self.min_compact_bytes and garbage > self.compact_ratio * self.file_bytes) or (
+            self.max_bytes is not None and self.live_bytes > self.max_bytes
+        ):
+            self.compact_requested.set()
+
+    def _compact_loop(self) -> None:
+        while True:
+            self.compact_requested.wait()
+            self.compact_requested.clear()
+            if self.closed:
+                return
+            try:
+                self.compact()
+            except OSError as e:
+                print(f"L2 compaction failed: {e}")
+
+    def compact(self) -> None:
+        """Rewrite the log with only live records; requests keep being served meanwhile."""
+        with self.compaction_lock:
+            self._compact()
+
+    def _compact(self) -> None:
+        with self.lock:
+            snapshot_end = self.file_bytes
+            if not snapshot_end:
+                return
+            source = self._view(snapshot_end)
+            live = list(self.index.items())
+
+        live.sort(key=lambda item: item[1][0])
+        now = time.time()
+        live = [(key, entry) for key, entry in live if not entry[2] or entry[2] > now]
+        if self.max_bytes is not None:
+            # Oldest records go first
+            total = sum(entry[3] for _, entry in live)
+            target = self.max_bytes * TRIM_TO if total > self.max_bytes else total
+            skip = 0
+            while total > target:
+                total -= live[skip][1][3]
+                skip += 1
+            live = live[skip:]
+
+        temporary = self.path + ".compact"
+        index: Dict[str, Tuple[int, int, float, int]] = {}
+        with open(temporary, "wb") as out:
+            written = 0
+            chunk: List[bytes] = []
+            # Records before snapshot_end never change, so they are copied without the lock
+            for key, (value_offset, value_length, expires_at, record_length) in live:
+                header_length = record_length - value_length
+                start = value_offset - header_length
+                chunk.append(source[start:value_offset + value_length])
+                index[key] = (written + header_length, value_length, expires_at, record_length)
+                written += record_length
+                if len(chunk) >= 256:
+                    out.write(b"".join(chunk))
+                    chunk.clear()
+            out.write(b"".join(chunk))
+
+            with self.lock:
+                # Carry over what was written while copying
+                tail = self._view(self.file_bytes)
+                for offset, key, value_offset, value_length, expires_at, record_length in self._records(
+                        tail, snapshot_end, self.file_bytes):
+                    index.pop(key, None)
+                    if value_length == TOMBSTONE:
+                        continue
+                    out.write(tail[offset:offset + record_length])
+                    index[key] = (written + value_offset - offset, value_length, expires_at, record_length)
+                    written += record_length
+                # Keys dropped from the index meanwhile (expired on read) stay dropped
+                index = {key: entry for key, entry in index.items() if key in self.index}
+                out.flush()
+                os.fsync(out.fileno())
+                os.replace(temporary, self.path)
+
+                self.file.close()
+                self.file = self._open(self.path)
+                self.map = None
+                self.index = index
+                self.live_bytes = sum(entry[3] for entry in index.values())
+                self.file_bytes = self.allocated_bytes = written
+                self.compactions += 1
+
+    def close(self) -> None:
+        self.closed = True
+        self.compact_requested.set()
+        self.compactor.join()
+        with self.lock:
+            self.map = None
+            self.file.truncate(self.file_bytes)
+            self.file.close()
+
+    def __contains__(self, key: str) -> bool:
+        with self.lock:
+            return key in self.index
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    def stats(self) -> Dict[str, int]:
+        with self.lock:
+            return {
+                "entries": len(self.index),
+                "live_bytes": self.live_bytes,
+                "file_bytes": self.file_bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "compactions": self.compactions,
+            }
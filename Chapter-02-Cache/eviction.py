@@ -0,0 +1,483 @@
+"""
+Bounded cache with pluggable eviction policies (LRU, LFU, W-TinyLFU)
+"""
+
+import sys
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Iterable, List, Optional, Tuple
+
+
+class EvictionPolicy:
+    """
+    Decides which entry leaves a full cache.
+
+    The cache reports every insert, update, hit and removal; evict() picks a
+    victim, forgets it and returns its key. Every operation is O(1).
+    expected_entries is roughly how many entries the cache will hold, for
+    policies that size internal state by it.
+    Policies are not thread-safe on their own - BoundedCache calls them
+    under its lock.
+    """
+
+    name = "base"
+
+    def on_insert(self, key: Hashable, weight: int) -> None:
+        raise NotImplementedError
+
+    def on_update(self, key: Hashable, weight: int) -> None:
+        self.on_access(key)
+
+    def on_access(self, key: Hashable) -> None:
+        raise NotImplementedError
+
+    def on_remove(self, key: Hashable) -> None:
+        raise NotImplementedError
+
+    def evict(self) -> Hashable:
+        raise NotImplementedError
+
+
+class LRUPolicy(EvictionPolicy):
+    """Evict the least recently used entry."""
+
+    name = "lru"
+
+    def __init__(self, capacity: int = 0, expected_entries: Optional[int] = None):
+        self.order: "OrderedDict[Hashable, None]" = OrderedDict()
+
+    def on_insert(self, key: Hashable, weight: int) -> None:
+        self.order[key] = None
+
+    def on_access(self, key: Hashable) -> None:
+        self.order.move_to_end(key)
+
+    def on_remove(self, key: Hashable) -> None:
+        del self.order[key]
+
+    def evict(self) -> Hashable:
+        key, _ = self.order.popitem(last=False)
+        return key
+
+
+class LFUPolicy(EvictionPolicy):
+    """
+    Evict the least frequently used entry, oldest first among ties.
+
+    Keys are grouped into buckets by access count, and the non-empty counts
+    form a doubly linked list in increasing order, so the lowest count is
+    always at the head and nothing ever scans the whole cache or its buckets.
+    """
+
+    name = "lfu"
+
+    def __init__(self, capacity: int = 0, expected_entries: Optional[int] = None):
+        self.counts: Dict[Hashable, int] = {}
+        self.buckets: Dict[int, "OrderedDict[Hashable, None]"] = {}
+        # Circular list of bucket counts; 0 is the sentinel, so next[0] is the
+        # lowest count (0 when empty)
+        self.next: Dict[int, int] = {0: 0}
+        self.prev: Dict[int, int] = {0: 0}
+
+    @property
+    def min_count(self) -> int:
+        return self.next[0]
+
+    def _add_bucket(self, after: int, count: int) -> "OrderedDict[Hashable, None]":
+        following = self.next[after]
+        self.next[after], self.prev[count] = count, after
+        self.next[count], self.prev[following] = following, count
+        bucket = self.buckets[count] = OrderedDict()
+        return bucket
+
+    def _drop_bucket(self, count: int) -> None:
+        before, following = self.prev.pop(count), self.next.pop(count)
+        self.next[before], self.prev[following] = following, before
+        del self.buckets[count]
+
+    def on_insert(self, key: Hashable, weight: int) -> None:
+        self.counts[key] = 1
+        bucket = self.buckets.get(1)
+        if bucket is None:
+            bucket = self._add_bucket(0, 1)
+        bucket[key] = None
+
+    def on_access(self, key: Hashable) -> None:
+        count = self.counts[key]
+        bucket = self.buckets[count]
+        target = self.buckets.get(count + 1)
+        if target is None:
+            target = self._add_bucket(count, count + 1)
+        del bucket[key]
+        if not bucket:
+            self._drop_bucket(count)
+        self.counts[key] = count + 1
+        target[key] = None
+
+    def on_remove(self, key: Hashable) -> None:
+        count = self.counts.pop(key)
+        bucket = self.buckets[count]
+        del bucket[key]
+        if not bucket:
+            self._drop_bucket(count)
+
+    def evict(self) -> Hashable:
+        count = self.min_count
+        bucket = self.buckets[count]
+        key, _ = bucket.popitem(last=False)
+        del self.counts[key]
+        if not bucket:
+            self._drop_bucket(count)
+        return key
+
+
+class CountMinSketch:
+    """
+    Approximate access counts in a fixed amount of memory.
+
+    Four rows of small counters (capped at 15, one byte each in a
+    bytearray); an estimate is the minimum over the rows. Once sample_size
+    increments have been seen every counter is halved, so the sketch tracks
+    recent popularity rather than all-time counts.
+    """
+
+    MAX_COUNT = 15
+    # Maps every counter value to half of it, for aging a row in one pass
+    HALVE = bytes(count >> 1 for count in range(256))
+    # Odd 64-bit multipliers, one per row: the top bits of hash x multiplier
+    # pick the counter
+    SEEDS = (0x9E3779B97F4A7C15, 0xC2B2AE3D27D4EB4F, 0x165667B19E3779F9, 0xD6E8FEB86659FD93)
+    MASK = 0xFFFFFFFFFFFFFFFF
+
+    def __init__(self, width: int):
+        self.bits = max(4, (width - 1).bit_length())
+        self.shift = 64 - self.bits
+        self.rows = [bytearray(1 << self.bits) for _ in self.SEEDS]
+        self.sample_size = 10 * (1 << self.bits)
+        self.additions = 0
+
+    def increment(self, key: Hashable) -> None:
+        # Rows unrolled: this runs on every cache access
+        h, mask, shift, seeds, limit = hash(key), self.MASK, self.shift, self.SEEDS, self.MAX_COUNT
+        r0, r1, r2, r3 = self.rows
+        i = ((h * seeds[0]) & mask) >> shift
+        if r0[i] < limit:
+            r0[i] += 1
+        i = ((h * seeds[1]) & mask) >> shift
+        if r1[i] < limit:
+            r1[i] += 1
+        i = ((h * seeds[2]) & mask) >> shift
+        if r2[i] < limit:
+            r2[i] += 1
+        i = ((h * seeds[3]) & mask) >> shift
+        if r3[i] < limit:
+            r3[i] += 1
+        self.additions += 1
+        if self.additions >= self.sample_size:
+            self._age()
+
+    def estimate(self, key: Hashable) -> int:
+        h, mask, shift, seeds = hash(key), self.MASK, self.shift, self.SEEDS
+        r0, r1, r2, r3 = self.rows
+        return min(r0[((h * seeds[0]) & mask) >> shift], r1[((h * seeds[1]) & mask) >> shift],
+                   r2[((h * seeds[2]) & mask) >> shift], r3[((h * seeds[3]) & mask) >> shift])
+
+    def _age(self) -> None:
+        for row in self.rows:
+            row[:] = row.translate(self.HALVE)
+        self.additions //= 2
+
+
+class TinyLFUPolicy(EvictionPolicy):
+    """
+    W-TinyLFU (the policy behind Caffeine).
+
+    New entries land in a small LRU window (1% of capacity). Entries pushed
+    out of the window join the probation segment of a segmented LRU, and a
+    hit on probation promotes an entry to the protected segment (80% of the
+    main space). When the cache is full, the newest probation entry (the
+    candidate) and the oldest one (the victim) are compared by their
+    estimated access frequency in a CountMinSketch, and the less popular one
+    is evicted. One-hit wonders therefore can't flush out a popular working
+    set, while the window still gives new entries a chance to build up hits.
+    """
+
+    name = "tinylfu"
+
+    WINDOW_RATIO = 0.01
+    PROTECTED_RATIO = 0.8
+
+    def __init__(self, capacity: int, expected_entries: Optional[int] = None):
+        if capacity <= 0:
+            raise ValueError("Capacity must be greater than 0")
+        self.window_capacity = max(1, int(capacity * self.WINDOW_RATIO))
+        self.protected_capacity = int((capacity - self.window_capacity) * self.PROTECTED_RATIO)
+        self.window: "OrderedDict[Hashable, int]" = OrderedDict()
+        self.probation: "OrderedDict[Hashable, int]" = OrderedDict()
+        self.protected: "OrderedDict[Hashable, int]" = OrderedDict()
+        self.window_weight = 0
+        self.protected_weight = 0
+        # The sketch needs a counter per entry, not per unit of capacity
+        self.sketch = CountMinSketch(min(expected_entries or capacity, 1 << 20))
+        self.rejections = 0
+
+    def on_insert(self, key: Hashable, weight: int) -> None:
+        self.sketch.increment(key)
+        self.window[key] = weight
+        self.window_weight += weight
+        # Spill the window's oldest entries into probation
+        while self.window_weight > self.window_capacity and len(self.window) > 1:
+            spilled, spilled_weight = self.window.popitem(last=False)
+            self.window_weight -= spilled_weight
+            self.probation[spilled] = spilled_weight
+
+    def on_update(self, key: Hashable, weight: int) -> None:
+        for segment in (self.window, self.probation, self.protected):
+            if key in segment:
+                delta = weight - segment[key]
+                segment[key] = weight
+                if segment is self.window:
+                    self.window_weight += delta
+                elif segment is self.protected:
+                    self.protected_weight += delta
+                break
+        self.on_access(key)
+
+    def on_access(self, key: Hashable) -> None:
+        self.sketch.increment(key)
+        if key in self.window:
+            self.window.move_to_end(key)
+        elif key in self.protected:
+            self.protected.move_to_end(key)
+        else:
+            weight = self.probation.pop(key)
+            self.protected[key] = weight
+            self.protected_weight += weight
+            # Demote the protected segment's oldest entries back to probation
+            while self.protected_weight > self.protected_capacity and len(self.protected) > 1:
+                demoted, demoted_weight = self.protected.popitem(last=False)
+                self.protected_weight -= demoted_weight
+                self.probation[demoted] = demoted_weight
+
+    def on_remove(self, key: Hashable) -> None:
+        if key in self.window:
+            self.window_weight -= self.window.pop(key)
+        elif key in self.probation:
+            del self.probation[key]
+        else:
+            self.protected_weight -= self.protected.pop(key)
+
+    def evict(self) -> Hashable:
+        if len(self.probation) >= 2:
+            victim = next(iter(self.probation))
+            candidate = next(reversed(self.probation))
+            if self.sketch.estimate(candidate) > self.sketch.estimate(victim):
+                del self.probation[victim]
+                return victim
+            self.rejections += 1
+            del self.probation[candidate]
+            return candidate
+        for segment in (self.probation, self.protected, self.window):
+            if segment:
+                key, weight = segment.popitem(last=False)
+                if segment is self.protected:
+                    self.protected_weight -= weight
+                elif segment is self.window:
+                    self.window_weight -= weight
+                return key
+        raise KeyError("evict from an empty cache")
+
+
+_MISSING = object()
+
+# Average entry size assumed when only max_bytes bounds a cache
+ESTIMATED_ENTRY_BYTES = 4096
+
+POLICIES = {policy.name: policy for policy in (LRUPolicy, LFUPolicy, TinyLFUPolicy)}
+
+
+def default_weigher(key: Hashable, value: Any) -> int:
+    """Approximate bytes held by an entry."""
+    return sys.getsizeof(key) + sys.getsizeof(value)
+
+
+class BoundedCache:
+    """
+    Thread-safe cache bounded by entry count, total size in bytes, or both.
+
+    When an insert pushes the cache over either limit, the eviction policy
+    removes entries until it fits again. Entry sizes come from weigher
+    (sys.getsizeof of key and value by default). on_evict(key, value), if
+    given, is called for every evicted entry after the lock is released -
+    e.g. to demote it to a slower tier.
+    """
+
+    def __init__(self, max_entries: Optional[int] = None, max_bytes: Optional[int] = None,
+                 policy: str = "lru", weigher: Callable[[Hashable, Any], int] = default_weigher,
+                 on_evict: Optional[Callable[[Hashable, Any], None]] = None):
+        if max_entries is None and max_bytes is None:
+            raise ValueError("Set max_entries, max_bytes or both")
+        if (max_entries is not None and max_entries <= 0) or (max_bytes is not None and max_bytes <= 0):
+            raise ValueError("Cache limits must be greater than 0")
+        if policy not in POLICIES:
+            raise ValueError(f"Unknown eviction policy: {policy}")
+
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.weigher = weigher
+        self.on_evict = on_evict
+        # Evicted entries waiting for on_evict, collected under the lock
+        self._evicted: List[Tuple[Hashable, Any]] = []
+        # TinyLFU sizes its segments in the unit the cache is bounded by
+        self._weigh_policy = max_entries is None
+        expected_entries = max_entries or max(1, max_bytes // ESTIMATED_ENTRY_BYTES)
+        self.policy = POLICIES[policy](max_bytes if self._weigh_policy else max_entries, expected_entries)
+        self.data: Dict[Hashable, Any] = {}
+        self.weights: Dict[Hashable, int] = {}
+        self.total_bytes = 0
+        self.lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self.lock:
+            return self._get(key, default)
+
+    def _get(self, key: Hashable, default: Any = None) -> Any:
+        if key in self.data:
+            self.hits += 1
+            self.policy.on_access(key)
+            return self.data[key]
+        self.misses += 1
+        return default
+
+    def put(self, key: Hashable, value: Any) -> None:
+        weight = self.weigher(key, value)
+        with self.lock:
+            self._put(key, value, weight)
+            evicted = self._take_evicted()
+        self._notify_evicted(evicted)
+
+    def _put(self, key: Hashable, value: Any, weight: int) -> None:
+        policy_weight = weight if self._weigh_policy else 1
+        if key in self.data:
+            self.total_bytes += weight - self.weights[key]
+            self.policy.on_update(key, policy_weight)
+        else:
+            self.total_bytes += weight
+            self.policy.on_insert(key, policy_weight)
+        self.data[key] = value
+        self.weights[key] = weight
+        self._enforce_limits()
+
+    def get_or_compute(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        """
+        Return the cached value, or compute, store and return it atomically.
+
+        fn runs under the cache lock, so concurrent callers for the key never
+        compute twice; it must be quick and must not use this cache.
+        """
+        with self.lock:
+            if key in self.data:
+                return self._get(key)
+            self.misses += 1
+            value = fn()
+            self._put(key, value, self.weigher(key, value))
+            evicted = self._take_evicted()
+        self._notify_evicted(evicted)
+        return value
+
+    def get_many(self, keys: Iterable[Hashable]) -> Dict[Hashable, Any]:
+        """Cached values for the keys that are present, under one lock acquisition."""
+        found = {}
+        with self.lock:
+            for key in keys:
+                value = self._get(key, _MISSING)
+                if value is not _MISSING:
+                    found[key] = value
+        return found
+
+    def put_many(self, items: Dict[Hashable, Any], replace: bool = True) -> None:
+        """Store several entries under one lock; with replace=False, keys already cached are left alone."""
+        # Weigh outside the lock
+        weighed: List[Tuple[Hashable, Any, int]] = [
+            (key, value, self.weigher(key, value)) for key, value in items.items()
+        ]
+        with self.lock:
+            for key, value, weight in weighed:
+                if replace or key not in self.data:
+                    self._put(key, value, weight)
+            evicted = self._take_evicted()
+        self._notify_evicted(evicted)
+
+    def delete(self, key: Hashable) -> bool:
+        with self.lock:
+            if key not in self.data:
+                return False
+            self.policy.on_remove(key)
+            self._discard(key)
+            return True
+
+    def _enforce_limits(self) -> None:
+        while self.data and (
+            (self.max_entries is not None and len(self.data) > self.max_entries)
+            or (self.max_bytes is not None and self.total_bytes > self.max_bytes)
+        ):
+            key = self.policy.evict()
+            if self.on_evict is not None:
+                self._evicted.append((key, self.data[key]))
+            self._discard(key)
+            self.evictions += 1
+
+    def _discard(self, key: Hashable) -> None:
+        del self.data[key]
+        self.total_bytes -= self.weights.pop(key)
+
+    def _take_evicted(self) -> List[Tuple[Hashable, Any]]:
+        evicted, self._evicted = self._evicted, []
+        return evicted
+
+    def _notify_evicted(self, evicted: List[Tuple[Hashable, Any]]) -> None:
+        for key, value in evicted:
+            self.on_evict(key, value)
+
+    def items(self) -> List[Tuple[Hashable, Any]]:
+        """A snapshot of the cached entries, without counting hits."""
+        with self.lock:
+            return list(self.data.items())
+
+    def clear(self) -> None:
+        with self.lock:
+            for key in list(self.data):
+                self.policy.on_remove(key)
+            self.data.clear()
+            self.weights.clear()
+            self.total_bytes = 0
+
+    def __contains__(self, key: Hashable) -> bool:
+        with self.lock:
+            return key in self.data
+
+    def __len__(self) -> int:
+        return len(self.data)
+
+    def stats(self) -> Dict[str, Any]:
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                "policy": self.policy.name,
+                "entries": len(self.data),
+                "bytes": self.total_bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "admission_rejections": getattr(self.policy, "rejections", 0),
+            }
+
+    def __repr__(self):
+        return f"BoundedCache(policy={self.policy.name}, entries={len(self.data)}, bytes={self.total_bytes})"
@@ -0,0 +1,189 @@
+"""
+Cached article entries: HTTP freshness (TTLs from Cache-Control, validators,
+stale windows) and compact, optionally compressed storage
+"""
+
+import json
+import struct
+import sys
+import time
+from email.utils import parsedate_to_datetime
+from typing import Dict, Hashable, Optional, Tuple, Union
+
+from compression import gzip_compress, gzip_decompress
+from origin_client import OriginResponse
+
+
+def parse_cache_control(header: Optional[str]) -> Dict[str, Optional[str]]:
+    """'max-age=60, no-cache' -> {'max-age': '60', 'no-cache': None}"""
+    directives: Dict[str, Optional[str]] = {}
+    for part in (header or "").split(","):
+        name, sep, value = part.strip().partition("=")
+        if name:
+            directives[name.lower()] = value.strip('"') if sep else None
+    return directives
+
+
+def _seconds(value: Optional[str]) -> Optional[float]:
+    try:
+        return max(0.0, float(value))
+    except (TypeError, ValueError):
+        return None
+
+
+def _http_date(value: Optional[str]) -> Optional[float]:
+    try:
+        return parsedate_to_datetime(value).timestamp()
+    except (TypeError, ValueError, IndexError):
+        return None
+
+
+def freshness_lifetime(response: OriginResponse, default_ttl: float,
+                       default_stale: float) -> Optional[Tuple[float, float]]:
+    """
+    (ttl, stale window) in seconds for a response, or None if it must not be stored.
+
+    Follows the shared-cache rules: s-maxage over max-age over Expires, minus
+    the Age the response already has; no-store and private responses aren't
+    stored; no-cache ones are stored but revalidated before every use. Responses
+    without any of these get default_ttl. stale-while-revalidate extends how
+    long stale content may be served while it is refreshed in the background,
+    default_stale when the origin doesn't say.
+    """
+    directives = parse_cache_control(response.header("Cache-Control"))
+    if "no-store" in directives or "private" in directives:
+        return None
+
+    ttl = _seconds(directives.get("s-maxage"))
+    if ttl is None:
+        ttl = _seconds(directives.get("max-age"))
+    if ttl is None and response.header("Expires") is not None:
+        expires = _http_date(response.header("Expires"))
+        date = _http_date(response.header("Date")) or time.time()
+        # An invalid Expires means already expired
+        ttl = max(0.0, expires - date) if expires is not None else 0.0
+    if ttl is None:
+        ttl = default_ttl
+    ttl = max(0.0, ttl - (_seconds(response.header("Age")) or 0.0))
+    if "no-cache" in directives:
+        ttl = 0.0
+
+    stale = _seconds(directives.get("stale-while-revalidate"))
+    if {"no-cache", "must-revalidate", "proxy-revalidate"} & directives.keys():
+        stale = 0.0
+    return ttl, default_stale if stale is None else stale
+
+
+# Serialized CachedArticle: fresh_until and stale_until (wall clock), compressed
+# flag, ETag and Last-Modified lengths; followed by those two (UTF-8, with
+# undecodable bytes kept as surrogates) and the body
+STORED_ARTICLE = struct.Struct("<ddBII")
+
+
+def wall_clock(monotonic: float) -> float:
+    """A time.monotonic() instant as time.time(), for storing outside this process."""
+    return monotonic - time.monotonic() + time.time()
+
+
+def response_body(url: str, content: str) -> bytes:
+    """The JSON body GET /get/ answers with, encoded the way FastAPI's JSONResponse does."""
+    return json.dumps({"url": url, "content": content}, ensure_ascii=False, allow_nan=False,
+                      indent=None, separators=(",", ":")).encode("utf-8")
+
+
+class CachedArticle:
+    """
+    An article with its validators and when it goes stale, then unusable.
+
+    The article is stored as its ready-to-send JSON response body, gzipped
+    when the body is at least compress_min_bytes long (and gzip actually
+    shrinks it). A compressed body goes out unchanged to clients that accept
+    gzip; everyone else, and reads of .content, decompress on demand, so the
+    uncompressed text is never kept around.
+    """
+
+    __slots__ = ("body", "compressed", "etag", "last_modified", "fresh_until", "stale_until")
+
+    def __init__(self, url: str, content: str, ttl: float, stale: float = 0.0,
+                 etag: Optional[str] = None, last_modified: Optional[str] = None,
+                 compress_min_bytes: Optional[int] = None, compress_level: int = 6):
+        body = response_body(url, content)
+        self.compressed = False
+        if compress_min_bytes is not None and len(body) >= compress_min_bytes:
+            packed = gzip_compress(body, compress_level)
+            if len(packed) < len(body):
+                body, self.compressed = packed, True
+        self.body = body
+        self.renew(ttl, stale, etag, last_modified)
+
+    def renew(self, ttl: float, stale: float = 0.0,
+              etag: Optional[str] = None, last_modified: Optional[str] = None) -> None:
+        """Restart the lifetime after a successful revalidation, keeping the stored body."""
+        self.etag = etag
+        self.last_modified = last_modified
+        self.fresh_until = time.monotonic() + ttl
+        self.stale_until = self.fresh_until + stale
+
+    def json_body(self) -> bytes:
+        return gzip_decompress(self.body) if self.compressed else self.body
+
+    def gzip_body(self) -> Optional[bytes]:
+        """The body as stored, if it is gzip-compressed."""
+        return self.body if self.compressed else None
+
+    @property
+    def content(self) -> str:
+        return json.loads(self.json_body())["content"]
+
+    def to_bytes(self) -> bytes:
+        """Compact binary form; the body is stored as is (still compressed)."""
+        etag = (self.etag or "").encode("utf-8", "surrogateescape")
+        last_modified = (self.last_modified or "").encode("utf-8", "surrogateescape")
+        header = STORED_ARTICLE.pack(wall_clock(self.fresh_until), wall_clock(self.stale_until),
+                                     self.compressed, len(etag), len(last_modified))
+        return b"".join((header, etag, last_modified, self.body))
+
+    @classmethod
+    def from_bytes(cls, data: Union[bytes, memoryview]) -> "CachedArticle":
+        """Rebuild an article from to_bytes() output, e.g. a memoryview returned by DiskTier.get."""
+        fresh_until, stale_until, compressed, etag_length, last_modified_length = STORED_ARTICLE.unpack_from(data)
+        offset = time.monotonic() - time.time()
+        position = STORED_ARTICLE.size
+        if position + etag_length + last_modified_length > len(data):
+            # E.g. written by a version with a different layout
+            raise ValueError("Stored article is truncated")
+        etag = str(data[position:position + etag_length], "utf-8", "surrogateescape")
+        position += etag_length
+        last_modified = str(data[position:position + last_modified_length], "utf-8", "surrogateescape")
+        position += last_modified_length
+
+        article = cls.__new__(cls)
+        article.body = bytes(data[position:])
+        article.compressed = bool(compressed)
+        article.etag = etag or None
+        article.last_modified = last_modified or None
+        article.fresh_until = fresh_until + offset
+        article.stale_until = stale_until + offset
+        return article
+
+    def is_fresh(self, now: Optional[float] = None) -> bool:
+        return (time.monotonic() if now is None else now) < self.fresh_until
+
+    def is_servable_stale(self, now: Optional[float] = None) -> bool:
+        """Past its TTL but still within the stale-while-revalidate window."""
+        now = time.monotonic() if now is None else now
+        return self.fresh_until <= now < self.stale_until
+
+    def validators(self) -> Dict[str, str]:
+        """Conditional request headers for revalidating this article."""
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+
+def article_weigher(key: Hashable, article: CachedArticle) -> int:
+    """BoundedCache weigher counting the stored body rather than the wrapper."""
+    return sys.getsizeof(key) + sys.getsizeof(article.body)
@@ -0,0 +1,321 @@
+"""
+Non-blocking HTTP/1.1 client for origin fetches, with per-origin keep-alive
+connection pools, timeouts and concurrency limits
+"""
+
+import asyncio
+import ssl
+import zlib
+from collections import OrderedDict, deque
+from typing import Deque, Dict, List, Optional, Tuple
+from urllib.parse import quote, urljoin, urlsplit
+
+
+REDIRECT_STATUSES = {301, 302, 303, 307, 308}
+MAX_REDIRECTS = 5
+# Origins with a connection pool kept at once; the least recently used
+# unused pool is dropped to make room for a new origin
+MAX_ORIGINS = 1000
+# Largest response body accepted, before and after gzip/deflate decoding
+MAX_BODY_BYTES = 64 * 1024 * 1024
+# Characters left alone when percent-encoding the request target: the
+# reserved ones keep their meaning, '%' keeps existing escapes intact, and
+# spaces, control characters and non-ASCII are encoded
+TARGET_SAFE = "/%:@!$&'()*+,;=?"
+
+
+class FetchError(Exception):
+    """The origin could not be reached or answered with an error status."""
+
+    def __init__(self, message: str, status: Optional[int] = None):
+        super().__init__(message)
+        self.status = status
+
+
+class FetchTimeout(FetchError):
+    pass
+
+
+class OriginResponse:
+    def __init__(self, url: str, status: int, headers: List[Tuple[str, str]], body: bytes):
+        self.url = url
+        self.status = status
+        self.headers = headers
+        self.body = body
+
+    def header(self, name: str, default: Optional[str] = None) -> Optional[str]:
+        name = name.lower()
+        for key, value in self.headers:
+            if key.lower() == name:
+                return value
+        return default
+
+    @property
+    def text(self) -> str:
+        charset = "utf-8"
+        for param in (self.header("Content-Type") or "").split(";")[1:]:
+            key, _, value = param.strip().partition("=")
+            if key.lower() == "charset" and value:
+                charset = value.strip('"')
+        try:
+            return self.body.decode(charset, errors="replace")
+        except LookupError:
+            return self.body.decode("utf-8", errors="replace")
+
+
+class _OriginPool:
+    """Idle keep-alive connections to one scheme://host:port and its concurrency limit."""
+
+    def __init__(self, max_idle: int, max_concurrency: int):
+        self.idle: Deque[Tuple[asyncio.StreamReader, asyncio.StreamWriter]] = deque()
+        self.max_idle = max_idle
+        self.limit = asyncio.Semaphore(max_concurrency)
+        # Requests using or queued for the pool; it is only dropped at 0
+        self.users = 0
+
+    def close(self) -> None:
+        while self.idle:
+            _, writer = self.idle.pop()
+            writer.close()
+
+
+class AsyncOriginClient:
+    """
+    Shared asyncio HTTP client for fetching articles from origins.
+
+    A blocking requests.get() holds a worker thread for the whole round trip
+    and opens a fresh TCP (and TLS) connection every time. Here each fetch is
+    a coroutine, so one event loop can have thousands in flight, and
+    connections to each origin are kept alive and reused.
+
+    - connect_timeout bounds establishing a connection, read_timeout
+      receiving the whole response once the request is sent
+    - at most max_concurrency_per_origin requests run against one origin at
+      once; the rest queue, so a burst of misses can't flood it
+    - gzip/deflate responses are decoded and up to MAX_REDIRECTS redirects
+      are followed
+    - pools are kept for at most max_origins origins, since URLs (and so
+      origins) come from clients
+    - bodies over max_body_bytes, raw or decoded, fail with FetchError
+      rather than being buffered
+
+    Origins are always connected to directly: HTTP_PROXY/HTTPS_PROXY are not
+    honoured, so a deployment that needs a proxy for outbound traffic can't
+    use this client as is.
+    """
+
+    def __init__(self, max_concurrency_per_origin: int = 100, max_idle_per_origin: int = 100,
+                 connect_timeout: float = 5.0, read_timeout: float = 30.0, user_agent: str = "article-cache/1.0",
+                 max_origins: int = MAX_ORIGINS, max_body_bytes: int = MAX_BODY_BYTES):
+        if max_concurrency_per_origin <= 0 or max_idle_per_origin < 0 or max_origins <= 0:
+            raise ValueError("Connection limits must be positive")
+        if max_body_bytes <= 0:
+            raise ValueError("max_body_bytes must be greater than 0")
+        self.max_concurrency_per_origin = max_concurrency_per_origin
+        self.max_idle_per_origin = max_idle_per_origin
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.user_agent = user_agent
+        self.max_origins = max_origins
+        self.max_body_bytes = max_body_bytes
+        # Least recently used first
+        self.pools: "OrderedDict[Tuple[str, str, int], _OriginPool]" = OrderedDict()
+        self.ssl_context = ssl.create_default_context()
+        self.connections_opened = 0
+        self.connections_reused = 0
+
+    async def get(self, url: str, headers: Optional[Dict[str, str]] = None) -> OriginResponse:
+        """GET url, following redirects. Raises FetchError on failures and 4xx/5xx responses."""
+        for _ in range(MAX_REDIRECTS + 1):
+            response = await self.request("GET", url, headers)
+            location = response.header("Location")
+            if response.status in REDIRECT_STATUSES and location:
+                url = urljoin(url, location)
+                continue
+            if response.status >= 400:
+                raise FetchError(f"{response.status} error fetching {url}", status=response.status)
+            return response
+        raise FetchError(f"Too many redirects fetching {url}")
+
+    async def request(self, method: str, url: str, headers: Optional[Dict[str, str]] = None) -> OriginResponse:
+        parts = urlsplit(url)
+        if parts.scheme not in ("http", "https") or not parts.hostname:
+            raise FetchError(f"Unsupported URL: {url}")
+        port = parts.port or (443 if parts.scheme == "https" else 80)
+        origin = (parts.scheme, parts.hostname, port)
+        pool = self._pool(origin)
+
+        target = quote(parts.path or "/", safe=TARGET_SAFE)
+        if parts.query:
+            target += "?" + quote(parts.query, safe=TARGET_SAFE)
+        host = parts.hostname if port in (80, 443) else f"{parts.hostname}:{port}"
+        head = [f"{method} {target} HTTP/1.1", f"Host: {host}", f"User-Agent: {self.user_agent}",
+                "Accept-Encoding: gzip, deflate"]
+        head += [f"{name}: {value}" for name, value in (headers or {}).items()]
+        request = ("\r\n".join(head) + "\r\n\r\n").encode("latin-1")
+
+        pool.users += 1
+        try:
+            return await self._send(pool, origin, url, method, request)
+        finally:
+            pool.users -= 1
+
+    def _pool(self, origin: Tuple[str, str, int]) -> _OriginPool:
+        pool = self.pools.get(origin)
+        if pool is not None:
+            self.pools.move_to_end(origin)
+            return pool
+        if len(self.pools) >= self.max_origins:
+            # Pools with requests in flight stay; if all of them do, the
+            # limit is exceeded until they finish
+            unused = next((key for key, pool in self.pools.items() if not pool.users), None)
+            if unused is not None:
+                self.pools.pop(unused).close()
+        pool = self.pools[origin] = _OriginPool(self.max_idle_per_origin, self.max_concurrency_per_origin)
+        return pool
+
+    async def _send(self, pool: _OriginPool, origin: Tuple[str, str, int], url: str, method: str,
+                    request: bytes) -> OriginResponse:
+        async with pool.limit:
+            # A pooled connection may have been closed by the origin in the
+            # meantime; retry once on a new one
+            for attempt in range(2):
+                reader, writer, reused = await self._acquire(pool, origin)
+                try:
+                    writer.write(request)
+                    await writer.drain()
+                    status, response_headers, body, reusable = await asyncio.wait_for(
+                        self._read_response(reader, method, self.max_body_bytes), self.read_timeout)
+                except asyncio.TimeoutError:
+                    writer.close()
+                    raise FetchTimeout(f"Timed out reading from {url}")
+                except (ConnectionError, asyncio.IncompleteReadError) as e:
+                    writer.close()
+                    if reused and attempt == 0:
+                        continue
+                    raise FetchError(f"Connection to {url} failed: {e}")
+                except ValueError as e:
+                    writer.close()
+                    raise FetchError(f"Malformed response from {url}: {e}")
+                except BaseException:
+                    writer.close()
+                    raise
+                self._release(pool, reader, writer, reusable)
+                try:
+                    body = self._decode(response_headers, body, self.max_body_bytes)
+                except zlib.error as e:
+                    raise FetchError(f"Could not decode response from {url}: {e}")
+                return OriginResponse(url, status, response_headers, body)
+        raise FetchError(f"Connection to {url} failed")
+
+    async def _acquire(self, pool: _OriginPool, origin: Tuple[str, str, int]):
+        while pool.idle:
+            reader, writer = pool.idle.pop()
+            if writer.is_closing() or reader.at_eof():
+                writer.close()
+                continue
+            self.connections_reused += 1
+            return reader, writer, True
+        scheme, host, port = origin
+        try:
+            reader, writer = await asyncio.wait_for(
+                asyncio.open_connection(host, port, ssl=self.ssl_context if scheme == "https" else None),
+                self.connect_timeout)
+        except asyncio.TimeoutError:
+            raise FetchTimeout(f"Timed out connecting to {host}:{port}")
+        except OSError as e:
+            raise FetchError(f"Could not connect to {host}:{port}: {e}")
+        self.connections_opened += 1
+        return reader, writer, False
+
+    def _release(self, pool: _OriginPool, reader, writer, reusable: bool) -> None:
+        if reusable and len(pool.idle) < pool.max_idle and not writer.is_closing():
+            pool.idle.append((reader, writer))
+        else:
+            writer.close()
+
+    @staticmethod
+    async def _read_response(reader: asyncio.StreamReader, method: str, limit: int):
+        while True:
+            status_line = (await reader.readline()).decode("latin-1").rstrip("\r\n")
+            if not status_line:
+                raise ConnectionResetError("Origin closed the connection")
+            version, status = status_line.split(" ", 2)[:2]
+            headers = []
+            while True:
+                line = await reader.readline()
+                if line in (b"\r\n", b"\n", b""):
+                    break
+                name, _, value = line.decode("latin-1").partition(":")
+                headers.append((name.strip(), value.strip()))
+            # Skip interim responses such as 100 Continue
+            if not status.startswith("1"):
+                break
+
+        status = int(status)
+        values = {name.lower(): value for name, value in headers}
+        reusable = version == "HTTP/1.1" and values.get("connection", "").lower() != "close"
+        if method == "HEAD" or status in (204, 304):
+            return status, headers, b"", reusable
+        too_large = FetchError(f"Response body larger than {limit} bytes")
+        if "chunked" in values.get("transfer-encoding", "").lower():
+            chunks = []
+            total = 0
+            while True:
+                size = int((await reader.readline()).split(b";", 1)[0], 16)
+                total += size
+                if total > limit:
+                    raise too_large
+                if size == 0:
+                    # Trailers, terminated by an empty line
+                    while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+                        pass
+                    break
+                chunks.append(await reader.readexactly(size))
+                await reader.readexactly(2)
+            return status, headers, b"".join(chunks), reusable
+        if "content-length" in values:
+            length = int(values["content-length"])
+            if length > limit:
+                raise too_large
+            return status, headers, await reader.readexactly(length), reusable
+        # Delimited by the origin closing the connection
+        chunks = []
+        total = 0
+        while True:
+            chunk = await reader.read(65536)
+            if not chunk:
+                return status, headers, b"".join(chunks), False
+            total += len(chunk)
+            if total > limit:
+                raise too_large
+            chunks.append(chunk)
+
+    @staticmethod
+    def _decode(headers: List[Tuple[str, str]], body: bytes, limit: int) -> bytes:
+        encoding = next((value.lower() for name, value in headers if name.lower() == "content-encoding"), "")
+        if encoding == "gzip":
+            decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        elif encoding == "deflate":
+            decompressor = zlib.decompressobj()
+        else:
+            return body
+        # Stop at the limit instead of inflating a compression bomb in full
+        decoded = decompressor.decompress(body, limit + 1)
+        if len(decoded) > limit:
+            raise FetchError(f"Decoded response body larger than {limit} bytes")
+        if not decompressor.eof:
+            raise zlib.error("incomplete or truncated stream")
+        return decoded
+
+    async def close(self) -> None:
+        for pool in self.pools.values():
+            pool.close()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "origins": len(self.pools),
+            "idle_connections": sum(len(pool.idle) for pool in self.pools.values()),
+            "connections_opened": self.connections_opened,
+            "connections_reused": self.connections_reused,
+        }
@@ -0,0 +1,91 @@
+"""
+Lock-striped cache: keys hashed across independently locked segments
+"""
+
+from typing import Any, Callable, Dict, Hashable, Iterable, List, Tuple
+
+
+class ShardedCache:
+    """
+    Spread keys over N segments that each have their own lock.
+
+    One lock around the whole cache serializes every thread; with N segments
+    two operations only contend when their keys hash to the same segment.
+    Each segment is a complete cache (BoundedCache, or SimpleCache's TTL
+    segment) holding about 1/N of the keys, so limits and eviction apply per
+    segment - give each one 1/N of the total budget.
+
+    Segments must provide get, put, delete, get_or_compute, get_many,
+    put_many, items, clear, stats and __len__, each thread-safe on its own.
+    Extra keyword arguments (e.g. ttl) are passed through to the segment.
+    """
+
+    def __init__(self, make_segment: Callable[[], Any], segments: int = 16):
+        if segments <= 0:
+            raise ValueError("Segment count must be greater than 0")
+        self.segments = [make_segment() for _ in range(segments)]
+
+    def segment_for(self, key: Hashable) -> Any:
+        return self.segments[hash(key) % len(self.segments)]
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        return self.segment_for(key).get(key, default)
+
+    def put(self, key: Hashable, value: Any, **kwargs) -> None:
+        self.segment_for(key).put(key, value, **kwargs)
+
+    def delete(self, key: Hashable) -> bool:
+        return self.segment_for(key).delete(key)
+
+    def get_or_compute(self, key: Hashable, fn: Callable[[], Any], **kwargs) -> Any:
+        """Cached value, or fn() stored atomically; fn holds only the key's segment lock."""
+        return self.segment_for(key).get_or_compute(key, fn, **kwargs)
+
+    def _group(self, keys: Iterable[Hashable]) -> Dict[int, List[Hashable]]:
+        groups: Dict[int, List[Hashable]] = {}
+        for key in keys:
+            groups.setdefault(hash(key) % len(self.segments), []).append(key)
+        return groups
+
+    def get_many(self, keys: Iterable[Hashable]) -> Dict[Hashable, Any]:
+        """Values for the keys that are cached, locking each segment once."""
+        found: Dict[Hashable, Any] = {}
+        for index, group in self._group(keys).items():
+            found.update(self.segments[index].get_many(group))
+        return found
+
+    def put_many(self, items: Dict[Hashable, Any], **kwargs) -> None:
+        for index, group in self._group(items).items():
+            self.segments[index].put_many({key: items[key] for key in group}, **kwargs)
+
+    def items(self) -> List[Tuple[Hashable, Any]]:
+        """Snapshot of all entries, taken one segment at a time."""
+        return [item for segment in self.segments for item in segment.items()]
+
+    def clear(self) -> None:
+        for segment in self.segments:
+            segment.clear()
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self.segment_for(key)
+
+    def __len__(self) -> int:
+        return sum(len(segment) for segment in self.segments)
+
+    def stats(self) -> Dict[str, Any]:
+        """Segment stats summed; limits are totals over all segments."""
+        merged: Dict[str, Any] = {}
+        for segment in self.segments:
+            for name, value in segment.stats().items():
+                if isinstance(value, (int, float)) and not isinstance(value, bool) and name in merged:
+                    merged[name] += value
+                else:
+                    merged.setdefault(name, value)
+        if "hits" in merged and "misses" in merged:
+            lookups = merged["hits"] + merged["misses"]
+            merged["hit_rate"] = merged["hits"] / lookups if lookups else 0.0
+        merged["segments"] = len(self.segments)
+        return merged
+
+    def __repr__(self):
+        return f"ShardedCache(segments={len(self.segments)}, entries={len(self)})"
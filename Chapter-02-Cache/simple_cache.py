@@ -3,43 +3,195 @@
 Simple Cache Implementation for testing
 """
 
+import contextlib
+import io
+import threading
 import time
-from typing import Dict, Optional
+from typing import Any, Callable, Dict, Hashable, Iterable, List, Optional, Tuple
+
+from sharded import ShardedCache
+from timer_wheel import TimerWheel
+
+
+_MISSING = object()
+
+
+class TTLSegment:
+    """
+    One lock-protected segment of SimpleCache: values with expiry times.
+
+    Expired entries are removed actively, not only when they are read again:
+    every get/put also sweeps at most sweep_budget entries off the segment's
+    timer wheel, so memory follows the number of live keys without any single
+    call paying for a large batch of expirations.
+    """
+
+    def __init__(self, default_ttl: float = 5.0, sweep_budget: int = 16):
+        self.default_ttl = default_ttl
+        self.sweep_budget = sweep_budget
+        self.data: Dict[Hashable, tuple] = {}  # key -> (value, expires_at)
+        self.expiry = TimerWheel()
+        self.lock = threading.Lock()
+
+    def _expires_at(self, now: float, ttl: Optional[float]) -> float:
+        if ttl is None:
+            ttl = self.default_ttl
+        elif ttl <= 0:
+            raise ValueError("TTL must be greater than 0")
+        return now + ttl
+
+    def _get(self, key: Hashable, now: float, default: Any = None) -> Any:
+        if key in self.data:
+            value, expires_at = self.data[key]
+            if now < expires_at:
+                return value
+            # Due within the current tick, before the wheel reached it
+            del self.data[key]
+            self.expiry.cancel(key)
+        return default
+
+    def _put(self, key: Hashable, value: Any, expires_at: float) -> None:
+        self.data[key] = (value, expires_at)
+        self.expiry.schedule(key, expires_at)
+
+    def _sweep(self, now: float, max_work: Optional[int]) -> int:
+        expired = self.expiry.advance(now, max_work)
+        for key in expired:
+            del self.data[key]
+        return len(expired)
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        now = time.monotonic()
+        with self.lock:
+            self._sweep(now, self.sweep_budget)
+            return self._get(key, now, default)
+
+    def put(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        now = time.monotonic()
+        expires_at = self._expires_at(now, ttl)
+        with self.lock:
+            self._sweep(now, self.sweep_budget)
+            self._put(key, value, expires_at)
+
+    def delete(self, key: Hashable) -> bool:
+        with self.lock:
+            self.expiry.cancel(key)
+            return self.data.pop(key, None) is not None
+
+    def get_or_compute(self, key: Hashable, fn: Callable[[], Any], ttl: Optional[float] = None) -> Any:
+        """Cached value, or fn() stored and returned; fn runs under the segment lock."""
+        now = time.monotonic()
+        expires_at = self._expires_at(now, ttl)
+        with self.lock:
+            self._sweep(now, self.sweep_budget)
+            value = self._get(key, now, _MISSING)
+            if value is _MISSING:
+                value = fn()
+                self._put(key, value, expires_at)
+            return value
+
+    def get_many(self, keys: Iterable[Hashable]) -> Dict[Hashable, Any]:
+        now = time.monotonic()
+        found = {}
+        with self.lock:
+            self._sweep(now, self.sweep_budget)
+            for key in keys:
+                value = self._get(key, now, _MISSING)
+                if value is not _MISSING:
+                    found[key] = value
+        return found
+
+    def put_many(self, items: Dict[Hashable, Any], ttl: Optional[float] = None) -> None:
+        now = time.monotonic()
+        expires_at = self._expires_at(now, ttl)
+        with self.lock:
+            self._sweep(now, self.sweep_budget)
+            for key, value in items.items():
+                self._put(key, value, expires_at)
+
+    def sweep(self, max_work: Optional[int] = None) -> int:
+        now = time.monotonic()
+        with self.lock:
+            return self._sweep(now, max_work)
+
+    def items(self) -> List[Tuple[Hashable, Any]]:
+        """Unexpired (key, value) pairs"""
+        now = time.monotonic()
+        with self.lock:
+            return [(key, value) for key, (value, expires_at) in self.data.items() if now < expires_at]
+
+    def clear(self) -> None:
+        with self.lock:
+            self.data.clear()
+            self.expiry.clear()
+
+    def __contains__(self, key: Hashable) -> bool:
+        return self.get(key, _MISSING) is not _MISSING
+
+    def __len__(self) -> int:
+        return len(self.data)
+
+    def stats(self) -> Dict[str, int]:
+        return {"entries": len(self.data)}
 
 
 class SimpleCache:
-    """A simple in-memory cache with TTL support"""
+    """
+    A simple in-memory cache with TTL support.
+
+    Thread-safe: keys are spread over `segments` independently locked
+    TTLSegments (see ShardedCache), so threads working on different keys
+    rarely wait for each other. Each operation sweeps expired entries from
+    the segment it touches.
+    """
     
-    def __init__(self):
-        self.cache: Dict[str, tuple] = {}  # key -> (value, timestamp)
+    def __init__(self, default_ttl: float = 5.0, sweep_budget: int = 16, segments: int = 16):
+        if default_ttl <= 0:
+            raise ValueError("TTL must be greater than 0")
+        if sweep_budget <= 0:
+            raise ValueError("Sweep budget must be greater than 0")
+        self.default_ttl = default_ttl
+        self.sweep_budget = sweep_budget
+        self.shards = ShardedCache(lambda: TTLSegment(default_ttl, sweep_budget), segments)
     
     def get(self, key: str) -> Optional[str]:
         """Get value from cache"""
-        if key in self.cache:
-            value, timestamp = self.cache[key]
-            # Simple TTL check (5 seconds)
-            if time.time() - timestamp < 5:
-                print(f"Cache HIT for key: {key}")
-                return value
-            else:
-                print(f"Cache EXPIRED for key: {key}")
-                del self.cache[key]
+        value = self.shards.get(key)
+        if value is not None:
+            print(f"Cache HIT for key: {key}")
+            return value
         
         print(f"Cache MISS for key: {key}")
         return None
     
-    def put(self, key: str, value: str) -> None:
-        """Put value in cache"""
-        self.cache[key] = (value, time.time())
+    def put(self, key: str, value: str, ttl: Optional[float] = None) -> None:
+        """Put value in cache, expiring after ttl seconds (default_ttl if not given)"""
+        self.shards.put(key, value, ttl=ttl)
         print(f"Cached key: {key}")
     
+    def get_or_compute(self, key: str, fn: Callable[[], str], ttl: Optional[float] = None) -> str:
+        """Get value, or compute and cache it; concurrent callers for a key compute it once"""
+        return self.shards.get_or_compute(key, fn, ttl=ttl)
+    
+    def get_many(self, keys: Iterable[str]) -> Dict[str, str]:
+        """Get the cached values among keys, locking each segment once"""
+        return self.shards.get_many(keys)
+    
+    def put_many(self, items: Dict[str, str], ttl: Optional[float] = None) -> None:
+        """Put several values, locking each segment once"""
+        self.shards.put_many(items, ttl=ttl)
+    
+    def sweep(self) -> int:
+        """Remove every expired entry now; returns how many were removed"""
+        return sum(segment.sweep() for segment in self.shards.segments)
+    
     def size(self) -> int:
         """Get cache size"""
-        return len(self.cache)
+        return len(self.shards)
     
     def clear(self) -> None:
         """Clear all cache entries"""
-        self.cache.clear()
+        self.shards.clear()
         print("Cache cleared")
 
 
@@ -67,11 +219,21 @@ def test_cache():
     # Test 3: TTL expiration (simulate)
     print("Test 3: TTL expiration")
     cache.put("temp:1", "Temporary data")
-    # Manually expire by modifying timestamp
-    cache.cache["temp:1"] = (cache.cache["temp:1"][0], time.time() - 10)
+    # Manually expire by modifying the expiry time
+    segment = cache.shards.segment_for("temp:1")
+    segment.data["temp:1"] = (segment.data["temp:1"][0], time.monotonic() - 10)
     assert cache.get("temp:1") is None
     print("✅ TTL expiration works\n")
     
+    # Test 3b: Per-entry TTL
+    print("Test 3b: Per-entry TTL")
+    cache.put("short:1", "Short-lived data", ttl=0.05)
+    cache.put("long:1", "Long-lived data", ttl=60)
+    time.sleep(0.1)
+    assert cache.get("short:1") is None
+    assert cache.get("long:1") == "Long-lived data"
+    print("✅ Per-entry TTL works\n")
+    
     # Test 4: Clear cache
     print("Test 4: Clear cache")
     cache.clear()
@@ -79,6 +241,49 @@ def test_cache():
     assert cache.get("user:1") is None
     print("✅ Cache clear works\n")
     
+    # Test 5: Active expiry of keys that are never read again
+    print("Test 5: Active expiry")
+    # One segment, so every write sweeps the same timer wheel
+    cache = SimpleCache(segments=1)
+    with contextlib.redirect_stdout(io.StringIO()):
+        for i in range(100):
+            cache.put(f"once:{i}", "Write-only data", ttl=0.05)
+        time.sleep(0.3)
+        # Each write sweeps a bounded amount; together they clear the backlog
+        for i in range(10):
+            cache.put(f"new:{i}", "Fresh data")
+    assert cache.size() == 10
+    assert len(cache.shards.segments[0].expiry) == 10
+    print("✅ Active expiry works\n")
+    
+    # Test 6: Batches and get-or-compute
+    print("Test 6: Batches and get-or-compute")
+    cache = SimpleCache()
+    cache.put_many({f"item:{i}": f"value {i}" for i in range(50)})
+    assert cache.get_many(["item:0", "item:49", "item:50"]) == {"item:0": "value 0", "item:49": "value 49"}
+    assert cache.get_or_compute("item:0", lambda: "recomputed") == "value 0"
+    assert cache.get_or_compute("item:50", lambda: "computed") == "computed"
+    assert cache.size() == 51
+    print("✅ Batches and get-or-compute work\n")
+    
+    # Test 7: Concurrent get-or-compute computes each key once
+    print("Test 7: Concurrent access")
+    computed = []
+    def compute(key):
+        computed.append(key)
+        return key.upper()
+    def worker():
+        for i in range(200):
+            key = f"shared:{i}"
+            assert cache.get_or_compute(key, lambda: compute(key)) == key.upper()
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert sorted(computed) == sorted(f"shared:{i}" for i in range(200))
+    print("✅ Concurrent access works\n")
+    
     print("🎉 All cache tests passed!")
 
 
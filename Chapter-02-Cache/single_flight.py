@@ -0,0 +1,45 @@
+"""
+Request coalescing: concurrent calls for the same key share one execution
+"""
+
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+
+class AsyncSingleFlight:
+    """
+    Deduplicate concurrent calls by key (Go's singleflight), for coroutines on
+    one event loop.
+
+    The first caller for a key starts fn; every caller that arrives while it
+    is still running awaits the same result - or the same exception. Once the
+    call finishes the key is forgotten, so later calls run fn again. The
+    shared call runs as its own task and every caller awaits it through
+    asyncio.shield, so a caller that gives up (e.g. its client disconnected)
+    doesn't cancel the fetch for the others still waiting on it.
+    """
+
+    def __init__(self):
+        self.calls: Dict[Hashable, asyncio.Task] = {}
+        self.executions = 0
+        self.coalesced = 0
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        task = self.calls.get(key)
+        if task is not None:
+            self.coalesced += 1
+        else:
+            task = self.calls[key] = asyncio.ensure_future(fn())
+            self.executions += 1
+            task.add_done_callback(lambda _: self.calls.pop(key, None))
+        return await asyncio.shield(task)
+
+    def in_flight(self) -> int:
+        return len(self.calls)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "executions": self.executions,
+            "coalesced": self.coalesced,
+            "in_flight": len(self.calls),
+        }
@@ -0,0 +1,129 @@
+"""
+Periodic binary snapshots of the cache and streamed restore on startup
+"""
+
+import os
+import struct
+import threading
+import time
+import zlib
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+
+MAGIC = b"ACSNAP1\n"
+# crc32 of key and value, key length, value length
+ENTRY = struct.Struct("<III")
+
+
+def write_snapshot(path: str, entries: Iterable[Tuple[str, bytes]]) -> int:
+    """
+    Write entries to path atomically; returns how many were written.
+
+    The snapshot goes to a temporary file that replaces path only once it is
+    complete and fsynced, so a crash mid-write leaves the previous snapshot.
+    """
+    temporary = path + ".tmp"
+    count = 0
+    with open(temporary, "wb") as out:
+        out.write(MAGIC)
+        for key, value in entries:
+            key_bytes = key.encode("utf-8")
+            out.write(ENTRY.pack(zlib.crc32(value, zlib.crc32(key_bytes)), len(key_bytes), len(value)))
+            out.write(key_bytes)
+            out.write(value)
+            count += 1
+        out.flush()
+        os.fsync(out.fileno())
+    os.replace(temporary, path)
+    return count
+
+
+def read_snapshot(path: str, batch_size: int = 500) -> Iterator[List[Tuple[str, bytes]]]:
+    """
+    Stream a snapshot back in batches of (key, value).
+
+    Reading stops quietly at the first damaged entry; a missing or foreign
+    file yields nothing.
+    """
+    try:
+        source = open(path, "rb")
+    except FileNotFoundError:
+        return
+    with source:
+        if source.read(len(MAGIC)) != MAGIC:
+            return
+        batch: List[Tuple[str, bytes]] = []
+        while True:
+            header = source.read(ENTRY.size)
+            if len(header) < ENTRY.size:
+                break
+            crc, key_length, value_length = ENTRY.unpack(header)
+            key_bytes = source.read(key_length)
+            value = source.read(value_length)
+            if len(value) < value_length or zlib.crc32(value, zlib.crc32(key_bytes)) != crc:
+                break
+            batch.append((key_bytes.decode("utf-8"), value))
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+
+class Snapshotter:
+    """
+    Writes snapshot(path) of entries() every `interval` seconds on a daemon
+    thread, so request handling never waits for serialization or disk I/O.
+    entries should take its own consistent view of the cache (e.g.
+    ShardedCache.items(), which locks one segment at a time).
+    """
+
+    def __init__(self, entries: Callable[[], Iterable[Tuple[str, bytes]]], path: str, interval: float = 60.0):
+        if interval <= 0:
+            raise ValueError("Snapshot interval must be greater than 0")
+        self.entries = entries
+        self.path = path
+        self.interval = interval
+        self.stopped = threading.Event()
+        self.lock = threading.Lock()
+        self.thread: Optional[threading.Thread] = None
+
+        self.snapshots = 0
+        self.last_entries = 0
+        self.last_duration = 0.0
+        self.failures = 0
+
+    def start(self) -> None:
+        self.thread = threading.Thread(target=self._run, name="cache-snapshot", daemon=True)
+        self.thread.start()
+
+    def _run(self) -> None:
+        while not self.stopped.wait(self.interval):
+            self.snapshot()
+
+    def snapshot(self) -> None:
+        with self.lock:
+            started = time.perf_counter()
+            try:
+                self.last_entries = write_snapshot(self.path, self.entries())
+            except OSError as e:
+                self.failures += 1
+                print(f"Snapshot to {self.path} failed: {e}")
+                return
+            self.last_duration = time.perf_counter() - started
+            self.snapshots += 1
+
+    def stop(self, final_snapshot: bool = True) -> None:
+        self.stopped.set()
+        if self.thread is not None:
+            self.thread.join()
+        if final_snapshot:
+            self.snapshot()
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            "snapshots": self.snapshots,
+            "last_entries": self.last_entries,
+            "last_duration_seconds": round(self.last_duration, 3),
+            "failures": self.failures,
+        }
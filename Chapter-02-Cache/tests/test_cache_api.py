@@ -0,0 +1,88 @@
+import json
+import pytest
+
+pytest.importorskip("fastapi")
+from fastapi.testclient import TestClient
+
+import cache
+
+
+@pytest.fixture
+def client():
+    cache.cache.clear()
+    yield TestClient(cache.app)
+    cache.cache.clear()
+
+
+def ndjson(records):
+    return "".join(json.dumps(record) + "\n" for record in records).encode("utf-8")
+
+
+def stored_batches(monkeypatch):
+    """Record the size of every batch /bulk/ inserts."""
+    sizes = []
+    store_articles = cache.store_articles
+
+    def recording(records):
+        sizes.append(len(records))
+        store_articles(records)
+
+    monkeypatch.setattr(cache, "store_articles", recording)
+    return sizes
+
+
+class TestBatchEndpoints:
+    """Test cases for /mget/ and /mput/"""
+
+    def test_mput_then_mget(self, client):
+        """Test articles stored together come back together, duplicates once"""
+        articles = [{"url": f"/a/{i}", "content": f"article {i}"} for i in range(3)]
+        response = client.put("/mput/", json={"articles": articles})
+        assert response.json()["count"] == 3
+
+        response = client.post("/mget/", json={"urls": ["/a/0", "/a/1", "/a/2", "/a/0"]})
+        body = response.json()
+        assert [article["content"] for article in body["articles"]] == ["article 0", "article 1", "article 2"]
+        assert body["errors"] == []
+
+    def test_batch_limit(self, client, monkeypatch):
+        """Test more than CACHE_BATCH_MAX_URLS URLs is rejected with 413"""
+        monkeypatch.setattr(cache, "CACHE_BATCH_MAX_URLS", 2)
+        articles = [{"url": f"/a/{i}", "content": "x"} for i in range(3)]
+
+        assert client.put("/mput/", json={"articles": articles}).status_code == 413
+        assert client.post("/mget/", json={"urls": ["/a/0", "/a/1", "/a/2"]}).status_code == 413
+        assert len(cache.cache) == 0
+
+
+class TestBulkLoad:
+    """Test cases for the /bulk/ NDJSON endpoint"""
+
+    def test_bulk_inserts_and_reports_invalid_lines(self, client):
+        """Test valid records are stored and invalid lines are counted with their line numbers"""
+        body = ndjson([{"url": "/a", "content": "alpha"}]) + b"not json\n\n" + ndjson([{"url": "/b"}])
+        body += b'{"url": "/c", "content": "charlie"}'
+
+        result = client.post("/bulk/", content=body).json()
+        assert (result["inserted"], result["failed"]) == (2, 2)
+        assert [error["line"] for error in result["errors"]] == [2, 4]
+        assert "/a" in cache.cache and "/c" in cache.cache
+
+    def test_bulk_splits_batches(self, client, monkeypatch):
+        """Test records are inserted CACHE_BULK_BATCH at a time, even from one chunk"""
+        monkeypatch.setattr(cache, "CACHE_BULK_BATCH", 4)
+        sizes = stored_batches(monkeypatch)
+        body = ndjson({"url": f"/a/{i}", "content": "x"} for i in range(10))
+
+        assert client.post("/bulk/", content=body).json()["inserted"] == 10
+        assert sizes == [4, 4, 2]
+
+    def test_bulk_line_too_long(self, client, monkeypatch):
+        """Test a line over CACHE_BULK_MAX_LINE_BYTES ends the upload with 413 after storing earlier lines"""
+        monkeypatch.setattr(cache, "CACHE_BULK_MAX_LINE_BYTES", 100)
+        body = ndjson([{"url": "/a", "content": "alpha"}]) + b'{"url": "/b", "content": "' + b"x" * 200
+
+        response = client.post("/bulk/", content=body)
+        assert response.status_code == 413
+        assert "1 articles inserted" in response.json()["detail"]
+        assert "/a" in cache.cache
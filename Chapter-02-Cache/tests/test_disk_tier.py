@@ -0,0 +1,138 @@
+import os
+import pytest
+import time
+from disk_tier import DiskTier
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / "l2" / "articles.log")
+
+
+class TestDiskTier:
+    """Test cases for DiskTier implementation"""
+
+    def test_initialization_with_invalid_parameters(self, path):
+        """Test DiskTier initialization with invalid parameters"""
+        with pytest.raises(ValueError):
+            DiskTier(path, max_bytes=0)
+
+        with pytest.raises(ValueError):
+            DiskTier(path, compact_ratio=1)
+
+    def test_put_get_delete(self, path):
+        """Test storing, overwriting and deleting values"""
+        tier = DiskTier(path)
+        tier.put("a", b"one")
+        tier.put("b", b"two")
+        tier.put("a", b"uno")
+
+        assert tier.get("a") == b"uno"
+        assert tier.get("missing") is None
+        assert tier.delete("b") is True
+        assert tier.delete("b") is False
+        assert "b" not in tier
+        assert len(tier) == 1
+        tier.close()
+
+    def test_expired_values_dropped(self, path):
+        """Test a value past its expiry reads as a miss"""
+        tier = DiskTier(path)
+        tier.put("old", b"x", expires_at=time.time() - 1)
+        tier.put("new", b"y", expires_at=time.time() + 60)
+
+        assert tier.get("old") is None
+        assert tier.get("new") == b"y"
+        tier.close()
+
+    def test_reload(self, path):
+        """Test the index is rebuilt from the log on restart"""
+        tier = DiskTier(path)
+        tier.put("a", b"one")
+        tier.put("b", b"two")
+        tier.delete("a")
+        tier.close()
+
+        tier = DiskTier(path)
+        assert tier.get("a") is None
+        assert tier.get("b") == b"two"
+        tier.close()
+
+    def test_torn_tail_cut_off(self, path):
+        """Test a record corrupted by a crash mid-write fails its CRC and is dropped"""
+        tier = DiskTier(path)
+        tier.put("a", b"one")
+        tier.put("b", b"two")
+        tier.close()
+        with open(path, "r+b") as f:
+            f.seek(-1, os.SEEK_END)
+            f.write(b"X")
+        intact = os.path.getsize(path)
+
+        tier = DiskTier(path)
+        assert tier.get("a") == b"one"
+        assert tier.get("b") is None
+        assert os.path.getsize(path) < intact
+        # Appends continue after the last good record
+        tier.put("c", b"three")
+        tier.close()
+        assert DiskTier(path).get("c") == b"three"
+
+    def test_compaction_drops_garbage(self, path):
+        """Test compaction rewrites the log with only live records"""
+        tier = DiskTier(path, min_compact_bytes=1 << 30)
+        for i in range(100):
+            tier.put("key", str(i).encode())
+        tier.put("other", b"kept")
+        before = os.path.getsize(path)
+
+        tier.compact()
+        assert os.path.getsize(path) < before / 10
+        assert tier.get("key") == b"99"
+        assert tier.get("other") == b"kept"
+        assert tier.stats()["compactions"] == 1
+        tier.close()
+
+        tier = DiskTier(path)
+        assert tier.get("key") == b"99"
+        tier.close()
+
+    def test_compaction_trims_to_max_bytes(self, path):
+        """Test the oldest records go when the live data outgrows max_bytes"""
+        tier = DiskTier(path, max_bytes=10_000, min_compact_bytes=1 << 30)
+        for i in range(100):
+            tier.put(f"key-{i}", b"x" * 200)
+
+        tier.compact()
+        assert tier.stats()["live_bytes"] <= 10_000
+        assert tier.get("key-0") is None
+        assert tier.get("key-99") == b"x" * 200
+        tier.close()
+
+    def test_get_returns_view(self, path):
+        """Test reads return a zero-copy view that outlives a remap and compaction"""
+        tier = DiskTier(path, min_compact_bytes=1 << 30)
+        tier.put("a", b"one")
+        view = tier.get("a")
+        for i in range(1000):
+            tier.put(f"key-{i}", b"x" * 100)
+        tier.put("a", b"uno")
+        tier.compact()
+
+        assert isinstance(view, memoryview)
+        assert view == b"one"
+        assert tier.get("a") == b"uno"
+        tier.close()
+
+    def test_file_grows_geometrically(self, path):
+        """Test the file is extended in doubling steps and trimmed to the records on close"""
+        tier = DiskTier(path, min_compact_bytes=1 << 30)
+        sizes = set()
+        for i in range(2000):
+            tier.put(f"key-{i}", b"x" * 100)
+            sizes.add(os.path.getsize(path))
+        file_bytes = tier.stats()["file_bytes"]
+
+        assert len(sizes) <= 4
+        tier.close()
+        assert os.path.getsize(path) == file_bytes
@@ -0,0 +1,231 @@
+import pytest
+import random
+from eviction import BoundedCache, CountMinSketch, LFUPolicy, LRUPolicy, TinyLFUPolicy
+from sharded import ShardedCache
+
+
+class TestEvictionPolicies:
+    """Test cases for the eviction policies"""
+
+    def test_lru_evicts_least_recently_used(self):
+        """Test LRU evicts the entry untouched for longest"""
+        policy = LRUPolicy()
+        for key in "abc":
+            policy.on_insert(key, 1)
+        policy.on_access("a")
+
+        assert [policy.evict() for _ in range(3)] == ["b", "c", "a"]
+
+    def test_lfu_evicts_least_frequently_used(self):
+        """Test LFU evicts the least used entry, oldest first among ties"""
+        policy = LFUPolicy()
+        for key in "abcd":
+            policy.on_insert(key, 1)
+        policy.on_access("a")
+        policy.on_access("a")
+        policy.on_access("c")
+
+        assert [policy.evict() for _ in range(4)] == ["b", "d", "c", "a"]
+
+    def test_lfu_remove_updates_minimum(self):
+        """Test removing the only least used entry moves the minimum up"""
+        policy = LFUPolicy()
+        policy.on_insert("a", 1)
+        policy.on_insert("b", 1)
+        policy.on_access("b")
+        policy.on_remove("a")
+
+        assert policy.evict() == "b"
+
+    def test_lfu_matches_full_scan(self):
+        """Test LFU tracks the minimum like a full scan would, across random operations"""
+        rng = random.Random(3)
+        policy = LFUPolicy()
+        counts = {}
+        for step in range(5000):
+            op = rng.random()
+            if op < 0.4 or not counts:
+                key = step
+                policy.on_insert(key, 1)
+                counts[key] = 1
+            elif op < 0.8:
+                key = rng.choice(list(counts))
+                policy.on_access(key)
+                counts[key] += 1
+            elif op < 0.9:
+                key = rng.choice(list(counts))
+                policy.on_remove(key)
+                del counts[key]
+            else:
+                lowest = min(counts.values())
+                assert policy.min_count == lowest
+                assert counts.pop(policy.evict()) == lowest
+
+        assert policy.min_count == min(counts.values(), default=0)
+
+    def test_count_min_sketch(self):
+        """Test estimates never undercount and are capped at 15"""
+        sketch = CountMinSketch(1024)
+        for i in range(100):
+            for _ in range(i % 10):
+                sketch.increment(f"key-{i}")
+
+        for i in range(100):
+            assert sketch.estimate(f"key-{i}") >= i % 10
+        for _ in range(50):
+            sketch.increment("hot")
+        assert sketch.estimate("hot") == CountMinSketch.MAX_COUNT
+
+    def test_count_min_sketch_ages(self):
+        """Test counters are halved once sample_size increments were seen"""
+        sketch = CountMinSketch(16)
+        for _ in range(8):
+            sketch.increment("hot")
+        for i in range(sketch.sample_size - 8):
+            sketch.increment(i)
+
+        assert sketch.estimate("hot") <= 4 + sketch.estimate("hot") // 2
+        assert sketch.additions == sketch.sample_size // 2
+        assert all(isinstance(row, bytearray) for row in sketch.rows)
+        assert max(max(row) for row in sketch.rows) <= CountMinSketch.MAX_COUNT // 2 + 1
+
+    def test_tinylfu_sketch_sized_by_entries(self):
+        """Test a cache bounded by bytes sizes its sketch by estimated entries, not bytes"""
+        cache = BoundedCache(max_bytes=256 * 1024 * 1024, policy="tinylfu")
+        sketch = cache.policy.sketch
+
+        assert len(sketch.rows[0]) < 1 << 17
+        assert sum(len(row) for row in sketch.rows) < 1024 * 1024
+
+    def test_tinylfu_rejects_one_hit_wonders(self):
+        """Test a scan of new keys can't flush out a popular working set"""
+        cache = BoundedCache(max_entries=100, policy="tinylfu")
+        hot = [f"hot-{i}" for i in range(50)]
+        for _ in range(5):
+            for key in hot:
+                cache.get(key) or cache.put(key, key)
+        for i in range(1000):
+            cache.put(f"scan-{i}", i)
+
+        # Only a hot key still in the admission window can lose out
+        assert sum(key in cache for key in hot) >= len(hot) - 1
+        assert cache.stats()["admission_rejections"] > 0
+
+    def test_tinylfu_beats_lru_on_skewed_load(self):
+        """Test TinyLFU's hit rate beats LRU's on a Zipf-like workload with scans"""
+        rng = random.Random(7)
+        keys = [int(rng.paretovariate(1.0)) if rng.random() < 0.7 else rng.randrange(10 ** 6)
+                for _ in range(20000)]
+        hit_rates = {}
+        for policy in ("lru", "tinylfu"):
+            cache = BoundedCache(max_entries=200, policy=policy)
+            for key in keys:
+                if cache.get(key) is None:
+                    cache.put(key, key)
+            hit_rates[policy] = cache.stats()["hit_rate"]
+
+        assert hit_rates["tinylfu"] > hit_rates["lru"]
+
+    def test_tinylfu_invalid_capacity(self):
+        """Test TinyLFU needs a positive capacity"""
+        with pytest.raises(ValueError):
+            TinyLFUPolicy(0)
+
+
+class TestBoundedCache:
+    """Test cases for BoundedCache implementation"""
+
+    def test_initialization_with_invalid_parameters(self):
+        """Test BoundedCache initialization with invalid parameters"""
+        with pytest.raises(ValueError):
+            BoundedCache()
+
+        with pytest.raises(ValueError):
+            BoundedCache(max_entries=0)
+
+        with pytest.raises(ValueError):
+            BoundedCache(max_entries=10, policy="fifo")
+
+    @pytest.mark.parametrize("policy", ["lru", "lfu", "tinylfu"])
+    def test_entry_limit(self, policy):
+        """Test the cache never holds more than max_entries"""
+        cache = BoundedCache(max_entries=10, policy=policy)
+        for i in range(100):
+            cache.put(i, i)
+            cache.get(i % 7)
+
+        assert len(cache) == 10
+        assert cache.stats()["evictions"] == 90
+
+    @pytest.mark.parametrize("policy", ["lru", "lfu", "tinylfu"])
+    def test_byte_limit(self, policy):
+        """Test the cache stays within max_bytes as weighed by the weigher"""
+        cache = BoundedCache(max_bytes=1000, policy=policy, weigher=lambda key, value: len(value))
+        for i in range(50):
+            cache.put(i, "x" * (i % 10 + 50))
+
+        assert cache.total_bytes <= 1000
+        assert cache.total_bytes == sum(len(value) for _, value in cache.items())
+
+    def test_update_reweighs(self):
+        """Test overwriting an entry replaces its weight"""
+        cache = BoundedCache(max_bytes=100, weigher=lambda key, value: len(value))
+        cache.put("a", "x" * 60)
+        cache.put("a", "x" * 10)
+
+        assert cache.total_bytes == 10
+        assert len(cache) == 1
+
+    def test_on_evict_called(self):
+        """Test evicted entries are handed to on_evict"""
+        evicted = []
+        cache = BoundedCache(max_entries=2, on_evict=lambda key, value: evicted.append((key, value)))
+        for key in "abc":
+            cache.put(key, key.upper())
+
+        assert evicted == [("a", "A")]
+
+    def test_many(self):
+        """Test batch get and put, and put_many leaving existing keys alone"""
+        cache = BoundedCache(max_entries=10)
+        cache.put_many({"a": 1, "b": 2})
+        cache.put_many({"a": 10, "c": 3}, replace=False)
+
+        assert cache.get_many(["a", "b", "c", "d"]) == {"a": 1, "b": 2, "c": 3}
+
+    def test_get_or_compute(self):
+        """Test the value is computed once and then served from the cache"""
+        cache = BoundedCache(max_entries=10)
+        calls = []
+
+        def compute():
+            calls.append(1)
+            return "value"
+
+        assert cache.get_or_compute("a", compute) == "value"
+        assert cache.get_or_compute("a", compute) == "value"
+        assert len(calls) == 1
+
+    def test_delete_and_clear(self):
+        """Test deleting and clearing entries"""
+        cache = BoundedCache(max_entries=10, policy="tinylfu")
+        cache.put("a", 1)
+        cache.put("b", 2)
+
+        assert cache.delete("a") is True
+        assert cache.delete("a") is False
+        cache.clear()
+        assert len(cache) == 0 and cache.total_bytes == 0
+        cache.put("c", 3)
+        assert cache.get("c") == 3
+
+    def test_sharded_cache(self):
+        """Test a sharded cache splits keys across segments and merges batches"""
+        cache = ShardedCache(lambda: BoundedCache(max_entries=100), segments=4)
+        cache.put_many({i: i * i for i in range(50)})
+
+        assert len(cache) == 50
+        assert cache.get(7) == 49
+        assert cache.get_many([1, 2, 99]) == {1: 1, 2: 4}
+        assert cache.delete(1) is True
+        assert 1 not in cache
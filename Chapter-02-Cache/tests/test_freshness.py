@@ -0,0 +1,118 @@
+import pytest
+import time
+from email.utils import formatdate
+from freshness import STORED_ARTICLE, CachedArticle, freshness_lifetime, parse_cache_control
+from origin_client import OriginResponse
+
+
+def response(**headers):
+    return OriginResponse("http://example.com/a", 200,
+                          [(name.replace("_", "-"), value) for name, value in headers.items()], b"")
+
+
+class TestFreshness:
+    """Test cases for HTTP freshness rules"""
+
+    def test_parse_cache_control(self):
+        """Test directives are lower-cased and values unquoted"""
+        assert parse_cache_control('Max-Age=60, no-cache, foo="bar"') == {
+            "max-age": "60", "no-cache": None, "foo": "bar"}
+        assert parse_cache_control(None) == {}
+
+    def test_defaults(self):
+        """Test responses without caching headers get the defaults"""
+        assert freshness_lifetime(response(), 300, 60) == (300, 60)
+
+    def test_s_maxage_over_max_age_over_expires(self):
+        """Test shared-cache precedence of the lifetime headers"""
+        now = time.time()
+        expires = formatdate(now + 1000, usegmt=True)
+        date = formatdate(now, usegmt=True)
+
+        assert freshness_lifetime(response(Cache_Control="max-age=10, s-maxage=20", Expires=expires), 300, 0)[0] == 20
+        assert freshness_lifetime(response(Cache_Control="max-age=10", Expires=expires), 300, 0)[0] == 10
+        assert freshness_lifetime(response(Expires=expires, Date=date), 300, 0)[0] == pytest.approx(1000, abs=1)
+        # An invalid Expires means already expired
+        assert freshness_lifetime(response(Expires="soon"), 300, 0)[0] == 0
+
+    def test_age_subtracted(self):
+        """Test the Age the response already has shortens its lifetime"""
+        assert freshness_lifetime(response(Cache_Control="max-age=100", Age="30"), 300, 0)[0] == 70
+        assert freshness_lifetime(response(Cache_Control="max-age=100", Age="300"), 300, 0)[0] == 0
+
+    def test_not_stored(self):
+        """Test no-store and private responses aren't cached"""
+        assert freshness_lifetime(response(Cache_Control="no-store"), 300, 60) is None
+        assert freshness_lifetime(response(Cache_Control="private, max-age=60"), 300, 60) is None
+
+    def test_revalidation_directives(self):
+        """Test no-cache forces revalidation and disables serving stale"""
+        assert freshness_lifetime(response(Cache_Control="no-cache, max-age=60"), 300, 60) == (0, 0)
+        assert freshness_lifetime(response(Cache_Control="max-age=60, must-revalidate"), 300, 60) == (60, 0)
+        assert freshness_lifetime(response(Cache_Control="max-age=60, stale-while-revalidate=5"), 300, 60) == (60, 5)
+
+
+class TestCachedArticle:
+    """Test cases for CachedArticle implementation"""
+
+    def test_fresh_then_stale_then_expired(self):
+        """Test the article's lifetime windows"""
+        article = CachedArticle("http://example.com/a", "hello", ttl=10, stale=5)
+        now = time.monotonic()
+
+        assert article.is_fresh(now)
+        assert article.is_servable_stale(now + 12)
+        assert not article.is_fresh(now + 12)
+        assert not article.is_servable_stale(now + 16)
+
+    def test_compression(self):
+        """Test large bodies are stored gzipped and read back unchanged"""
+        content = "lorem ipsum " * 500
+        article = CachedArticle("http://example.com/a", content, ttl=10, compress_min_bytes=1024)
+
+        assert article.compressed
+        assert article.gzip_body() is not None
+        assert len(article.body) < len(content)
+        assert article.content == content
+
+        small = CachedArticle("http://example.com/b", "hi", ttl=10, compress_min_bytes=1024)
+        assert not small.compressed and small.gzip_body() is None
+
+    def test_round_trip(self):
+        """Test the binary form keeps body, validators and lifetime"""
+        article = CachedArticle("http://example.com/a", "héllo " * 300, ttl=60, stale=30,
+                                etag='"v1"', last_modified="Mon, 01 Jan 2024 00:00:00 GMT",
+                                compress_min_bytes=100)
+        copy = CachedArticle.from_bytes(article.to_bytes())
+
+        assert copy.content == article.content
+        assert copy.compressed == article.compressed
+        assert copy.validators() == {"If-None-Match": '"v1"',
+                                     "If-Modified-Since": "Mon, 01 Jan 2024 00:00:00 GMT"}
+        assert copy.fresh_until == pytest.approx(article.fresh_until, abs=0.01)
+        assert copy.stale_until == pytest.approx(article.stale_until, abs=0.01)
+
+    @pytest.mark.parametrize("etag", ['W/"caf\u00e9-\u4e2d\u6587"', '"' + "x" * 70000 + '"', '"bad\udcff"'])
+    def test_round_trip_unusual_etags(self, etag):
+        """Test non-Latin-1, over 64KB and undecodable-byte ETags survive the binary form"""
+        article = CachedArticle("http://example.com/a", "hello", ttl=60, etag=etag, last_modified=etag)
+        copy = CachedArticle.from_bytes(memoryview(article.to_bytes()))
+
+        assert copy.etag == etag
+        assert copy.last_modified == etag
+        assert copy.content == "hello"
+
+    def test_truncated_rejected(self):
+        """Test a stored article cut short raises ValueError"""
+        data = CachedArticle("http://example.com/a", "hello", ttl=60, etag='"v1"').to_bytes()
+        with pytest.raises(ValueError):
+            CachedArticle.from_bytes(data[:STORED_ARTICLE.size + 2])
+
+    def test_renew(self):
+        """Test revalidation restarts the lifetime and replaces the validators"""
+        article = CachedArticle("http://example.com/a", "hello", ttl=0, etag='"v1"')
+        assert not article.is_fresh()
+
+        article.renew(60, etag='"v2"')
+        assert article.is_fresh()
+        assert article.validators() == {"If-None-Match": '"v2"'}
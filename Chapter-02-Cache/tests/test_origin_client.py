@@ -0,0 +1,113 @@
+import asyncio
+import gzip
+import pytest
+from origin_client import AsyncOriginClient, FetchError
+
+
+def serve(responses, test, **options):
+    """Run test(client, url) against a local origin answering each path with raw bytes"""
+    async def handle(reader, writer):
+        while True:
+            line = await reader.readline()
+            if not line:
+                break
+            path = line.split()[1].decode()
+            while (await reader.readline()) not in (b"\r\n", b""):
+                pass
+            writer.write(responses[path])
+            await writer.drain()
+            if b"Content-Length" not in responses[path] and b"chunked" not in responses[path]:
+                break
+        writer.close()
+
+    async def run():
+        server = await asyncio.start_server(handle, "127.0.0.1", 0)
+        client = AsyncOriginClient(**{"max_origins": 2, **options})
+        try:
+            return await test(client, f"http://127.0.0.1:{server.sockets[0].getsockname()[1]}")
+        finally:
+            await client.close()
+            server.close()
+
+    return asyncio.run(run())
+
+
+class TestAsyncOriginClient:
+    """Test cases for AsyncOriginClient implementation"""
+
+    def test_get_reuses_connection(self):
+        """Test bodies are decoded and keep-alive connections reused"""
+        body = gzip.compress(b"hello")
+        responses = {
+            "/plain": b"HTTP/1.1 200 OK\r\nContent-Length: 2\r\n\r\nok",
+            "/gzip": b"HTTP/1.1 200 OK\r\nContent-Encoding: gzip\r\nContent-Length: %d\r\n\r\n%s" % (len(body), body),
+            "/chunked": b"HTTP/1.1 200 OK\r\nTransfer-Encoding: chunked\r\n\r\n3\r\nabc\r\n2\r\nde\r\n0\r\n\r\n",
+        }
+
+        async def test(client, origin):
+            bodies = [(await client.get(origin + path)).body for path in responses]
+            return bodies, client.stats()
+
+        bodies, stats = serve(responses, test)
+        assert bodies == [b"ok", b"hello", b"abcde"]
+        assert stats["connections_opened"] == 1
+        assert stats["connections_reused"] == 2
+
+    def test_error_status(self):
+        """Test 4xx/5xx responses raise FetchError with the status"""
+        async def test(client, origin):
+            with pytest.raises(FetchError) as error:
+                await client.get(origin + "/missing")
+            return error.value.status
+
+        assert serve({"/missing": b"HTTP/1.1 404 Not Found\r\nContent-Length: 0\r\n\r\n"}, test) == 404
+
+    @pytest.mark.parametrize("raw", [
+        b"garbage\r\n\r\n",
+        b"HTTP/1.1 abc OK\r\nContent-Length: 0\r\n\r\n",
+        b"HTTP/1.1 200 OK\r\nTransfer-Encoding: chunked\r\n\r\nzz\r\n",
+        b"HTTP/1.1 200 OK\r\nContent-Encoding: gzip\r\nContent-Length: 5\r\n\r\nhello",
+    ])
+    def test_malformed_response(self, raw):
+        """Test unparsable or undecodable responses raise FetchError"""
+        async def test(client, origin):
+            with pytest.raises(FetchError):
+                await client.get(origin + "/bad")
+
+        serve({"/bad": raw}, test)
+
+    def test_origin_pools_bounded(self):
+        """Test only max_origins pools are kept, dropping the least recently used"""
+        async def test(client, origin):
+            port = origin.rsplit(":", 1)[1]
+            for host in ("127.0.0.1", "localhost", "127.0.0.1", "[::1]"):
+                try:
+                    await client.get(f"http://{host}:{port}/ok")
+                except FetchError:
+                    pass  # No IPv6 here: the pool is still created
+            return [host for _, host, _ in client.pools]
+
+        assert serve({"/ok": b"HTTP/1.1 200 OK\r\nContent-Length: 2\r\n\r\nok"}, test) == ["127.0.0.1", "::1"]
+
+    @pytest.mark.parametrize("raw", [
+        b"HTTP/1.1 200 OK\r\nContent-Length: 11\r\n\r\n0123456789a",
+        b"HTTP/1.1 200 OK\r\nTransfer-Encoding: chunked\r\n\r\n6\r\n012345\r\n5\r\n6789a\r\n0\r\n\r\n",
+        b"HTTP/1.1 200 OK\r\n\r\n0123456789a",
+        b"HTTP/1.1 200 OK\r\nContent-Encoding: gzip\r\nContent-Length: %d\r\n\r\n%s" % (
+            len(gzip.compress(b"x" * 11)), gzip.compress(b"x" * 11)),
+    ])
+    def test_body_limit(self, raw):
+        """Test bodies over max_body_bytes, raw or decoded, raise FetchError"""
+        async def test(client, origin):
+            with pytest.raises(FetchError, match="larger than 10 bytes"):
+                await client.get(origin + "/big")
+
+        serve({"/big": raw}, test, max_body_bytes=10)
+
+    def test_target_percent_encoded(self):
+        """Test spaces and non-ASCII in the URL are percent-encoded, existing escapes kept"""
+        async def test(client, origin):
+            return (await client.get(origin + "/a b/caf\u00e9%2F?q=x y&r=1")).body
+
+        responses = {"/a%20b/caf%C3%A9%2F?q=x%20y&r=1": b"HTTP/1.1 200 OK\r\nContent-Length: 2\r\n\r\nok"}
+        assert serve(responses, test) == b"ok"
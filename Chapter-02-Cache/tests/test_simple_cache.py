@@ -0,0 +1,149 @@
+import pytest
+import threading
+import time
+from simple_cache import SimpleCache, TTLSegment
+
+
+class TestTTLSegment:
+    """Test cases for TTLSegment implementation"""
+
+    def test_invalid_ttl(self):
+        """Test a per-call TTL must be positive"""
+        segment = TTLSegment()
+        with pytest.raises(ValueError):
+            segment.put("a", 1, ttl=0)
+
+        with pytest.raises(ValueError):
+            segment.put_many({"a": 1}, ttl=-1)
+
+    def test_expired_entry_missed_before_sweep(self):
+        """Test an entry past its expiry is a miss even before the wheel reaches it"""
+        segment = TTLSegment(default_ttl=0.05)
+        segment.put("a", 1)
+        time.sleep(0.06)
+
+        assert segment.get("a", "missing") == "missing"
+        assert "a" not in segment
+        assert len(segment) == 0
+
+    def test_sweep_budget_bounds_work(self):
+        """Test each call expires at most sweep_budget entries off the wheel"""
+        segment = TTLSegment(sweep_budget=4)
+        segment.put_many({i: i for i in range(10)}, ttl=0.01)
+        time.sleep(0.25)
+
+        # Empty ticks walked on the way count as work too
+        segment.get("other")
+        left = len(segment)
+        assert left >= 6
+        assert segment.sweep() == left
+        assert len(segment) == 0
+
+    def test_items_skip_expired(self):
+        """Test items() only returns live entries"""
+        segment = TTLSegment()
+        segment.put("short", 1, ttl=0.01)
+        segment.put("long", 2, ttl=60)
+        time.sleep(0.02)
+
+        assert segment.items() == [("long", 2)]
+
+
+class TestSimpleCache:
+    """Test cases for SimpleCache implementation"""
+
+    def test_initialization_with_invalid_parameters(self):
+        """Test SimpleCache initialization with invalid parameters"""
+        with pytest.raises(ValueError):
+            SimpleCache(default_ttl=0)
+
+        with pytest.raises(ValueError):
+            SimpleCache(sweep_budget=0)
+
+        with pytest.raises(ValueError):
+            SimpleCache(segments=0)
+
+    def test_put_and_get(self):
+        """Test values are returned until cleared"""
+        cache = SimpleCache()
+        cache.put("a", "1")
+
+        assert cache.get("a") == "1"
+        assert cache.get("b") is None
+        assert cache.size() == 1
+        cache.clear()
+        assert cache.get("a") is None
+        assert cache.size() == 0
+
+    def test_default_and_per_put_ttl(self):
+        """Test entries expire after default_ttl unless put with their own ttl"""
+        cache = SimpleCache(default_ttl=0.05)
+        cache.put("default", "1")
+        cache.put("long", "2", ttl=60)
+        time.sleep(0.06)
+
+        assert cache.get("default") is None
+        assert cache.get("long") == "2"
+
+    def test_sweep_removes_expired(self):
+        """Test sweep() removes expired entries from every segment and counts them"""
+        cache = SimpleCache(default_ttl=0.01, segments=4)
+        cache.put_many({f"key{i}": str(i) for i in range(20)})
+        cache.put("live", "x", ttl=60)
+        time.sleep(0.25)
+
+        # Reads may already have swept some expired entries
+        removed = cache.sweep()
+        assert cache.size() == 1
+        assert removed <= 20
+        assert cache.sweep() == 0
+
+    def test_get_many_and_put_many(self):
+        """Test batch operations across segments return only cached keys"""
+        cache = SimpleCache(segments=4)
+        cache.put_many({f"key{i}": str(i) for i in range(10)})
+
+        found = cache.get_many([f"key{i}" for i in range(15)])
+        assert found == {f"key{i}": str(i) for i in range(10)}
+        assert cache.size() == 10
+
+    def test_get_or_compute_runs_once(self):
+        """Test concurrent callers for one key compute it once"""
+        cache = SimpleCache()
+        calls = []
+        results = []
+
+        def compute():
+            calls.append(1)
+            time.sleep(0.05)
+            return "value"
+
+        def caller():
+            results.append(cache.get_or_compute("a", compute))
+
+        threads = [threading.Thread(target=caller) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert len(calls) == 1
+        assert results == ["value"] * 8
+
+    def test_get_or_compute_recomputes_after_expiry(self):
+        """Test an expired value is computed again"""
+        cache = SimpleCache()
+        values = iter(["first", "second"])
+
+        assert cache.get_or_compute("a", lambda: next(values), ttl=0.05) == "first"
+        assert cache.get_or_compute("a", lambda: next(values), ttl=0.05) == "first"
+        time.sleep(0.06)
+        assert cache.get_or_compute("a", lambda: next(values)) == "second"
+
+    def test_keys_spread_over_segments(self):
+        """Test keys land in more than one segment"""
+        cache = SimpleCache(segments=8)
+        cache.put_many({f"key{i}": str(i) for i in range(100)})
+
+        assert sum(1 for segment in cache.shards.segments if len(segment)) > 1
+        assert cache.size() == 100
@@ -0,0 +1,61 @@
+import asyncio
+from single_flight import AsyncSingleFlight
+
+
+class TestSingleFlight:
+    """Test cases for AsyncSingleFlight implementation"""
+
+    def test_async_calls_share_one_execution(self):
+        """Test concurrent coroutines share one task per key"""
+        async def run():
+            flight = AsyncSingleFlight()
+            calls = []
+
+            async def fetch(key):
+                calls.append(key)
+                await asyncio.sleep(0.01)
+                return key.upper()
+
+            results = await asyncio.gather(*(flight.do(key, lambda key=key: fetch(key)) for key in "aaab"))
+            return results, calls, flight.stats()
+
+        results, calls, stats = asyncio.run(run())
+        assert results == ["A", "A", "A", "B"]
+        assert sorted(calls) == ["a", "b"]
+        assert stats == {"executions": 2, "coalesced": 2, "in_flight": 0}
+
+    def test_async_cancelled_caller_doesnt_cancel_others(self):
+        """Test a caller giving up leaves the shared call running for the rest"""
+        async def run():
+            flight = AsyncSingleFlight()
+
+            async def fetch():
+                await asyncio.sleep(0.02)
+                return "value"
+
+            impatient = asyncio.ensure_future(flight.do("key", fetch))
+            patient = asyncio.ensure_future(flight.do("key", fetch))
+            await asyncio.sleep(0.005)
+            impatient.cancel()
+            return await patient
+
+        assert asyncio.run(run()) == "value"
+
+    def test_async_errors_shared_and_forgotten(self):
+        """Test every waiter sees the error, and the next call runs again"""
+        async def run():
+            flight = AsyncSingleFlight()
+
+            async def fail():
+                await asyncio.sleep(0.01)
+                raise RuntimeError("origin down")
+
+            async def fetch():
+                return "value"
+
+            errors = await asyncio.gather(flight.do("key", fail), flight.do("key", fail), return_exceptions=True)
+            return errors, await flight.do("key", fetch), flight.in_flight()
+
+        errors, value, in_flight = asyncio.run(run())
+        assert all(isinstance(error, RuntimeError) for error in errors)
+        assert value == "value" and in_flight == 0
@@ -0,0 +1,103 @@
+import os
+import pytest
+import time
+from snapshot import ENTRY, MAGIC, Snapshotter, read_snapshot, write_snapshot
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / "cache.snapshot")
+
+
+def restore(path, batch_size=500):
+    return [entry for batch in read_snapshot(path, batch_size) for entry in batch]
+
+
+class TestSnapshotFile:
+    """Test cases for write_snapshot and read_snapshot"""
+
+    def test_round_trip(self, path):
+        """Test entries come back in order, including non-ASCII keys and empty values"""
+        entries = [("/a", b"alpha"), ("/café", b"\x00\xff" * 100), ("/empty", b"")]
+
+        assert write_snapshot(path, entries) == 3
+        assert restore(path) == entries
+        assert not os.path.exists(path + ".tmp")
+
+    def test_batches(self, path):
+        """Test entries stream back in batches of batch_size"""
+        write_snapshot(path, ((f"/{i}", b"x") for i in range(7)))
+
+        assert [len(batch) for batch in read_snapshot(path, batch_size=3)] == [3, 3, 1]
+
+    def test_missing_or_foreign_file(self, path):
+        """Test a missing file or one without the magic header restores nothing"""
+        assert restore(path) == []
+        with open(path, "wb") as out:
+            out.write(b"not a snapshot")
+        assert restore(path) == []
+
+    def test_stops_at_corrupt_entry(self, path):
+        """Test reading stops at the first entry whose checksum doesn't match"""
+        write_snapshot(path, [("/a", b"alpha"), ("/b", b"bravo"), ("/c", b"charlie")])
+        second_value = len(MAGIC) + ENTRY.size + 2 + 5 + ENTRY.size + 2
+        with open(path, "r+b") as file:
+            file.seek(second_value)
+            file.write(b"X")
+
+        assert restore(path) == [("/a", b"alpha")]
+
+    def test_stops_at_truncated_entry(self, path):
+        """Test a snapshot cut off mid-entry restores the complete entries"""
+        write_snapshot(path, [("/a", b"alpha"), ("/b", b"bravo")])
+        os.truncate(path, os.path.getsize(path) - 2)
+
+        assert restore(path) == [("/a", b"alpha")]
+
+    def test_rewrite_replaces(self, path):
+        """Test a new snapshot replaces the previous one"""
+        write_snapshot(path, [("/old", b"1")])
+        write_snapshot(path, [("/new", b"2")])
+
+        assert restore(path) == [("/new", b"2")]
+
+
+class TestSnapshotter:
+    """Test cases for Snapshotter implementation"""
+
+    def test_initialization_with_invalid_parameters(self, path):
+        """Test Snapshotter initialization with invalid parameters"""
+        with pytest.raises(ValueError):
+            Snapshotter(list, path, interval=0)
+
+    def test_periodic_and_final_snapshot(self, path):
+        """Test snapshots are written on the interval and once more on stop"""
+        entries = {"/a": b"1"}
+        snapshotter = Snapshotter(lambda: list(entries.items()), path, interval=0.02)
+        snapshotter.start()
+        time.sleep(0.15)
+        entries["/b"] = b"2"
+        snapshotter.stop()
+
+        stats = snapshotter.stats()
+        assert stats["snapshots"] >= 2
+        assert stats["last_entries"] == 2
+        assert stats["failures"] == 0
+        assert restore(path) == [("/a", b"1"), ("/b", b"2")]
+
+    def test_stop_without_final_snapshot(self, path):
+        """Test stop(final_snapshot=False) writes nothing more"""
+        snapshotter = Snapshotter(lambda: [("/a", b"1")], path, interval=60)
+        snapshotter.start()
+        snapshotter.stop(final_snapshot=False)
+
+        assert snapshotter.stats()["snapshots"] == 0
+        assert not os.path.exists(path)
+
+    def test_failure_counted(self, tmp_path):
+        """Test a snapshot that can't be written is counted, not raised"""
+        snapshotter = Snapshotter(lambda: [("/a", b"1")], str(tmp_path / "missing" / "cache.snapshot"))
+        snapshotter.snapshot()
+
+        assert snapshotter.stats()["failures"] == 1
+        assert snapshotter.stats()["snapshots"] == 0
@@ -0,0 +1,76 @@
+import pytest
+from timer_wheel import TimerWheel
+
+
+class TestTimerWheel:
+    """Test cases for TimerWheel implementation"""
+
+    def test_initialization_with_invalid_parameters(self):
+        """Test TimerWheel initialization with invalid parameters"""
+        with pytest.raises(ValueError):
+            TimerWheel(tick=0)
+
+        with pytest.raises(ValueError):
+            TimerWheel(slots=0)
+
+    def test_keys_expire_within_one_tick(self):
+        """Test keys come out once their tick has passed, not before"""
+        wheel = TimerWheel(tick=1.0, slots=8, now=0.0)
+        wheel.schedule("a", 2.5)
+        wheel.schedule("b", 4.0)
+
+        assert wheel.advance(now=2.9) == []
+        assert wheel.advance(now=3.0) == ["a"]
+        assert wheel.advance(now=5.0) == ["b"]
+        assert len(wheel) == 0
+
+    def test_reschedule_and_cancel(self):
+        """Test rescheduling moves a key and cancelling removes it"""
+        wheel = TimerWheel(tick=1.0, slots=8, now=0.0)
+        wheel.schedule("a", 1.0)
+        wheel.schedule("a", 5.0)
+        wheel.schedule("b", 1.0)
+
+        assert wheel.cancel("b") is True
+        assert wheel.cancel("b") is False
+        assert wheel.advance(now=3.0) == []
+        assert wheel.advance(now=6.0) == ["a"]
+
+    def test_deadlines_beyond_one_revolution(self):
+        """Test a far deadline sharing a slot waits for its own round"""
+        wheel = TimerWheel(tick=1.0, slots=4, now=0.0)
+        wheel.schedule("near", 1.5)
+        wheel.schedule("far", 5.5)
+
+        assert wheel.advance(now=2.0) == ["near"]
+        assert wheel.advance(now=5.9) == []
+        assert wheel.advance(now=6.0) == ["far"]
+
+    def test_past_deadline_expires_on_next_advance(self):
+        """Test a deadline already behind the sweep isn't delayed a revolution"""
+        wheel = TimerWheel(tick=1.0, slots=4, now=10.0)
+        wheel.schedule("late", 3.0)
+
+        assert wheel.advance(now=11.0) == ["late"]
+
+    def test_incremental_sweep(self):
+        """Test max_work spreads expiring a large batch over several calls"""
+        wheel = TimerWheel(tick=1.0, slots=8, now=0.0)
+        for i in range(100):
+            wheel.schedule(i, 1.0)
+
+        expired = wheel.advance(now=2.0, max_work=30)
+        assert 0 < len(expired) <= 30
+        while len(expired) < 100:
+            batch = wheel.advance(now=2.0, max_work=30)
+            assert batch
+            expired += batch
+        assert sorted(expired) == list(range(100))
+
+    def test_long_idle_period(self):
+        """Test advancing far ahead sweeps each slot once and expires everything due"""
+        wheel = TimerWheel(tick=1.0, slots=4, now=0.0)
+        for i in range(10):
+            wheel.schedule(i, float(i))
+
+        assert sorted(wheel.advance(now=1000.0)) == list(range(10))
@@ -0,0 +1,99 @@
+"""
+Hashed timer wheel for active, incremental expiry of cache keys
+"""
+
+import time
+from collections import OrderedDict
+from typing import Dict, Hashable, List, Optional
+
+
+class TimerWheel:
+    """
+    Hashed timing wheel (Varghese & Lauck).
+
+    Time is cut into ticks of `tick` seconds and each deadline goes into
+    slot (deadline tick % slots), so scheduling and cancelling are O(1).
+    advance() walks the slots whose tick has passed and returns the keys
+    that are due, at most one tick after their deadline. Deadlines more than
+    one revolution away share a slot with nearer ones and are skipped until
+    their round comes.
+
+    Sweeps are incremental: advance() examines at most max_work entries and
+    ticks per call and resumes where it stopped, so expiring a large batch of
+    keys is spread over many calls instead of stalling one.
+    """
+
+    def __init__(self, tick: float = 0.1, slots: int = 1024, now: Optional[float] = None):
+        if tick <= 0 or slots <= 0:
+            raise ValueError("Tick and slot count must be greater than 0")
+        self.tick = tick
+        self.slots: List["OrderedDict[Hashable, float]"] = [OrderedDict() for _ in range(slots)]
+        self.slot_of: Dict[Hashable, int] = {}
+        # Next tick to sweep, and how many entries of it are still unexamined
+        self.current_tick = self._tick_of(time.monotonic() if now is None else now)
+        self.unexamined: Optional[int] = None
+
+    def _tick_of(self, deadline: float) -> int:
+        return int(deadline / self.tick)
+
+    def schedule(self, key: Hashable, deadline: float) -> None:
+        """(Re)schedule key to expire at deadline (time.monotonic() seconds)."""
+        self.cancel(key)
+        # Never place a deadline behind the sweep position, or it would wait a full revolution
+        tick = max(self._tick_of(deadline), self.current_tick)
+        index = tick % len(self.slots)
+        self.slots[index][key] = deadline
+        self.slot_of[key] = index
+        if tick == self.current_tick and self.unexamined is not None:
+            # Joining the slot mid-sweep: make sure this pass still sees it
+            self.unexamined += 1
+
+    def cancel(self, key: Hashable) -> bool:
+        index = self.slot_of.pop(key, None)
+        if index is None:
+            return False
+        del self.slots[index][key]
+        return True
+
+    def advance(self, now: Optional[float] = None, max_work: Optional[int] = None) -> List[Hashable]:
+        """Remove and return keys whose deadline is <= now, doing at most max_work steps."""
+        now = time.monotonic() if now is None else now
+        now_tick = self._tick_of(now)
+        # After a long idle period one revolution covers every slot
+        if now_tick - self.current_tick > len(self.slots):
+            self.current_tick = now_tick - len(self.slots)
+            self.unexamined = None
+
+        expired = []
+        work = 0
+        # Only finished ticks are swept, so a key expires at most one tick late
+        while self.current_tick < now_tick and (max_work is None or work < max_work):
+            slot = self.slots[self.current_tick % len(self.slots)]
+            if self.unexamined is None:
+                self.unexamined = len(slot)
+            # Due keys are removed; the rest belong to a later round and are
+            # rotated to the back, so the front is always the next unexamined entry
+            while self.unexamined > 0 and slot and (max_work is None or work < max_work):
+                key, deadline = slot.popitem(last=False)
+                self.unexamined -= 1
+                work += 1
+                if deadline <= now:
+                    del self.slot_of[key]
+                    expired.append(key)
+                else:
+                    slot[key] = deadline
+            if self.unexamined > 0 and slot:
+                break
+            self.current_tick += 1
+            self.unexamined = None
+            work += 1
+        return expired
+
+    def clear(self) -> None:
+        for slot in self.slots:
+            slot.clear()
+        self.slot_of.clear()
+        self.unexamined = None
+
+    def __len__(self) -> int:
+        return len(self.slot_of)
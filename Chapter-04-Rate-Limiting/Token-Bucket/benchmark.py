@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Consume throughput of one shared bucket as threads are added:
+TokenBucket against LeasedTokenBucket
+"""
+
+import argparse
+import sys
+import threading
+import time
+
+from token_bucket import LeasedTokenBucket, TokenBucket
+
+
+def make_limiters(args):
+    """Name -> factory for each limiter compared; buckets are big enough to always admit"""
+    def plain():
+        return TokenBucket(capacity=10 ** 12, refill_rate=10 ** 12)
+
+    def leased():
+        return LeasedTokenBucket(plain(), lease_size=args.lease_size)
+
+    return {"TokenBucket": plain, f"Leased({args.lease_size})": leased}
+
+
+def run(limiter, threads: int, ops: int, check_tokens: bool) -> float:
+    """consume() calls per second with `threads` threads sharing one limiter"""
+    start = threading.Barrier(threads + 1)
+
+    def worker():
+        consume = limiter.consume
+        start.wait()
+        for _ in range(ops):
+            consume(1)
+            if check_tokens:
+                # What the demos in main.py do after every request
+                limiter.get_available_tokens()
+
+    workers = [threading.Thread(target=worker) for _ in range(threads)]
+    for thread in workers:
+        thread.start()
+    start.wait()
+    began = time.perf_counter()
+    for thread in workers:
+        thread.join()
+    return threads * ops / (time.perf_counter() - began)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark consume throughput by thread count")
+    parser.add_argument("--threads", type=int, nargs="+", default=[1, 2, 4, 8, 16])
+    parser.add_argument("--ops", type=int, default=200_000, help="consume() calls per thread")
+    parser.add_argument("--lease-size", type=int, default=16)
+    parser.add_argument("--check-tokens", action="store_true",
+                        help="Also call get_available_tokens() after every consume, like main.py")
+    args = parser.parse_args()
+
+    limiters = make_limiters(args)
+    gil = getattr(sys, "_is_gil_enabled", lambda: True)()
+    print(f"Python {sys.version.split()[0]}, GIL {'enabled' if gil else 'disabled'}")
+    print(f"{'threads':>8}" + "".join(f"{name:>18}" for name in limiters))
+    for threads in args.threads:
+        row = [run(make(), threads, args.ops, args.check_tokens) for make in limiters.values()]
+        print(f"{threads:>8}" + "".join(f"{ops / 1000:>14.0f}k/s" for ops in row))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,196 @@
+import asyncio
+import pytest
+import time
+import threading
+from token_bucket import CONTINUOUS_REFILL, LeasedTokenBucket, TokenBucket
+
+
+class TestAcquire:
+    """Test cases for TokenBucket.acquire and acquire_async"""
+
+    def test_acquire_available_tokens(self):
+        """Test acquiring tokens that are already there doesn't wait"""
+        bucket = TokenBucket(capacity=10, refill_rate=2, refill_interval=1)
+
+        started = time.monotonic()
+        assert bucket.acquire(3) is True
+        assert time.monotonic() - started < 0.01
+        assert bucket.tokens == 7
+
+    def test_acquire_invalid_tokens(self):
+        """Test acquiring negative or more than capacity tokens raises error"""
+        bucket = TokenBucket(capacity=10, refill_rate=2, refill_interval=1)
+
+        with pytest.raises(ValueError):
+            bucket.acquire(-1)
+
+        # Could never succeed, so fail instead of waiting forever
+        with pytest.raises(ValueError):
+            bucket.acquire(11)
+
+        assert bucket.acquire(0) is True
+
+    def test_acquire_waits_exactly_until_refill(self):
+        """Test acquire sleeps until the tokens exist, in continuous mode"""
+        bucket = TokenBucket(capacity=1, refill_rate=20, refill_interval=1, refill_mode=CONTINUOUS_REFILL)
+        bucket.consume(1)
+
+        started = time.monotonic()
+        assert bucket.acquire(1) is True
+        elapsed = time.monotonic() - started
+
+        # One token at 20 per second
+        assert 0.049 <= elapsed < 0.08
+        assert bucket.tokens < 1
+
+    def test_acquire_waits_for_next_interval(self):
+        """Test acquire sleeps until the next whole interval, in interval mode"""
+        bucket = TokenBucket(capacity=2, refill_rate=2, refill_interval=0.1)
+        bucket.consume(2)
+
+        started = time.monotonic()
+        assert bucket.acquire(1) is True
+        elapsed = time.monotonic() - started
+
+        assert 0.099 <= elapsed < 0.13
+
+    def test_acquire_timeout(self):
+        """Test acquire gives up after the timeout and leaves the line"""
+        bucket = TokenBucket(capacity=10, refill_rate=1, refill_interval=100)
+        bucket.consume(10)
+
+        started = time.monotonic()
+        assert bucket.acquire(5, timeout=0.05) is False
+        assert 0.049 <= time.monotonic() - started < 0.08
+
+        # Nobody is left waiting, so consume works again
+        bucket.reset()
+        assert bucket.consume(1) is True
+
+    def test_acquire_fifo_fairness(self):
+        """Test a large request isn't overtaken by smaller ones queued after it"""
+        bucket = TokenBucket(capacity=10, refill_rate=100, refill_interval=1, refill_mode=CONTINUOUS_REFILL)
+        bucket.consume(10)
+        served = []
+
+        def acquire(name, tokens):
+            bucket.acquire(tokens)
+            served.append(name)
+
+        large = threading.Thread(target=acquire, args=("large", 10))
+        large.start()
+        time.sleep(0.02)
+        small = [threading.Thread(target=acquire, args=(f"small-{i}", 1)) for i in range(3)]
+        for thread in small:
+            thread.start()
+            time.sleep(0.005)
+
+        # consume() doesn't jump the line either
+        assert bucket.consume(1) is False
+
+        for thread in [large] + small:
+            thread.join()
+        assert served == ["large", "small-0", "small-1", "small-2"]
+
+    def test_reset_wakes_waiter(self):
+        """Test that resetting the bucket serves a waiter right away"""
+        bucket = TokenBucket(capacity=10, refill_rate=1, refill_interval=100)
+        bucket.consume(10)
+        results = []
+
+        waiter = threading.Thread(target=lambda: results.append(bucket.acquire(5, timeout=5)))
+        waiter.start()
+        time.sleep(0.02)
+
+        started = time.monotonic()
+        bucket.reset()
+        waiter.join()
+        assert results == [True]
+        assert time.monotonic() - started < 0.1
+
+    def test_leased_bucket_does_not_jump_the_line(self):
+        """Test a leased front end fails while acquire() callers are waiting"""
+        bucket = TokenBucket(capacity=10, refill_rate=1, refill_interval=100)
+        leased = LeasedTokenBucket(bucket)
+        bucket.consume(8)
+
+        waiter = threading.Thread(target=bucket.acquire, args=(5, 0.1))
+        waiter.start()
+        time.sleep(0.02)
+
+        assert leased.consume(1) is False
+        waiter.join()
+
+    def test_acquire_async_waits_in_order(self):
+        """Test acquire_async serves tasks in order, each exactly when its tokens exist"""
+        async def run():
+            bucket = TokenBucket(capacity=5, refill_rate=50, refill_interval=1, refill_mode=CONTINUOUS_REFILL)
+            bucket.consume(5)
+            started = time.monotonic()
+            served = []
+
+            async def acquire(name, tokens):
+                await bucket.acquire_async(tokens)
+                served.append((name, time.monotonic() - started))
+
+            await asyncio.gather(*(acquire(name, tokens) for name, tokens in [("a", 5), ("b", 1), ("c", 3)]))
+            return served
+
+        served = asyncio.run(run())
+
+        assert [name for name, _ in served] == ["a", "b", "c"]
+        # 5, 6 and 9 tokens at 50 per second
+        for (_, elapsed), expected in zip(served, [0.1, 0.12, 0.18]):
+            assert expected - 0.001 <= elapsed < expected + 0.03
+
+    def test_acquire_async_timeout_and_cancel(self):
+        """Test acquire_async leaves the line on timeout or cancellation"""
+        async def run():
+            bucket = TokenBucket(capacity=10, refill_rate=1, refill_interval=100)
+            bucket.consume(10)
+
+            assert await bucket.acquire_async(5, timeout=0.02) is False
+
+            task = asyncio.ensure_future(bucket.acquire_async(5))
+            await asyncio.sleep(0.01)
+            task.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await task
+
+            bucket.reset()
+            return bucket.consume(1)
+
+        assert asyncio.run(run()) is True
+
+    def test_acquire_async_woken_from_thread(self):
+        """Test a task waiting in line is served after a thread ahead of it"""
+        bucket = TokenBucket(capacity=4, refill_rate=100, refill_interval=1, refill_mode=CONTINUOUS_REFILL)
+        bucket.consume(4)
+        served = []
+
+        def acquire_in_thread():
+            bucket.acquire(4)
+            served.append("thread")
+
+        async def run():
+            thread = threading.Thread(target=acquire_in_thread)
+            thread.start()
+            await asyncio.sleep(0.01)
+            await bucket.acquire_async(1, timeout=1)
+            served.append("task")
+            thread.join()
+
+        asyncio.run(run())
+        assert served == ["thread", "task"]
+
+    def test_acquire_throttles_to_rate(self):
+        """Test that acquiring in a loop runs at the refill rate"""
+        async def run():
+            bucket = TokenBucket(capacity=10, refill_rate=200, refill_interval=1, refill_mode=CONTINUOUS_REFILL)
+            bucket.consume(10)
+            started = time.monotonic()
+            await asyncio.gather(*(bucket.acquire_async() for _ in range(40)))
+            return time.monotonic() - started
+
+        # 40 tokens at 200 per second
+        assert 0.199 <= asyncio.run(run()) < 0.25
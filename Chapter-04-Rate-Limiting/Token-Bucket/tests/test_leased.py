@@ -0,0 +1,124 @@
+import pytest
+import time
+import threading
+from token_bucket import LeasedTokenBucket, TokenBucket
+
+
+class TestLeasedTokenBucket:
+    """Test cases for LeasedTokenBucket implementation"""
+
+    def test_initialization_with_invalid_parameters(self):
+        """Test LeasedTokenBucket initialization with invalid parameters"""
+        bucket = TokenBucket(capacity=10, refill_rate=2, refill_interval=1)
+
+        with pytest.raises(ValueError):
+            LeasedTokenBucket(bucket, lease_size=0)
+
+        with pytest.raises(ValueError):
+            LeasedTokenBucket(bucket, lease_ttl=0)
+
+    def test_consume_takes_a_lease(self):
+        """Test that the first consume leases tokens and later ones spend them locally"""
+        bucket = TokenBucket(capacity=100, refill_rate=1, refill_interval=100)
+        leased = LeasedTokenBucket(bucket, lease_size=16, lease_ttl=100)
+
+        assert leased.consume(1) is True
+        assert bucket.tokens == 84  # 16 leased, 1 of them spent
+
+        for _ in range(15):
+            assert leased.consume(1) is True
+        assert bucket.tokens == 84  # Spent from the lease without touching the bucket
+
+        assert leased.consume(1) is True
+        assert bucket.tokens == 68
+
+    def test_consume_zero_and_negative_tokens(self):
+        """Test consuming zero tokens is free and negative tokens raise error"""
+        bucket = TokenBucket(capacity=10, refill_rate=2, refill_interval=1)
+        leased = LeasedTokenBucket(bucket)
+
+        assert leased.consume(0) is True
+        assert bucket.tokens == 10
+
+        with pytest.raises(ValueError):
+            leased.consume(-1)
+
+    def test_lease_limited_by_available_tokens(self):
+        """Test that a lease takes only what the bucket has and fails when it is empty"""
+        bucket = TokenBucket(capacity=5, refill_rate=1, refill_interval=100)
+        leased = LeasedTokenBucket(bucket, lease_size=16, lease_ttl=100)
+
+        assert leased.consume(1) is True
+        assert bucket.tokens == 0
+        assert leased.consume(4) is True
+        assert leased.consume(1) is False
+
+    def test_request_larger_than_lease(self):
+        """Test that requests bigger than lease_size are still served"""
+        bucket = TokenBucket(capacity=100, refill_rate=1, refill_interval=100)
+        leased = LeasedTokenBucket(bucket, lease_size=4, lease_ttl=100)
+
+        assert leased.consume(20) is True
+        assert bucket.tokens == 80
+
+        assert leased.consume(200) is False
+        assert bucket.tokens == 80
+
+    def test_expired_lease_handed_back(self):
+        """Test that an expired lease's tokens go back to the bucket"""
+        bucket = TokenBucket(capacity=100, refill_rate=1, refill_interval=100)
+        leased = LeasedTokenBucket(bucket, lease_size=16, lease_ttl=0.05)
+
+        leased.consume(1)
+        assert bucket.tokens == 84
+
+        time.sleep(0.1)
+
+        # 15 unused tokens handed back, then a new lease of 16 taken
+        leased.consume(1)
+        assert bucket.tokens == 83
+
+    def test_release(self):
+        """Test handing the current lease back explicitly"""
+        bucket = TokenBucket(capacity=100, refill_rate=1, refill_interval=100)
+        leased = LeasedTokenBucket(bucket, lease_size=16, lease_ttl=100)
+
+        leased.consume(3)
+        leased.release()
+
+        assert bucket.tokens == 97
+        assert leased.get_available_tokens() == 97
+
+    def test_get_available_tokens_includes_refill(self):
+        """Test the lock-free token count accounts for pending refill"""
+        bucket = TokenBucket(capacity=10, refill_rate=5, refill_interval=0.1)
+        leased = LeasedTokenBucket(bucket, lease_size=1)
+
+        bucket.consume(10)
+        assert leased.get_available_tokens() == 0
+
+        # Wait for a bit more than one interval to allow refill
+        time.sleep(0.15)
+
+        assert leased.get_available_tokens() >= 5
+
+    def test_thread_safety(self):
+        """Test that leasing never admits more than the bucket holds"""
+        bucket = TokenBucket(capacity=100, refill_rate=1, refill_interval=100)
+        leased = LeasedTokenBucket(bucket, lease_size=8, lease_ttl=100)
+        results = []
+
+        def consume_tokens():
+            for _ in range(50):
+                results.append(leased.consume(1))
+            leased.release()
+
+        threads = [threading.Thread(target=consume_tokens) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        # Every token was either admitted or handed back
+        assert sum(results) + bucket.tokens == 100
+        assert sum(results) <= 100
@@ -0,0 +1,276 @@
+import pytest
+import random
+import time
+import threading
+import token_bucket.registry as registry_module
+from token_bucket import TokenBucketRegistry
+
+
+@pytest.fixture(params=["numpy", "plain"])
+def batch_mode(request, monkeypatch):
+    """Run consume_many both vectorized and without numpy"""
+    if request.param == "numpy":
+        pytest.importorskip("numpy")
+        # Vectorize even the tests' small batches
+        monkeypatch.setattr(registry_module, "VECTORIZE_MIN_REQUESTS", 1)
+    else:
+        monkeypatch.setattr(registry_module, "np", None)
+    return request.param
+
+
+class TestTokenBucketRegistry:
+    """Test cases for TokenBucketRegistry implementation"""
+
+    def test_initialization(self):
+        """Test TokenBucketRegistry initialization with valid parameters"""
+        registry = TokenBucketRegistry(capacity=10, refill_rate=2, refill_interval=1)
+        assert registry.capacity == 10
+        assert registry.refill_rate == 2
+        assert registry.refill_interval == 1
+        assert len(registry) == 0  # No keys tracked until first use
+
+    def test_initialization_with_invalid_parameters(self):
+        """Test TokenBucketRegistry initialization with invalid parameters"""
+        with pytest.raises(ValueError):
+            TokenBucketRegistry(capacity=0, refill_rate=2)
+
+        with pytest.raises(ValueError):
+            TokenBucketRegistry(capacity=10, refill_rate=0)
+
+        with pytest.raises(ValueError):
+            TokenBucketRegistry(capacity=10, refill_rate=2, refill_interval=0)
+
+        with pytest.raises(ValueError):
+            TokenBucketRegistry(capacity=10, refill_rate=2, stripes=0)
+
+        with pytest.raises(ValueError):
+            TokenBucketRegistry(capacity=10, refill_rate=2, sweep_budget=-1)
+
+    def test_keys_have_independent_buckets(self):
+        """Test that each key consumes from its own bucket"""
+        registry = TokenBucketRegistry(capacity=3, refill_rate=1, refill_interval=100)
+
+        assert all(registry.consume("alice") for _ in range(3))
+        assert registry.consume("alice") is False
+
+        # Another key still has a full bucket
+        assert registry.consume("bob", 3) is True
+        assert registry.get_available_tokens("alice") == 0
+        assert registry.get_available_tokens("bob") == 0
+        assert len(registry) == 2
+
+    def test_consume_failure_leaves_tokens(self):
+        """Test failed consumption doesn't change the key's tokens"""
+        registry = TokenBucketRegistry(capacity=10, refill_rate=2, refill_interval=100)
+
+        assert registry.consume("alice", 15) is False
+        assert registry.get_available_tokens("alice") == 10
+
+        assert registry.consume("alice", 8) is True
+        assert registry.consume("alice", 5) is False
+        assert registry.get_available_tokens("alice") == 2
+
+    def test_consume_zero_and_negative_tokens(self):
+        """Test consuming zero tokens is free and negative tokens raise error"""
+        registry = TokenBucketRegistry(capacity=10, refill_rate=2)
+
+        assert registry.consume("alice", 0) is True
+        assert "alice" not in registry
+
+        with pytest.raises(ValueError):
+            registry.consume("alice", -1)
+
+    def test_untracked_key_is_full(self):
+        """Test reading an unknown key reports capacity without tracking it"""
+        registry = TokenBucketRegistry(capacity=10, refill_rate=2)
+
+        assert registry.get_available_tokens("alice") == 10
+        assert "alice" not in registry
+
+    def test_token_refill_over_time(self):
+        """Test that a key's tokens refill like a TokenBucket"""
+        registry = TokenBucketRegistry(capacity=10, refill_rate=5, refill_interval=0.1)
+
+        assert registry.consume("alice", 10) is True
+        assert registry.consume("alice") is False
+
+        # Wait for a bit more than one interval to allow refill
+        time.sleep(0.15)
+
+        assert registry.consume("alice", 5) is True
+
+    def test_idle_buckets_evicted_lazily(self):
+        """Test that buckets back at capacity are dropped when new keys arrive"""
+        registry = TokenBucketRegistry(capacity=2, refill_rate=2, refill_interval=0.05,
+                                       stripes=1, sweep_budget=10)
+
+        for i in range(5):
+            registry.consume(f"idle-{i}")
+        assert len(registry) == 5
+
+        # Long enough for every bucket to refill to capacity
+        time.sleep(0.1)
+
+        registry.consume("new")
+        assert len(registry) == 1
+        assert "new" in registry
+        assert "idle-0" not in registry
+        # An evicted key starts again with a full bucket
+        assert registry.get_available_tokens("idle-0") == 2
+
+    def test_recent_buckets_not_evicted(self):
+        """Test that buckets still refilling are kept"""
+        registry = TokenBucketRegistry(capacity=10, refill_rate=1, refill_interval=100,
+                                       stripes=1, sweep_budget=10)
+
+        registry.consume("alice", 10)
+        registry.consume("bob")
+
+        assert "alice" in registry
+        assert registry.evict_idle() == 0
+        assert registry.get_available_tokens("alice") == 0
+
+    def test_evict_idle(self):
+        """Test evicting all idle buckets at once"""
+        registry = TokenBucketRegistry(capacity=1, refill_rate=1, refill_interval=0.05, sweep_budget=0)
+
+        for i in range(100):
+            registry.consume(f"key-{i}")
+        time.sleep(0.1)
+
+        assert registry.evict_idle() == 100
+        assert len(registry) == 0
+
+    def test_reset_key(self):
+        """Test resetting one key's bucket to full capacity"""
+        registry = TokenBucketRegistry(capacity=10, refill_rate=2, refill_interval=100)
+
+        registry.consume("alice", 7)
+        registry.consume("bob", 7)
+        registry.reset("alice")
+
+        assert registry.get_available_tokens("alice") == 10
+        assert registry.get_available_tokens("bob") == 3
+
+    def test_slots_reused_after_eviction(self):
+        """Test that evicted buckets' storage is reused by new keys"""
+        registry = TokenBucketRegistry(capacity=1, refill_rate=1, refill_interval=100, stripes=1)
+
+        for i in range(10):
+            registry.consume(f"key-{i}")
+        for i in range(10):
+            registry.reset(f"key-{i}")
+        for i in range(10, 20):
+            registry.consume(f"key-{i}")
+
+        assert len(registry) == 10
+        assert len(registry.stripes[0].tokens) == 10
+
+    def test_thread_safety(self):
+        """Test that TokenBucketRegistry is thread-safe"""
+        registry = TokenBucketRegistry(capacity=50, refill_rate=1, refill_interval=100)
+        results = []
+
+        def consume_tokens():
+            for _ in range(20):
+                results.append(registry.consume("shared"))
+                registry.consume(f"{threading.get_ident()}")
+
+        threads = [threading.Thread(target=consume_tokens) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        # Exactly the shared key's capacity was admitted
+        assert sum(results) == 50
+        assert registry.get_available_tokens("shared") == 0
+
+    def test_consume_many_matches_sequential_consume(self, batch_mode):
+        """Test batch admission gives the same results as consume() in order"""
+        rng = random.Random(42)
+        batched = TokenBucketRegistry(capacity=5, refill_rate=1, refill_interval=100, stripes=4)
+        sequential = TokenBucketRegistry(capacity=5, refill_rate=1, refill_interval=100, stripes=4)
+
+        for _ in range(20):
+            keys = [rng.randrange(30) for _ in range(rng.randrange(1, 200))]
+            counts = [rng.choice([0, 1, 1, 2, 3, 6]) for _ in keys]
+            admitted = batched.consume_many(keys, counts)
+            assert [bool(a) for a in admitted] == [sequential.consume(k, n) for k, n in zip(keys, counts)]
+
+        for key in range(30):
+            assert batched.get_available_tokens(key) == sequential.get_available_tokens(key)
+
+    def test_consume_many_charges_repeated_keys_in_order(self, batch_mode):
+        """Test a key's later requests see what its earlier ones consumed"""
+        registry = TokenBucketRegistry(capacity=5, refill_rate=1, refill_interval=100)
+
+        admitted = registry.consume_many(["alice", "alice", "bob", "alice", "alice"], [3, 3, 5, 2, 1])
+
+        # alice: 3 fits, 3 doesn't, 2 fits what is left, then she is empty
+        assert [bool(a) for a in admitted] == [True, False, True, True, False]
+        assert registry.get_available_tokens("alice") == 0
+        assert registry.get_available_tokens("bob") == 0
+
+    def test_consume_many_single_count(self, batch_mode):
+        """Test one token count applied to every request"""
+        registry = TokenBucketRegistry(capacity=2, refill_rate=1, refill_interval=100)
+
+        admitted = registry.consume_many(["alice"] * 3 + ["bob"])
+
+        assert [bool(a) for a in admitted] == [True, True, False, True]
+        assert registry.get_available_tokens("bob") == 1
+
+    def test_consume_many_zero_tokens(self, batch_mode):
+        """Test zero-token requests are admitted without tracking the key"""
+        registry = TokenBucketRegistry(capacity=2, refill_rate=1)
+
+        assert all(registry.consume_many(["alice", "bob"], 0))
+        assert all(registry.consume_many(["alice", "bob"], [0, 1]))
+        assert "alice" not in registry
+        assert "bob" in registry
+
+    def test_consume_many_invalid_counts(self, batch_mode):
+        """Test negative or misaligned counts raise error"""
+        registry = TokenBucketRegistry(capacity=2, refill_rate=1)
+
+        with pytest.raises(ValueError):
+            registry.consume_many(["alice"], -1)
+
+        with pytest.raises(ValueError):
+            registry.consume_many(["alice", "bob"], [1, -1])
+
+        with pytest.raises(ValueError):
+            registry.consume_many(["alice", "bob"], [1])
+        assert len(registry) == 0
+
+    def test_consume_many_refills(self, batch_mode):
+        """Test that buckets refill before a batch is admitted"""
+        registry = TokenBucketRegistry(capacity=4, refill_rate=4, refill_interval=0.1)
+
+        assert all(registry.consume_many(["alice"] * 4))
+        assert not any(registry.consume_many(["alice"] * 2))
+
+        # Wait for a bit more than one interval to allow refill
+        time.sleep(0.15)
+
+        assert all(registry.consume_many(["alice"] * 4))
+
+    def test_consume_many_numpy_inputs(self, batch_mode):
+        """Test keys, counts and a single count given as numpy arrays and scalars"""
+        np = pytest.importorskip("numpy")
+        registry = TokenBucketRegistry(capacity=5, refill_rate=1, refill_interval=100, stripes=4)
+
+        admitted = registry.consume_many(np.array([1, 2, 1, 3]), np.array([3, 0, 3, 5]))
+        assert [bool(a) for a in admitted] == [True, True, False, True]
+        assert 2 not in registry
+
+        admitted = registry.consume_many(np.array(["alice", "alice", "alice"]), np.int64(2))
+        assert [bool(a) for a in admitted] == [True, True, False]
+        assert registry.get_available_tokens("alice") == 1
+
+        assert all(registry.consume_many(["bob"], np.float64(0)))
+        assert "bob" not in registry
+
+        with pytest.raises(ValueError):
+            registry.consume_many(["alice", "bob"], np.array([1, -1]))
@@ -1,7 +1,10 @@
+import math
 import pytest
+import random
 import time
 import threading
-from token_bucket import TokenBucket
+from fractions import Fraction
+from token_bucket import CONTINUOUS_REFILL, INTERVAL_REFILL, TokenBucket
 
 
 class TestTokenBucket:
@@ -217,3 +220,112 @@ class TestTokenBucket:
         # Should not refill yet
         assert bucket.consume(1) is False
         assert bucket.tokens == 0
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """A monotonic_ns clock that only moves when the test advances it"""
+    now = [10 ** 12]
+    monkeypatch.setattr(time, "monotonic_ns", lambda: now[0])
+    return now
+
+
+class TestContinuousRefill:
+    """Test cases for TokenBucket in continuous refill mode"""
+
+    def test_invalid_refill_mode(self):
+        """Test that an unknown refill mode is rejected"""
+        with pytest.raises(ValueError):
+            TokenBucket(capacity=10, refill_rate=2, refill_mode="sometimes")
+
+    def test_default_mode_is_interval(self):
+        """Test that buckets refill per interval unless asked otherwise"""
+        bucket = TokenBucket(capacity=10, refill_rate=2, refill_interval=1)
+        assert bucket.refill_mode == INTERVAL_REFILL
+
+    def test_consume(self, clock):
+        """Test token consumption in continuous mode"""
+        bucket = TokenBucket(capacity=10, refill_rate=2, refill_interval=1, refill_mode=CONTINUOUS_REFILL)
+
+        assert bucket.tokens == 10
+        assert bucket.consume(3) is True
+        assert bucket.tokens == 7
+        assert bucket.consume(8) is False
+        assert bucket.tokens == 7
+
+    def test_refill_without_waiting_for_interval(self, clock):
+        """Test that tokens accrue continuously instead of per whole interval"""
+        bucket = TokenBucket(capacity=10, refill_rate=2, refill_interval=1, refill_mode=CONTINUOUS_REFILL)
+        bucket.consume(10)
+
+        clock[0] += 250_000_000  # 0.25s
+        assert bucket.get_available_tokens() == 0.5
+        assert bucket.consume(1) is False
+
+        clock[0] += 250_000_000
+        assert bucket.consume(1) is True
+        assert bucket.tokens == 0
+
+    def test_small_refill_rate_is_exact(self, clock):
+        """Test that a fractional rate adds exactly what it should"""
+        bucket = TokenBucket(capacity=10, refill_rate=0.1, refill_interval=1, refill_mode=CONTINUOUS_REFILL)
+        bucket.consume(10)
+
+        for _ in range(100):
+            clock[0] += 100_000_000  # 0.1s at a time
+            bucket.get_available_tokens()
+
+        # 10 seconds at 0.1 tokens per second, with no rounding error
+        assert bucket.consume(1) is True
+        assert bucket.tokens == 0
+
+    def test_refill_capacity_limit(self, clock):
+        """Test that continuous refill doesn't exceed capacity"""
+        bucket = TokenBucket(capacity=5, refill_rate=10, refill_interval=1, refill_mode=CONTINUOUS_REFILL)
+        bucket.consume(5)
+
+        clock[0] += 10 ** 10
+        assert bucket.get_available_tokens() == 5
+
+    def test_ignores_wall_clock(self, clock, monkeypatch):
+        """Test that a system clock jump doesn't affect a continuous bucket"""
+        bucket = TokenBucket(capacity=10, refill_rate=2, refill_interval=1, refill_mode=CONTINUOUS_REFILL)
+        bucket.consume(10)
+
+        # The wall clock jumps decades ahead; monotonic time doesn't move
+        monkeypatch.setattr(time, "time", lambda: 86400 * 365 * 60.0)
+        assert bucket.get_available_tokens() == 0
+
+    def test_reset_bucket(self, clock):
+        """Test resetting a continuous bucket to full capacity"""
+        bucket = TokenBucket(capacity=10, refill_rate=2, refill_interval=1, refill_mode=CONTINUOUS_REFILL)
+
+        bucket.consume(5)
+        bucket.reset()
+        assert bucket.tokens == 10
+
+    @pytest.mark.parametrize("seed", range(20))
+    def test_admits_rate_times_time_plus_capacity(self, clock, seed):
+        """Test that over a long run exactly capacity + rate * time tokens are admitted"""
+        rng = random.Random(seed)
+        capacity = rng.randint(2, 50)
+        refill_rate = rng.choice([0.1, 0.3, 1, 2.5, 7, 100])
+        refill_interval = rng.choice([0.1, 1, 3, 60])
+        bucket = TokenBucket(capacity=capacity, refill_rate=refill_rate, refill_interval=refill_interval,
+                             refill_mode=CONTINUOUS_REFILL)
+
+        # Steps short enough that less than a token accrues per step, so a
+        # greedy consumer keeps the bucket below capacity and nothing is capped
+        rate_per_ns = Fraction(str(refill_rate)) / (Fraction(str(refill_interval)) * 10 ** 9)
+        max_step = int(Fraction(9, 10) / rate_per_ns)
+        started = clock[0]
+        admitted = 0
+        for _ in range(2000):
+            while bucket.consume(1):
+                admitted += 1
+            clock[0] += rng.randint(1, max_step)
+        while bucket.consume(1):
+            admitted += 1
+
+        elapsed = clock[0] - started
+        assert admitted == math.floor(capacity + rate_per_ns * elapsed)
@@ -1,3 +1,5 @@
-from .token_bucket import TokenBucket
+from .token_bucket import TokenBucket, INTERVAL_REFILL, CONTINUOUS_REFILL
+from .registry import TokenBucketRegistry
+from .leased import LeasedTokenBucket
 
-__all__ = ['TokenBucket']
+__all__ = ['TokenBucket', 'INTERVAL_REFILL', 'CONTINUOUS_REFILL', 'TokenBucketRegistry', 'LeasedTokenBucket']
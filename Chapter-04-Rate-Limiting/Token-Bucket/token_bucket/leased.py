@@ -0,0 +1,142 @@
+import math
+import time
+import threading
+
+from .token_bucket import TokenBucket
+
+
+class LeasedTokenBucket:
+    """
+    A low-contention front end for a TokenBucket shared by many threads.
+
+    Every TokenBucket.consume takes the bucket's lock, so threads hammering one
+    bucket serialize on it. Here each thread takes tokens from the bucket in
+    leases of up to `lease_size` at a time and spends them locally without any
+    lock: the bucket's lock is taken once per lease instead of once per
+    request.
+
+    A lease can only be spent from for `lease_ttl` seconds after it was
+    taken. What is left of it stays out of the bucket until the same thread
+    calls consume() or release() again: a thread that goes quiet keeps its
+    leftover tokens from the other threads until then, and the leftover of a
+    thread that exits is never returned. Threads that stop using the bucket
+    should call release() first.
+
+    Nothing is admitted that the bucket wouldn't have admitted: leased tokens
+    are already consumed from it. The trade-off is that up to lease_size - 1
+    tokens per thread can sit in a lease while another thread is rejected,
+    so keep lease_size small relative to capacity.
+
+    Attributes:
+        bucket (TokenBucket): The shared bucket tokens are leased from
+        lease_size (int): Most tokens a thread takes from the bucket at once
+        lease_ttl (float): Seconds a lease may be spent from
+    """
+
+    def __init__(self, bucket: TokenBucket, lease_size: int = 16, lease_ttl: float = 0.05):
+        """
+        Initialize a LeasedTokenBucket in front of `bucket`.
+
+        Args:
+            bucket (TokenBucket): The shared bucket to lease tokens from
+            lease_size (int): Most tokens a thread takes from the bucket at once
+            lease_ttl (float): Seconds a lease may be spent from
+
+        Raises:
+            ValueError: If any parameter is invalid (<= 0)
+        """
+        if lease_size <= 0:
+            raise ValueError("Lease size must be greater than 0")
+        if lease_ttl <= 0:
+            raise ValueError("Lease TTL must be greater than 0")
+
+        self.bucket = bucket
+        self.lease_size = lease_size
+        self.lease_ttl = lease_ttl
+        # Per thread: [tokens left in the lease, monotonic expiry time]
+        self.local = threading.local()
+
+    def _lease(self) -> list:
+        lease = getattr(self.local, "lease", None)
+        if lease is None:
+            lease = self.local.lease = [0, 0.0]
+        return lease
+
+    def consume(self, tokens_requested: int) -> bool:
+        """
+        Attempt to consume the specified number of tokens.
+
+        Args:
+            tokens_requested (int): Number of tokens to consume
+
+        Returns:
+            bool: True if tokens were successfully consumed, False otherwise
+
+        Raises:
+            ValueError: If tokens_requested is negative
+        """
+        if tokens_requested < 0:
+            raise ValueError("Tokens requested cannot be negative")
+
+        if tokens_requested == 0:
+            return True
+
+        lease = self._lease()
+        now = time.monotonic()
+        if lease[0] >= tokens_requested and now < lease[1]:
+            lease[0] -= tokens_requested
+            return True
+        return self._renew(lease, tokens_requested, now)
+
+    def _renew(self, lease: list, tokens_requested: int, now: float) -> bool:
+        """Hand back the current lease and take a new one that covers tokens_requested."""
+        bucket = self.bucket
+        with bucket.lock:
+            bucket._refill_tokens()
+            bucket._give_back(lease[0])
+            lease[0] = 0
+            # Like TokenBucket.consume, don't jump the queue of acquire() callers
+            if bucket._waiters or bucket.tokens < tokens_requested:
+                return False
+
+            # Lease whole tokens only, so what is handed back is whole too
+            taken = max(tokens_requested, min(self.lease_size, math.floor(bucket.tokens)))
+            bucket._take(taken)
+        lease[0] = taken - tokens_requested
+        lease[1] = now + self.lease_ttl
+        return True
+
+    def release(self) -> None:
+        """
+        Hand the calling thread's unused leased tokens back to the bucket.
+
+        Call it before a thread stops using the bucket (or exits), or its
+        leftover tokens stay unavailable to other threads.
+        """
+        lease = self._lease()
+        if lease[0]:
+            bucket = self.bucket
+            with bucket.lock:
+                bucket._give_back(lease[0])
+            lease[0] = 0
+
+    def get_available_tokens(self) -> float:
+        """
+        Get the number of tokens left in the shared bucket, refill included.
+
+        Unlike TokenBucket.get_available_tokens this doesn't take the lock or
+        apply the refill: it reads the bucket as is and works out what a refill
+        would add, so calling it after every consume adds no contention. The
+        result may already be out of date when it is returned. Tokens leased
+        to threads are not included.
+
+        Returns:
+            float: Number of available tokens
+        """
+        return self.bucket._peek_tokens()
+
+    def __repr__(self) -> str:
+        """String representation of the LeasedTokenBucket."""
+        return (f"LeasedTokenBucket({self.bucket!r}, "
+                f"lease_size={self.lease_size}, "
+                f"lease_ttl={self.lease_ttl})")
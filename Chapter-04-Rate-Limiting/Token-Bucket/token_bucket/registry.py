@@ -0,0 +1,396 @@
+import numbers
+import time
+import threading
+from array import array
+from typing import Dict, Hashable, Iterable, List, Optional, Sequence, Union
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - numpy is optional
+    np = None
+
+
+# Stripes with fewer requests than this in a batch are admitted one by one:
+# below it the fixed cost of the numpy calls outweighs the per-request loop
+VECTORIZE_MIN_REQUESTS = 32
+
+
+class _Stripe:
+    """
+    Bucket state for the keys hashed to one lock.
+
+    Buckets live in parallel arrays indexed by slot number instead of one
+    object each: a bucket costs two doubles, one list entry and one dict
+    entry, with no per-bucket lock or __dict__.
+    """
+
+    __slots__ = ("lock", "slots", "keys", "tokens", "last_refill_time", "free", "cursor")
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.slots: Dict[Hashable, int] = {}
+        self.keys: List[Optional[Hashable]] = []
+        self.tokens = array("d")
+        self.last_refill_time = array("d")
+        self.free: List[int] = []
+        self.cursor = 0
+
+    def add(self, key: Hashable, tokens: float, now: float) -> int:
+        if self.free:
+            slot = self.free.pop()
+            self.keys[slot] = key
+            self.tokens[slot] = tokens
+            self.last_refill_time[slot] = now
+        else:
+            slot = len(self.keys)
+            self.keys.append(key)
+            self.tokens.append(tokens)
+            self.last_refill_time.append(now)
+        self.slots[key] = slot
+        return slot
+
+    def remove(self, slot: int) -> None:
+        del self.slots[self.keys[slot]]
+        self.keys[slot] = None
+        self.free.append(slot)
+
+
+class TokenBucketRegistry:
+    """
+    A thread-safe set of token buckets, one per key (e.g. per API key or client IP).
+
+    Every bucket shares the same capacity, refill rate and refill interval and
+    refills exactly like a TokenBucket. Keys are created on first use with a
+    full bucket, so millions of them can be tracked without being registered
+    up front.
+
+    State is stored compactly in lock stripes: each key hashes to one of
+    `stripes` independently locked groups that keep their buckets in arrays,
+    so two threads only contend when their keys share a stripe.
+
+    A bucket that has been idle long enough to refill to capacity is
+    indistinguishable from a new one, so it is dropped: every consume() that
+    adds a key examines up to `sweep_budget` buckets of its stripe and evicts
+    the idle ones. Memory only grows when keys are added, so this keeps it
+    proportional to the recently active keys at O(1) cost per call, and
+    consumes on known keys pay nothing for it.
+
+    Attributes:
+        capacity (int): Maximum number of tokens each bucket can hold
+        refill_rate (float): Number of tokens added per time unit
+        refill_interval (float): Time interval between refills in seconds
+        sweep_budget (int): Buckets examined for eviction per new key
+    """
+
+    def __init__(self, capacity: int, refill_rate: float, refill_interval: float = 1.0,
+                 stripes: int = 64, sweep_budget: int = 2):
+        """
+        Initialize an empty registry.
+
+        Args:
+            capacity (int): Maximum number of tokens each bucket can hold
+            refill_rate (float): Number of tokens added per time unit
+            refill_interval (float): Time interval between refills in seconds
+            stripes (int): Number of independently locked stripes
+            sweep_budget (int): Buckets examined for eviction per new key
+
+        Raises:
+            ValueError: If any parameter is invalid (<= 0, or < 0 for sweep_budget)
+        """
+        if capacity <= 0:
+            raise ValueError("Capacity must be greater than 0")
+        if refill_rate <= 0:
+            raise ValueError("Refill rate must be greater than 0")
+        if refill_interval <= 0:
+            raise ValueError("Refill interval must be greater than 0")
+        if stripes <= 0:
+            raise ValueError("Stripe count must be greater than 0")
+        if sweep_budget < 0:
+            raise ValueError("Sweep budget cannot be negative")
+
+        self.capacity = capacity
+        self.refill_rate = refill_rate
+        self.refill_interval = refill_interval
+        self.sweep_budget = sweep_budget
+        self.stripes = [_Stripe() for _ in range(stripes)]
+
+    def _stripe_for(self, key: Hashable) -> _Stripe:
+        return self.stripes[hash(key) % len(self.stripes)]
+
+    def _refill_tokens(self, stripe: _Stripe, slot: int, now: float) -> None:
+        """Same refill as TokenBucket._refill_tokens; the caller holds the stripe lock."""
+        intervals_passed = (now - stripe.last_refill_time[slot]) / self.refill_interval
+        if intervals_passed >= 1.0:
+            stripe.tokens[slot] = min(self.capacity, stripe.tokens[slot] + intervals_passed * self.refill_rate)
+            stripe.last_refill_time[slot] = now
+
+    def _is_idle(self, stripe: _Stripe, slot: int, now: float) -> bool:
+        """Whether the bucket would be back at capacity if it were refilled now."""
+        elapsed = now - stripe.last_refill_time[slot]
+        missing = self.capacity - stripe.tokens[slot]
+        return elapsed >= max(self.refill_interval, missing / self.refill_rate * self.refill_interval)
+
+    def _sweep(self, stripe: _Stripe, now: float, budget: int) -> int:
+        """Evict idle buckets among the next `budget` slots; the caller holds the stripe lock."""
+        evicted = 0
+        size = len(stripe.keys)
+        for _ in range(min(budget, size)):
+            slot = stripe.cursor % size
+            stripe.cursor = slot + 1
+            if stripe.keys[slot] is not None and self._is_idle(stripe, slot, now):
+                stripe.remove(slot)
+                evicted += 1
+        return evicted
+
+    def consume(self, key: Hashable, tokens_requested: int = 1) -> bool:
+        """
+        Attempt to consume tokens from the bucket of `key`.
+
+        Args:
+            key (Hashable): Whose bucket to consume from
+            tokens_requested (int): Number of tokens to consume
+
+        Returns:
+            bool: True if tokens were successfully consumed, False otherwise
+
+        Raises:
+            ValueError: If tokens_requested is negative
+        """
+        if tokens_requested < 0:
+            raise ValueError("Tokens requested cannot be negative")
+
+        if tokens_requested == 0:
+            return True
+
+        stripe = self._stripe_for(key)
+        with stripe.lock:
+            now = time.time()
+            slot = stripe.slots.get(key)
+            if slot is None:
+                self._sweep(stripe, now, self.sweep_budget)
+                slot = stripe.add(key, float(self.capacity), now)
+            else:
+                self._refill_tokens(stripe, slot, now)
+
+            tokens = stripe.tokens[slot]
+            if tokens >= tokens_requested:
+                stripe.tokens[slot] = tokens - tokens_requested
+                return True
+            return False
+
+    def consume_many(self, keys: Iterable[Hashable],
+                     tokens_requested: Union[int, Sequence[int]] = 1):
+        """
+        Admission decisions for a batch of requests in one pass.
+
+        The result is the same as calling consume(key, n) for each request in
+        order at one instant: a key that appears several times is charged in
+        sequence, so once its bucket runs dry the later requests for it are
+        rejected unless they are small enough for what is left. Each stripe
+        is locked once for the whole batch and the clock is read once.
+
+        With numpy installed, refill and admission run vectorized over the
+        stripe's bucket arrays; without it the same decisions are made in a
+        plain loop.
+
+        Args:
+            keys (Iterable[Hashable]): Whose bucket each request consumes from
+            tokens_requested (int or Sequence[int]): Tokens per request, one
+                count for all of them or one per key (a list or numpy array)
+
+        Returns:
+            Admission mask aligned with keys: a numpy bool array with numpy
+            installed, otherwise a list of bool
+
+        Raises:
+            ValueError: If a count is negative or the counts don't match the keys
+        """
+        keys = list(keys)
+        if isinstance(tokens_requested, numbers.Real):
+            if tokens_requested < 0:
+                raise ValueError("Tokens requested cannot be negative")
+            counts = None
+        else:
+            if np is not None:
+                counts = np.asarray(tokens_requested if isinstance(tokens_requested, np.ndarray)
+                                    else list(tokens_requested))
+                negative = counts.size and counts.min() < 0
+            else:
+                counts = list(tokens_requested)
+                negative = counts and min(counts) < 0
+            if len(counts) != len(keys):
+                raise ValueError("tokens_requested must have one count per key")
+            if negative:
+                raise ValueError("Tokens requested cannot be negative")
+
+        admitted = [True] * len(keys) if np is None else np.ones(len(keys), dtype=bool)
+        if counts is None and tokens_requested == 0:
+            return admitted
+
+        # Requests for zero tokens are always admitted and don't create a bucket
+        if counts is None:
+            live = list(range(len(keys)))
+        elif np is not None:
+            live = np.flatnonzero(counts).tolist()
+        else:
+            live = [position for position, count in enumerate(counts) if count]
+
+        stripe_count = len(self.stripes)
+        if stripe_count == 1:
+            groups = {0: live}
+        elif np is not None and len(live) >= VECTORIZE_MIN_REQUESTS:
+            stripe_of = np.fromiter((hash(keys[position]) % stripe_count for position in live),
+                                    dtype=np.intp, count=len(live))
+            order = np.argsort(stripe_of, kind="stable")
+            indices, starts = np.unique(stripe_of[order], return_index=True)
+            ordered = np.asarray(live, dtype=np.intp)[order]
+            groups = dict(zip(indices.tolist(), (part.tolist() for part in np.split(ordered, starts[1:]))))
+        else:
+            groups: Dict[int, List[int]] = {}
+            for position in live:
+                groups.setdefault(hash(keys[position]) % stripe_count, []).append(position)
+
+        now = time.time()
+        for index, positions in groups.items():
+            if counts is None:
+                needs = tokens_requested
+            elif np is not None:
+                needs = counts[positions]
+            else:
+                needs = [counts[position] for position in positions]
+            group_keys = [keys[position] for position in positions]
+
+            stripe = self.stripes[index]
+            with stripe.lock:
+                slots = [stripe.slots.get(key) for key in group_keys] if stripe.slots else [None] * len(group_keys)
+                added = 0
+                if None in slots:
+                    for i, key in enumerate(group_keys):
+                        if slots[i] is None:
+                            # The key may have been added earlier in this batch
+                            slots[i] = stripe.slots.get(key)
+                            if slots[i] is None:
+                                slots[i] = stripe.add(key, float(self.capacity), now)
+                                added += 1
+
+                if np is not None and len(positions) >= VECTORIZE_MIN_REQUESTS:
+                    admitted[positions] = self._admit_vectorized(stripe, slots, needs, now)
+                else:
+                    for i, slot in enumerate(slots):
+                        need = needs if counts is None else needs[i]
+                        self._refill_tokens(stripe, slot, now)
+                        tokens = stripe.tokens[slot]
+                        if tokens >= need:
+                            stripe.tokens[slot] = tokens - need
+                        else:
+                            admitted[positions[i]] = False
+                # Sweeping after the batch can't evict a bucket still in use by it
+                self._sweep(stripe, now, self.sweep_budget * added)
+        return admitted
+
+    def _admit_vectorized(self, stripe: _Stripe, slots: List[int], needs: Union[int, List[int]], now: float):
+        """
+        consume_many for one stripe with numpy; the caller holds the stripe lock.
+
+        The arrays are viewed in place, and the views must be gone before the
+        lock is released (a viewed array can't grow), so they stay local here.
+        """
+        tokens = np.frombuffer(stripe.tokens, dtype=np.float64)
+        last_refill_time = np.frombuffer(stripe.last_refill_time, dtype=np.float64)
+
+        # Group each bucket's requests together, keeping their order
+        order = np.argsort(np.asarray(slots, dtype=np.intp), kind="stable")
+        slot = np.asarray(slots, dtype=np.intp)[order]
+        need = np.broadcast_to(np.asarray(needs, dtype=np.float64), order.shape)[order]
+        starts = np.flatnonzero(np.r_[True, slot[1:] != slot[:-1]])
+        ends = np.r_[starts[1:], len(slot)]
+        buckets = slot[starts]
+
+        # Same refill as _refill_tokens, for every bucket at once
+        intervals_passed = (now - last_refill_time[buckets]) / self.refill_interval
+        due = intervals_passed >= 1.0
+        refilled = buckets[due]
+        tokens[refilled] = np.minimum(self.capacity, tokens[refilled] + intervals_passed[due] * self.refill_rate)
+        last_refill_time[refilled] = now
+        available = tokens[buckets]
+
+        # Tokens a bucket's requests need up to and including each one
+        running = np.cumsum(need)
+        group = np.repeat(np.arange(len(starts)), ends - starts)
+        demand = running - (running[starts] - need[starts])[group]
+        admitted = demand <= available[group]
+
+        # A bucket that ran dry: after its first rejection only requests that
+        # fit in what is left get through, in order
+        for index in np.unique(group[~admitted]):
+            first = starts[index] + int(np.argmin(admitted[starts[index]:ends[index]]))
+            remaining = available[index] - (demand[first] - need[first])
+            admitted[first:ends[index]] = False
+            rest = need[first:ends[index]]
+            offset = 0
+            while True:
+                fits = np.flatnonzero(rest[offset:] <= remaining)
+                if not len(fits):
+                    break
+                offset += int(fits[0])
+                admitted[first + offset] = True
+                remaining -= rest[offset]
+                offset += 1
+
+        tokens[buckets] = available - np.add.reduceat(np.where(admitted, need, 0.0), starts)
+        mask = np.empty(len(slot), dtype=bool)
+        mask[order] = admitted
+        return mask
+
+    def get_available_tokens(self, key: Hashable) -> float:
+        """
+        Get the current number of available tokens for `key` (after refilling).
+
+        Returns:
+            float: Number of available tokens; capacity for an untracked key
+        """
+        stripe = self._stripe_for(key)
+        with stripe.lock:
+            slot = stripe.slots.get(key)
+            if slot is None:
+                return float(self.capacity)
+            self._refill_tokens(stripe, slot, time.time())
+            return stripe.tokens[slot]
+
+    def reset(self, key: Hashable) -> None:
+        """
+        Reset the bucket of `key` to full capacity.
+        """
+        stripe = self._stripe_for(key)
+        with stripe.lock:
+            slot = stripe.slots.get(key)
+            if slot is not None:
+                stripe.remove(slot)
+
+    def evict_idle(self) -> int:
+        """
+        Evict every idle bucket now instead of lazily.
+
+        Returns:
+            int: Number of buckets evicted
+        """
+        evicted = 0
+        for stripe in self.stripes:
+            with stripe.lock:
+                evicted += self._sweep(stripe, time.time(), len(stripe.keys))
+        return evicted
+
+    def __contains__(self, key: Hashable) -> bool:
+        stripe = self._stripe_for(key)
+        with stripe.lock:
+            return key in stripe.slots
+
+    def __len__(self) -> int:
+        return sum(len(stripe.slots) for stripe in self.stripes)
+
+    def __repr__(self) -> str:
+        """String representation of the TokenBucketRegistry."""
+        return (f"TokenBucketRegistry(capacity={self.capacity}, "
+                f"refill_rate={self.refill_rate}, "
+                f"refill_interval={self.refill_interval}, "
+                f"keys={len(self)})")
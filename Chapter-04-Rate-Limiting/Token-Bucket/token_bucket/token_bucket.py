@@ -1,6 +1,67 @@
+import asyncio
+import math
 import time
 import threading
-from typing import Optional
+from collections import deque
+from fractions import Fraction
+from typing import Optional, Union
+
+
+INTERVAL_REFILL = "interval"
+CONTINUOUS_REFILL = "continuous"
+REFILL_MODES = (INTERVAL_REFILL, CONTINUOUS_REFILL)
+
+
+class _Waiter:
+    """A thread blocked in TokenBucket.acquire()."""
+
+    __slots__ = ("tokens", "event")
+
+    def __init__(self, tokens: int):
+        self.tokens = tokens
+        self.event = threading.Event()
+
+    def wake(self) -> None:
+        self.event.set()
+
+    def clear(self) -> None:
+        self.event.clear()
+
+    def wait(self, timeout: Optional[float]) -> None:
+        self.event.wait(timeout)
+
+
+class _AsyncWaiter:
+    """A task awaiting TokenBucket.acquire_async(); may be woken from any thread."""
+
+    __slots__ = ("tokens", "loop", "future")
+
+    def __init__(self, tokens: int):
+        self.tokens = tokens
+        self.loop = asyncio.get_running_loop()
+        self.future = self.loop.create_future()
+
+    def _set(self) -> None:
+        if not self.future.done():
+            self.future.set_result(None)
+
+    def wake(self) -> None:
+        try:
+            self.loop.call_soon_threadsafe(self._set)
+        except RuntimeError:
+            pass  # Loop already closed: nobody is waiting any more
+
+    def clear(self) -> None:
+        if self.future.done():
+            self.future = self.loop.create_future()
+
+    async def wait(self, timeout: Optional[float]) -> None:
+        timer = None if timeout is None else self.loop.call_later(timeout, self._set)
+        try:
+            await self.future
+        finally:
+            if timer is not None:
+                timer.cancel()
 
 
 class TokenBucket:
@@ -11,16 +72,35 @@ class TokenBucket:
     Tokens are refilled at a constant rate over time, and requests consume tokens.
     If the bucket is empty, requests are rejected.
     
+    Two refill modes are available:
+    
+    - "interval" (default): tokens are added only once a whole refill_interval
+      has passed since the last refill, timed with the wall clock
+    - "continuous": tokens accrue every nanosecond of time.monotonic_ns, which
+      doesn't jump when the system clock is adjusted. Tokens are counted
+      exactly in integer fractions of a token, so no partial progress is lost
+      and over any period the bucket admits exactly
+      capacity + refill_rate * elapsed / refill_interval tokens at most
+    
     Attributes:
         capacity (int): Maximum number of tokens the bucket can hold
         refill_rate (float): Number of tokens added per time unit
         refill_interval (float): Time interval between refills in seconds
+        refill_mode (str): "interval" or "continuous"
         tokens (float): Current number of tokens in the bucket
-        last_refill_time (float): Timestamp of the last refill
+        last_refill_time (float): Timestamp of the last refill (time.time()
+            seconds, or time.monotonic_ns() nanoseconds in continuous mode)
         lock (threading.Lock): Thread lock for thread safety
+    
+    acquire() and acquire_async() wait for tokens instead of failing. Waiters
+    are served strictly in arrival order, threads and tasks alike: only the
+    first in line sleeps until its tokens will exist, the rest sleep until
+    it has been served, and consume() fails while anyone is waiting. A large
+    request therefore can't be starved by a stream of small ones.
     """
     
-    def __init__(self, capacity: int, refill_rate: float, refill_interval: float = 1.0):
+    def __init__(self, capacity: int, refill_rate: float, refill_interval: float = 1.0,
+                 refill_mode: str = INTERVAL_REFILL):
         """
         Initialize a TokenBucket with the specified parameters.
         
@@ -28,9 +108,10 @@ class TokenBucket:
             capacity (int): Maximum number of tokens the bucket can hold
             refill_rate (float): Number of tokens added per time unit
             refill_interval (float): Time interval between refills in seconds
+            refill_mode (str): "interval" or "continuous"
             
         Raises:
-            ValueError: If any parameter is invalid (<= 0)
+            ValueError: If any parameter is invalid (<= 0, or an unknown refill mode)
         """
         if capacity <= 0:
             raise ValueError("Capacity must be greater than 0")
@@ -38,13 +119,44 @@ class TokenBucket:
             raise ValueError("Refill rate must be greater than 0")
         if refill_interval <= 0:
             raise ValueError("Refill interval must be greater than 0")
+        if refill_mode not in REFILL_MODES:
+            raise ValueError(f"Refill mode must be one of {REFILL_MODES}")
         
         self.capacity = capacity
         self.refill_rate = refill_rate
         self.refill_interval = refill_interval
-        self.tokens = float(capacity)  # Start with full capacity
-        self.last_refill_time = time.time()
+        self.refill_mode = refill_mode
+        
+        # Tokens are kept in self._units, counted in 1/_scale of a token
+        if refill_mode == CONTINUOUS_REFILL:
+            # The rate as an exact fraction p/q of a token per nanosecond: counting
+            # tokens in 1/q units, each nanosecond adds exactly p of them
+            per_ns = Fraction(str(refill_rate)) / (Fraction(str(refill_interval)) * 1_000_000_000)
+            self._scale = per_ns.denominator
+            self._units_per_ns = per_ns.numerator
+            self._capacity_units = capacity * self._scale
+            self._refill_tokens = self._refill_tokens_continuously
+        else:
+            self._scale = 1
+            self._capacity_units = capacity
+        self._reset_tokens()
         self.lock = threading.Lock()
+        # acquire()/acquire_async() callers in arrival order
+        self._waiters = deque()
+    
+    def _reset_tokens(self) -> None:
+        """Fill the bucket to capacity as of now."""
+        if self.refill_mode == CONTINUOUS_REFILL:
+            self._units = self._capacity_units
+            self.last_refill_time = time.monotonic_ns()
+        else:
+            self._units = float(self.capacity)
+            self.last_refill_time = time.time()
+    
+    @property
+    def tokens(self) -> float:
+        """Current number of tokens in the bucket (without refilling)."""
+        return self._units / self._scale
     
     def _refill_tokens(self) -> None:
         """
@@ -62,11 +174,45 @@ class TokenBucket:
             tokens_to_add = intervals_passed * self.refill_rate
             
             # Update tokens (don't exceed capacity)
-            self.tokens = min(self.capacity, self.tokens + tokens_to_add)
+            self._units = min(self.capacity, self._units + tokens_to_add)
             
             # Update last refill time
             self.last_refill_time = current_time
     
+    def _refill_tokens_continuously(self) -> None:
+        """
+        Continuous-mode _refill_tokens: add what every nanosecond since the
+        last refill is worth, exactly.
+        """
+        current_time = time.monotonic_ns()
+        time_passed = current_time - self.last_refill_time
+        
+        if time_passed > 0:
+            self._units = min(self._capacity_units, self._units + time_passed * self._units_per_ns)
+            self.last_refill_time = current_time
+    
+    def _take(self, tokens: int) -> None:
+        """Remove tokens the caller has checked are available; the caller holds the lock."""
+        self._units -= tokens * self._scale
+    
+    def _give_back(self, tokens: int) -> None:
+        """Return tokens to the bucket (up to capacity); the caller holds the lock."""
+        self._units = min(self._capacity_units, self._units + tokens * self._scale)
+        self._wake_next()
+    
+    def _peek_tokens(self) -> float:
+        """Tokens as a refill now would leave them, without the lock and without refilling."""
+        units, last_refill_time = self._units, self.last_refill_time
+        if self.refill_mode == CONTINUOUS_REFILL:
+            time_passed = time.monotonic_ns() - last_refill_time
+            if time_passed > 0:
+                units = min(self._capacity_units, units + time_passed * self._units_per_ns)
+        else:
+            intervals_passed = (time.time() - last_refill_time) / self.refill_interval
+            if intervals_passed >= 1.0:
+                units = min(self.capacity, units + intervals_passed * self.refill_rate)
+        return units / self._scale
+    
     def consume(self, tokens_requested: int) -> bool:
         """
         Attempt to consume the specified number of tokens.
@@ -87,16 +233,176 @@ class TokenBucket:
             return True
         
         with self.lock:
+            # Don't jump the queue of acquire() callers
+            if self._waiters:
+                return False
+            
             # Refill tokens first
             self._refill_tokens()
             
             # Check if we have enough tokens
-            if self.tokens >= tokens_requested:
-                self.tokens -= tokens_requested
+            needed = tokens_requested * self._scale
+            if self._units >= needed:
+                self._units -= needed
                 return True
             else:
                 return False
     
+    def _wait_time(self, tokens_requested: int) -> float:
+        """
+        Seconds until tokens_requested tokens will be in the bucket (<= 0 if
+        they already are); the caller holds the lock and has just refilled.
+        """
+        missing = tokens_requested * self._scale - self._units
+        if missing <= 0:
+            return 0.0
+        
+        if self.refill_mode == CONTINUOUS_REFILL:
+            nanoseconds = math.ceil(missing / self._units_per_ns)
+            return (self.last_refill_time + nanoseconds - time.monotonic_ns()) / 1e9
+        
+        # Tokens only arrive once a whole interval has passed since the last refill;
+        # the microsecond keeps float rounding from leaving it a hair short
+        needed = max(self.refill_interval, missing / self.refill_rate * self.refill_interval)
+        return self.last_refill_time + needed + 1e-6 - time.time()
+    
+    def _wake_next(self) -> None:
+        """Let the first waiter in line re-check the bucket; the caller holds the lock."""
+        if self._waiters:
+            self._waiters[0].wake()
+    
+    def _check_acquire(self, tokens_requested: int) -> None:
+        if tokens_requested < 0:
+            raise ValueError("Tokens requested cannot be negative")
+        if tokens_requested > self.capacity:
+            raise ValueError("Tokens requested cannot exceed capacity")
+    
+    def _enqueue(self, waiter: Union[_Waiter, _AsyncWaiter]) -> bool:
+        """Take the tokens right away if nobody is waiting and they are there, else get in line."""
+        with self.lock:
+            if not self._waiters:
+                self._refill_tokens()
+                if self._wait_time(waiter.tokens) <= 0:
+                    self._take(waiter.tokens)
+                    return True
+            self._waiters.append(waiter)
+            return False
+    
+    def _serve(self, waiter: Union[_Waiter, _AsyncWaiter]) -> Optional[float]:
+        """
+        Give waiter its tokens if it is first in line and they are there
+        (returns None), else the seconds it should sleep for: until its tokens
+        will exist, or indefinitely (inf) until woken when it isn't first.
+        """
+        with self.lock:
+            if self._waiters[0] is not waiter:
+                waiter.clear()
+                return math.inf
+            self._refill_tokens()
+            wait = self._wait_time(waiter.tokens)
+            if wait <= 0:
+                self._take(waiter.tokens)
+                self._waiters.popleft()
+                self._wake_next()
+                return None
+            waiter.clear()
+            return wait
+    
+    def _leave(self, waiter: Union[_Waiter, _AsyncWaiter]) -> None:
+        """Take a waiter that gave up out of line."""
+        with self.lock:
+            if self._waiters and self._waiters[0] is waiter:
+                self._waiters.popleft()
+                self._wake_next()
+            else:
+                self._waiters.remove(waiter)
+    
+    def acquire(self, tokens_requested: int = 1, timeout: Optional[float] = None) -> bool:
+        """
+        Consume tokens, blocking until they are available.
+        
+        Instead of polling, the caller sleeps exactly until enough tokens will
+        have been refilled. Callers are served in arrival order.
+        
+        Args:
+            tokens_requested (int): Number of tokens to consume
+            timeout (float): Most seconds to wait, or None to wait as long as it takes
+            
+        Returns:
+            bool: True once the tokens were consumed, False if the timeout passed first
+            
+        Raises:
+            ValueError: If tokens_requested is negative or more than capacity
+        """
+        self._check_acquire(tokens_requested)
+        if tokens_requested == 0:
+            return True
+        
+        deadline = None if timeout is None else time.monotonic() + timeout
+        waiter = _Waiter(tokens_requested)
+        if self._enqueue(waiter):
+            return True
+        served = False
+        try:
+            while True:
+                wait = self._serve(waiter)
+                if wait is None:
+                    served = True
+                    return True
+                if deadline is not None:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        return False
+                    wait = min(wait, remaining)
+                waiter.wait(None if wait == math.inf else wait)
+        finally:
+            if not served:
+                self._leave(waiter)
+    
+    async def acquire_async(self, tokens_requested: int = 1, timeout: Optional[float] = None) -> bool:
+        """
+        Consume tokens, awaiting until they are available.
+        
+        The asyncio counterpart of acquire(): the task sleeps exactly until
+        enough tokens will have been refilled, without blocking the event
+        loop. Tasks and threads share one first-come, first-served line.
+        Cancelling the task takes it out of line.
+        
+        Args:
+            tokens_requested (int): Number of tokens to consume
+            timeout (float): Most seconds to wait, or None to wait as long as it takes
+            
+        Returns:
+            bool: True once the tokens were consumed, False if the timeout passed first
+            
+        Raises:
+            ValueError: If tokens_requested is negative or more than capacity
+        """
+        self._check_acquire(tokens_requested)
+        if tokens_requested == 0:
+            return True
+        
+        deadline = None if timeout is None else time.monotonic() + timeout
+        waiter = _AsyncWaiter(tokens_requested)
+        if self._enqueue(waiter):
+            return True
+        served = False
+        try:
+            while True:
+                wait = self._serve(waiter)
+                if wait is None:
+                    served = True
+                    return True
+                if deadline is not None:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        return False
+                    wait = min(wait, remaining)
+                await waiter.wait(None if wait == math.inf else wait)
+        finally:
+            if not served:
+                self._leave(waiter)
+    
     def get_available_tokens(self) -> float:
         """
         Get the current number of available tokens (after refilling).
@@ -106,19 +412,20 @@ class TokenBucket:
         """
         with self.lock:
             self._refill_tokens()
-            return self.tokens
+            return self._units / self._scale
     
     def reset(self) -> None:
         """
         Reset the bucket to full capacity.
         """
         with self.lock:
-            self.tokens = float(self.capacity)
-            self.last_refill_time = time.time()
+            self._reset_tokens()
+            self._wake_next()
     
     def __repr__(self) -> str:
         """String representation of the TokenBucket."""
         return (f"TokenBucket(capacity={self.capacity}, "
                 f"refill_rate={self.refill_rate}, "
                 f"refill_interval={self.refill_interval}, "
+                f"refill_mode={self.refill_mode!r}, "
                 f"tokens={self.tokens:.2f})")